@@ -73,7 +73,7 @@ from .ensemble import (
     ReversedTrajectoryEnsemble, SequentialEnsemble, VolumeEnsemble,
     SequentialEnsemble, IntersectionEnsemble, UnionEnsemble,
     SingleFrameEnsemble, MinusInterfaceEnsemble, TISEnsemble,
-    OptionalEnsemble, join_ensembles
+    OptionalEnsemble, EnsembleState, join_ensembles
 )
 
 from .step_visualizer_2D import StepVisualizer2D
@@ -134,6 +134,11 @@ from .snapshot_modifier import (
 
 from .storage.storage import Storage, AnalysisStorage
 
+from .trial_executor import (
+    TrialExecutor, SerialTrialExecutor, ThreadTrialExecutor,
+    ProcessTrialExecutor
+)
+
 from .volume import (
     Volume, VolumeCombination,
     EmptyVolume, FullVolume, CVDefinedVolume, PeriodicCVDefinedVolume,
@@ -175,7 +180,7 @@ from .pathmovers.move_schemes import *
 import openpathsampling.numerics as numerics
 import openpathsampling.beta
 
-from openpathsampling.engines import Trajectory, BaseSnapshot
+from openpathsampling.engines import Trajectory, ArrayTrajectory, BaseSnapshot
 
 # until engines are proper subpackages, built-ins need to be findable!
 import openpathsampling.engines.openmm #as openmm
@@ -8,9 +8,11 @@ calculations or output at several points in the simulation.
 import re
 import time
 import logging
+import pandas as pd
 import openpathsampling as paths
 from datetime import timedelta
 from openpathsampling.netcdfplus import StorableNamedObject
+from .storage_writer import BackgroundStorageWriter
 
 
 logger = logging.getLogger(__name__)
@@ -88,15 +90,27 @@ class StorageHook(PathSimulatorHook):
     frequency : int
                 save frequency measured in steps; default ``None`` uses the
                 simulation's value for ``save_frequency``
+    background : bool
+                 if ``True``, save and sync in a background thread (see
+                 :class:`.BackgroundStorageWriter`); the previous steps are
+                 written while the engine generates frames; default
+                 ``False``
+    queue_size : int
+                 maximum number of pending saves and syncs when writing in
+                 the background; the simulation waits if there are more
 
     """
     implemented_for = ['before_simulation', 'after_step',
                        'after_simulation']
 
-    def __init__(self, storage=None, frequency=None):
+    def __init__(self, storage=None, frequency=None, background=False,
+                 queue_size=4):
         self.storage = storage
         self.frequency = frequency
+        self.background = background
+        self.queue_size = queue_size
         self._simulation = None
+        self._writer = None
 
     @property
     def frequency(self):
@@ -116,19 +130,40 @@ class StorageHook(PathSimulatorHook):
 
     def before_simulation(self, sim, **kwargs):
         self._simulation = sim
+        if self._writer is not None:
+            # left over from a run that was interrupted: finish its work,
+            # so that only one writer uses the storage
+            writer, self._writer = self._writer, None
+            writer.stop()
+        if self.background and self.storage is not None:
+            self._writer = BackgroundStorageWriter(self.storage,
+                                                   self.queue_size)
+            # the simulation uses the storage (e.g., for cached CV values)
+            # and the saved objects; the writer only works while this
+            # thread runs dynamics or waits for it
+            self._writer.hold()
 
     def after_step(self, sim, step_number, step_info, state, results,
                    hook_state):
-        if self.storage is not None:
+        if self._writer is not None:
+            self._writer.save(results)
+            if step_number % self.frequency == 0:
+                self._writer.sync_all()
+        elif self.storage is not None:
             try:
                 self.storage.stash(results)
             except AttributeError:
-                self.storage.save(results)
+                with self.storage.batch():
+                    self.storage.save(results)
             if step_number % self.frequency == 0:
                 self.storage.sync_all()
 
     def after_simulation(self, sim, hook_state):
-        if self.storage is not None:
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            writer.sync_all()
+            writer.stop()
+        elif self.storage is not None:
             self.storage.sync_all()
 
 
@@ -222,6 +257,99 @@ class SampleSetSanityCheckHook(PathSimulatorHook):
                 sim.sample_set.sanity_check()
 
 
+class CacheStatisticsHook(PathSimulatorHook):
+    """
+    Sample the cache statistics of the storage during a simulation.
+
+    Enables the cache statistics of the storage (see
+    :meth:`.NetCDFPlus.enable_cache_statistics`) and records its
+    :meth:`.NetCDFPlus.cache_report` every ``frequency`` steps and at the
+    end of the simulation. The counters are cumulative; the hits and misses
+    between two samples are the differences of consecutive samples.
+
+    NOTE: Arguments passed to init take precedence over the corresponding
+          parameters of the PathSimulator this hook is attached to. They can
+          only be accessed through this hook, e.g. as hook.storage.
+
+    Parameters
+    ----------
+    storage : :class:`.Storage`
+              the storage whose caches are reported; default ``None`` uses
+              the simulation's ``storage``
+    frequency : int
+                sampling frequency measured in steps; default ``None`` uses
+                the simulation's value for ``save_frequency``
+
+    Attributes
+    ----------
+    reports : list of (int, :class:`pandas.DataFrame`)
+              the step number and the cache report of each sample
+    """
+    implemented_for = ['before_simulation', 'after_step',
+                       'after_simulation']
+
+    def __init__(self, storage=None, frequency=None):
+        self.storage = storage
+        self.frequency = frequency
+        self.reports = []
+        self._simulation = None
+        self._last_step = None
+
+    @property
+    def frequency(self):
+        return _self_or_sim_property_or_err(self, "frequency", "save_frequency")
+
+    @frequency.setter
+    def frequency(self, val):
+        self._frequency = val
+
+    @property
+    def storage(self):
+        return _self_or_sim_property_or_err(self, "storage")
+
+    @storage.setter
+    def storage(self, val):
+        self._storage = val
+
+    def _sample(self, step_number):
+        # enabling again includes caches created since the last sample
+        self.storage.enable_cache_statistics()
+        self.reports.append((step_number, self.storage.cache_report()))
+
+    def before_simulation(self, sim, **kwargs):
+        self._simulation = sim
+        self._last_step = None
+        if self.storage is not None:
+            self.storage.enable_cache_statistics()
+
+    def after_step(self, sim, step_number, step_info, state, results,
+                   hook_state):
+        self._last_step = step_number
+        if self.storage is not None and step_number % self.frequency == 0:
+            self._sample(step_number)
+
+    def after_simulation(self, sim, hook_state):
+        sampled = self.reports and self.reports[-1][0] == self._last_step
+        if self.storage is not None and self._last_step is not None \
+                and not sampled:
+            self._sample(self._last_step)
+
+    @property
+    def history(self):
+        """
+        All samples in one table
+
+        Returns
+        -------
+        :class:`pandas.DataFrame`
+            the sampled cache reports, indexed by step number and cache name
+        """
+        if not self.reports:
+            return pd.DataFrame()
+        steps, reports = zip(*self.reports)
+        return pd.concat(reports, keys=steps, names=['step', 'cache'])
+
+
 class LiveVisualizerHook(PathSimulatorHook):
     """
     LiveVisualization using the :class:`openpathsampling.StepVisualizer2D`.
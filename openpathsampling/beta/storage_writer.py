@@ -0,0 +1,195 @@
+"""
+Writing simulation results to storage in a background thread.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+
+from openpathsampling.engines.dynamics_engine import (
+    add_dynamics_context, remove_dynamics_context
+)
+
+try:
+    import queue
+except ImportError:  # pragma: no cover
+    import Queue as queue
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BackgroundStorageWriter(object):
+    """Save objects to a storage from a background thread.
+
+    Saving and syncing are put into a bounded queue, which a writer thread
+    works through in order. The simulation can thus continue while the
+    results of the previous steps are written. If the queue is full,
+    :meth:`.save` and :meth:`.sync_all` block until the writer has caught
+    up, so that at most ``maxsize`` operations are pending.
+
+    :meth:`.flush` waits until all queued operations are done; it is the
+    barrier to use before the storage is read or used otherwise. An error
+    in the writer thread is re-raised in the simulation thread by the next
+    call to the writer; operations queued after the error are skipped.
+
+    With :class:`.Storage` (netCDF), each object is saved in a batch (see
+    :meth:`.NetCDFPlus.batch`). Storages that stash objects (the SQL-based
+    storage) stash them in the writer thread, and write them when
+    :meth:`.sync_all` is processed.
+
+    The storages are not thread-safe, and saving changes the saved objects
+    (e.g., the frames of trajectories are replaced by proxies) as well as
+    the indices and caches of the storage. Each operation of the writer is
+    therefore done while holding :attr:`.lock`. A thread that uses the
+    storage or the saved objects while the writer is running must hold the
+    lock as well. The simulation thread does so with :meth:`.hold`: it
+    then holds the lock all the time, except while its engine integrates
+    a frame (see :func:`.add_dynamics_context`) and while it waits for
+    the writer. That is when the writer does its work.
+
+    Parameters
+    ----------
+    storage : :class:`.Storage`
+        the storage to write to
+    maxsize : int
+        maximum number of pending operations
+    """
+    poll_interval = 0.5
+
+    def __init__(self, storage, maxsize=4):
+        self.storage = storage
+        self.maxsize = maxsize
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self.lock = threading.RLock()
+        self._holder = None
+        # not a daemon: if the simulation ends without stopping the writer,
+        # the queued operations are still done before the interpreter exits
+        self._thread = threading.Thread(target=self._run,
+                                        name="BackgroundStorageWriter")
+        self._thread.start()
+
+    @property
+    def is_alive(self):
+        """bool : whether the writer thread is running"""
+        return self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.poll_interval)
+            except queue.Empty:
+                if not threading.main_thread().is_alive():
+                    return
+                continue
+
+            try:
+                if item is _STOP:
+                    return
+                if self._error is None:
+                    func, args = item
+                    locked = self._acquire()
+                    try:
+                        func(*args)
+                    finally:
+                        if locked:
+                            self.lock.release()
+            except Exception as e:
+                logger.error("Background storage writer failed: %s", e)
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _acquire(self):
+        # if the thread holding the lock has ended without releasing it,
+        # nothing else uses the storage any more: go on without the lock
+        while not self.lock.acquire(timeout=self.poll_interval):
+            holder = self._holder
+            if holder is not None and not holder.is_alive():
+                return False
+        return True
+
+    def hold(self):
+        """Hold :attr:`.lock` in this thread, except during dynamics.
+
+        This is the thread the simulation runs in; the lock is held until
+        :meth:`.stop` is called from this thread.
+        """
+        self.lock.acquire()
+        self._holder = threading.current_thread()
+        add_dynamics_context(self._released)
+
+    @contextmanager
+    def _released(self):
+        # let the writer work while the holding thread does not use the
+        # storage
+        if self._holder is not threading.current_thread():
+            yield
+            return
+        self.lock.release()
+        try:
+            yield
+        finally:
+            self.lock.acquire()
+
+    def _raise_error(self):
+        error = self._error
+        if error is not None:
+            self._error = None
+            raise error
+
+    def _put(self, func, *args):
+        self._raise_error()
+        if not self.is_alive:
+            raise RuntimeError("Background storage writer is stopped")
+        with self._released():
+            self._queue.put((func, args))
+
+    def _save(self, obj):
+        stash = getattr(self.storage, 'stash', None)
+        if stash is not None:
+            stash(obj)
+        else:
+            with self.storage.batch():
+                self.storage.save(obj)
+
+    def save(self, obj):
+        """Queue an object to be saved.
+
+        Parameters
+        ----------
+        obj : :class:`.StorableObject`
+            the object to save; it must not be changed afterwards
+        """
+        self._put(self._save, obj)
+
+    def sync_all(self):
+        """Queue syncing the storage, after all previously queued saves"""
+        self._put(self.storage.sync_all)
+
+    def flush(self):
+        """Wait until all queued operations are done."""
+        with self._released():
+            self._queue.join()
+        self._raise_error()
+
+    def stop(self):
+        """Finish all queued operations and stop the writer thread.
+
+        The storage stays open.
+        """
+        if self._holder is threading.current_thread():
+            self._holder = None
+            remove_dynamics_context(self._released)
+            self.lock.release()
+        if self.is_alive:
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._raise_error()
+
+    def close(self):
+        """Finish all queued operations, stop the writer and close the
+        storage."""
+        self.stop()
+        self.storage.close()
@@ -1,9 +1,12 @@
+import numpy as np
+
 import openpathsampling as paths
 import openpathsampling.netcdfplus.chaindict as cd
 from openpathsampling.integration_tools import md, error_if_no_mdtraj
 from openpathsampling.engines.openmm.tools import trajectory_to_mdtraj
-from openpathsampling.netcdfplus import WeakKeyCache, \
-    ObjectJSON, create_to_dict, ObjectStore, PseudoAttribute
+from openpathsampling.netcdfplus import WeakKeyCache, LRUCache, \
+    IndexedArrayCache, ObjectJSON, create_to_dict, ObjectStore, \
+    PseudoAttribute
 
 from openpathsampling.deprecations import (has_deprecations, deprecate,
                                            MSMBUILDER, PYEMMA)
@@ -72,9 +75,62 @@ class CollectiveVariable(PseudoAttribute):
 
         # self._post = self._single_dict > self._cache_dict
 
+    @property
+    def cv_inputs(self):
+        """list of :class:`CollectiveVariable` : the CVs that are evaluated
+        to compute this CV, see :class:`CVGraph`"""
+        return []
+
+    def enable_array_cache(self, store):
+        """
+        Cache the values of stored snapshots in a numpy array
+
+        The values are kept by the index of the snapshot in ``store`` (see
+        :class:`openpathsampling.netcdfplus.IndexedArrayCache`) instead of
+        one dictionary entry per snapshot object. They stay cached when
+        the snapshots are freed, which avoids reevaluation when analysing
+        many stored frames. Snapshots that are not in ``store`` are still
+        cached weakly.
+
+        Parameters
+        ----------
+        store : :class:`openpathsampling.storage.stores.SnapshotWrapperStore`
+            the store whose indices are used, usually ``storage.snapshots``
+        """
+        cache = IndexedArrayCache(store.index,
+                                  reversible=self.cv_time_reversible)
+        self._cache_dict.cache = cache.transfer(self._cache_dict.cache)
+
+    def disable_array_cache(self):
+        """
+        Go back to caching values weakly by snapshot object
+
+        Only the values of snapshots that were not in the store are kept.
+        """
+        cache = self._cache_dict.cache
+        if isinstance(cache, IndexedArrayCache):
+            self._cache_dict.cache = WeakKeyCache().transfer(cache)
+
     to_dict = create_to_dict(['name', 'cv_time_reversible'])
 
 
+def _volume_cvs(volume):
+    """The CVs that a volume (and all volumes it combines) evaluates"""
+    cvs = []
+    pending = [volume]
+    while pending:
+        vol = pending.pop()
+        cv = getattr(vol, 'collectivevariable', None)
+        if isinstance(cv, CollectiveVariable) and \
+                not any(cv is known for known in cvs):
+            cvs.append(cv)
+        pending.extend(
+            getattr(vol, attr) for attr in ['volume', 'volume1', 'volume2']
+            if isinstance(getattr(vol, attr, None), paths.Volume)
+        )
+    return cvs
+
+
 class InVolumeCV(CollectiveVariable):
     """Turn a :class:`openpathsampling.volume.Volume` into a collective
     variable
@@ -102,15 +158,20 @@ class InVolumeCV(CollectiveVariable):
         )
         self.volume = volume
 
+        # the volume tests all frames at once, see `Volume.evaluate`
         self._eval_dict = cd.Function(
             self._eval,
-            requires_lists=False
+            requires_lists=True
         )
 
         self._post = self._post > self._eval_dict
 
+    @property
+    def cv_inputs(self):
+        return _volume_cvs(self.volume)
+
     def _eval(self, items):
-        return bool(self.volume(items))
+        return [bool(value) for value in self.volume.evaluate(items)]
 
     to_dict = create_to_dict(['name', 'volume'])
 
@@ -279,6 +340,12 @@ class CallableCV(CollectiveVariable):
 
     __hash__ = CollectiveVariable.__hash__
 
+    @property
+    def cv_inputs(self):
+        # CVs passed as arguments are (usually) called by the function
+        return [value for value in self.kwargs.values()
+                if isinstance(value, CollectiveVariable)]
+
     def _eval(self, items):
         return items
 
@@ -386,12 +453,191 @@ class CoordinateFunctionCV(FunctionCV):
             **kwargs
         )
 
+    def _eval(self, items):
+        if self.cv_requires_lists:
+            # as a trajectory, `f` can gather the coordinates of all items
+            # at once (see `Trajectory.coordinates_as_numpy`)
+            items = paths.Trajectory(items)
+        return super(CoordinateFunctionCV, self)._eval(items)
+
     def to_dict(self):
         dct = super(CoordinateFunctionCV, self).to_dict()
         del dct['cv_time_reversible']
         return dct
 
 
+class DerivedCV(FunctionCV):
+    """A :class:`CollectiveVariable` computed from the values of other CVs.
+
+    The input CVs are evaluated for all requested snapshots at once and
+    ``f`` is called with one numpy array per input CV, in the order given
+    by ``cv_inputs``. Since the input CVs cache their values, several CVs
+    derived from the same input compute it only once. Use :class:`CVGraph`
+    to evaluate a set of CVs in dependency order.
+
+    >>> dist = paths.MDTrajFunctionCV("dist", md.compute_distances,
+    >>>                               topology, atom_pairs=[[0, 1]])
+    >>> dist_sq = DerivedCV("dist_sq", lambda d: d**2, [dist])
+
+    Attributes
+    ----------
+    cv_callable
+    """
+
+    def __init__(
+            self,
+            name,
+            f,
+            cv_inputs,
+            cv_time_reversible=None,
+            cv_wrap_numpy_array=False,
+            cv_scalarize_numpy_singletons=False,
+            **kwargs
+    ):
+        """
+        Parameters
+        ----------
+        name : str
+        f : (callable) function
+            called as ``f(*input_values, **kwargs)``; must return one value
+            per snapshot
+        cv_inputs : list of :class:`CollectiveVariable`
+            the CVs whose values are passed to ``f``
+        cv_time_reversible : bool or None
+            if None (default), the CV is time reversible if all input CVs
+            are
+        cv_wrap_numpy_array
+        cv_scalarize_numpy_singletons
+        **kwargs
+            additional named arguments for ``f``
+
+        See also
+        --------
+        :class:`openpathsampling.collectivevariable.CallableCV`
+        """
+        self._cv_inputs = list(cv_inputs)
+        if cv_time_reversible is None:
+            cv_time_reversible = all(cv.cv_time_reversible
+                                     for cv in self._cv_inputs)
+
+        super().__init__(
+            name,
+            f=f,
+            cv_time_reversible=cv_time_reversible,
+            cv_requires_lists=True,
+            cv_wrap_numpy_array=cv_wrap_numpy_array,
+            cv_scalarize_numpy_singletons=cv_scalarize_numpy_singletons,
+            **kwargs
+        )
+
+    @property
+    def cv_inputs(self):
+        inputs = list(self._cv_inputs)
+        return inputs + [cv for cv in super(DerivedCV, self).cv_inputs
+                         if not any(cv is known for known in inputs)]
+
+    def _eval(self, items):
+        values = [np.asarray(cv(items)) for cv in self._cv_inputs]
+        return np.asarray(self.cv_callable(*values, **self.kwargs))
+
+    def to_dict(self):
+        dct = super(DerivedCV, self).to_dict()
+        del dct['cv_requires_lists']
+        dct['cv_inputs'] = self._cv_inputs
+        return dct
+
+
+class CVGraph(object):
+    """Dependency graph of collective variables.
+
+    The graph contains the requested CVs and, recursively, all the CVs
+    they depend on (see :attr:`CollectiveVariable.cv_inputs`).
+    :meth:`evaluate` computes each CV once for a whole batch of snapshots,
+    after all of its inputs, so that intermediate values are computed only
+    once and then read from the cache of the input CV.
+
+    Parameters
+    ----------
+    cvs : list of :class:`CollectiveVariable`
+        the requested CVs
+
+    Attributes
+    ----------
+    cvs : list of :class:`CollectiveVariable`
+        the requested CVs
+    order : list of :class:`CollectiveVariable`
+        all CVs of the graph, inputs before the CVs that use them
+    """
+
+    def __init__(self, cvs):
+        self.cvs = list(cvs)
+        self.order = self._topological_order(self.cvs)
+
+    @staticmethod
+    def _topological_order(cvs):
+        order = []
+        done = set()
+        path = []
+
+        def visit(cv):
+            if id(cv) in done:
+                return
+            if any(cv is entry for entry in path):
+                cycle = path[[id(entry) for entry in path].index(id(cv)):]
+                raise ValueError(
+                    'Cyclic dependency between CVs: ' + ' -> '.join(
+                        entry.name for entry in cycle + [cv]))
+            path.append(cv)
+            for cv_input in cv.cv_inputs:
+                visit(cv_input)
+            path.pop()
+            done.add(id(cv))
+            order.append(cv)
+
+        for cv in cvs:
+            visit(cv)
+
+        return order
+
+    def dependents(self, cv):
+        """CVs in the graph that directly use the given CV as input
+
+        Parameters
+        ----------
+        cv : :class:`CollectiveVariable`
+
+        Returns
+        -------
+        list of :class:`CollectiveVariable`
+        """
+        return [other for other in self.order
+                if any(cv is cv_input for cv_input in other.cv_inputs)]
+
+    def evaluate(self, snapshots):
+        """Evaluate the requested CVs for a batch of snapshots.
+
+        Parameters
+        ----------
+        snapshots : :class:`.Trajectory` or list of :class:`.BaseSnapshot`
+            the snapshots to evaluate the CVs for
+
+        Returns
+        -------
+        dict
+            maps each requested CV to the list of its values
+        """
+        try:
+            items = snapshots.as_proxies()
+        except AttributeError:
+            items = list(snapshots)
+
+        values = {}
+        for cv in self.order:
+            values[id(cv)] = cv(items)
+
+        return {cv: values[id(cv)] for cv in self.cvs}
+
+
 class GeneratorCV(CallableCV):
     """Turn a callable class or function generating a callable object into a CV
 
@@ -505,6 +751,120 @@ class CoordinateGeneratorCV(GeneratorCV):
         return dct
 
 
+class MDTrajConversionCache(object):
+    """
+    Shared conversion of snapshots to :class:`mdtraj.Trajectory` objects
+
+    CVs based on mdtraj (see :class:`MDTrajFunctionCV`) are usually
+    evaluated one after the other for the same snapshots. This keeps the
+    last conversions, keyed by the UUIDs of the snapshots, the topology and
+    the atom subset, so that the coordinates of the snapshots are gathered
+    only once. An atom subset is sliced from the conversion of all atoms, if
+    that is cached, and the topology of a subset is only created once.
+
+    Each call returns a new :class:`mdtraj.Trajectory` with its own copy of
+    the coordinates, so functions that change the trajectory in place (like
+    ``superpose``) do not change the cached conversion.
+
+    Parameters
+    ----------
+    size_limit : int
+        the number of conversions that are kept; 0 disables the caching
+    """
+
+    def __init__(self, size_limit=2):
+        self.size_limit = size_limit
+        self._conversions = LRUCache(size_limit)
+        self._topologies = LRUCache(16)
+
+    def clear(self):
+        """Remove all cached conversions"""
+        self._conversions.clear()
+        self._topologies.clear()
+
+    def _get(self, cache, key, topology):
+        # the id of the topology is part of the key, so check that this is
+        # still the same topology object
+        cached = cache.get(key)
+        if cached is not None and cached[0] is topology:
+            return cached[1]
+        return None
+
+    def _subset_topology(self, topology, atoms):
+        key = (id(topology), atoms)
+        subset = self._get(self._topologies, key, topology)
+        if subset is None:
+            subset = topology.subset(atoms)
+            self._topologies[key] = (topology, subset)
+        return subset
+
+    def _convert(self, trajectory, uuids, topology, atoms):
+        if atoms is None:
+            return trajectory_to_mdtraj(trajectory, topology)
+
+        full = self._get(self._conversions, (uuids, id(topology), None),
+                         topology)
+        if full is not None:
+            xyz = full.xyz[:, list(atoms)]
+            box_vectors = full.unitcell_vectors
+        else:
+            xyz = trajectory.coordinates_as_numpy(list(atoms))
+            box_vectors = trajectory.box_vectors_as_numpy()
+            # if there are no box vectors (or all are zero), we use None
+            if not np.any(box_vectors):
+                box_vectors = None
+
+        converted = md.Trajectory(xyz, self._subset_topology(topology, atoms))
+        converted.unitcell_vectors = box_vectors
+        return converted
+
+    def __call__(self, items, topology, atom_indices=None):
+        """
+        Convert snapshots to an mdtraj trajectory
+
+        Parameters
+        ----------
+        items : iterable of :class:`openpathsampling.engines.BaseSnapshot`
+            the snapshots to convert
+        topology : :class:`mdtraj.Topology`
+            the topology of all atoms of the snapshots
+        atom_indices : list of int or None
+            the atoms to include; `None` (default) includes all atoms
+
+        Returns
+        -------
+        :class:`mdtraj.Trajectory`
+            the converted snapshots
+        """
+        trajectory = paths.Trajectory(items)
+        uuids = tuple(snap.__uuid__ for snap in trajectory)
+        atoms = None
+        if atom_indices is not None:
+            atoms = tuple(int(atom) for atom in atom_indices)
+
+        key = (uuids, id(topology), atoms)
+        converted = self._get(self._conversions, key, topology)
+        if converted is None:
+            converted = self._convert(trajectory, uuids, topology, atoms)
+            if self.size_limit > 0:
+                self._conversions[key] = (topology, converted)
+
+        unitcell_lengths = converted.unitcell_lengths
+        unitcell_angles = converted.unitcell_angles
+        return md.Trajectory(
+            converted.xyz.copy(),
+            converted.topology,
+            unitcell_lengths=None if unitcell_lengths is None
+            else unitcell_lengths.copy(),
+            unitcell_angles=None if unitcell_angles is None
+            else unitcell_angles.copy()
+        )
+
+
+#: the conversion cache shared by all mdtraj based CVs
+mdtraj_conversion_cache = MDTrajConversionCache()
+
+
 class MDTrajFunctionCV(CoordinateFunctionCV):
     """Make ``CollectiveVariable`` from ``f`` that takes
     :class:`mdtraj.Trajectory` as input.
@@ -533,6 +893,7 @@ class MDTrajFunctionCV(CoordinateFunctionCV):
                  cv_requires_lists=True,
                  cv_wrap_numpy_array=True,
                  cv_scalarize_numpy_singletons=True,
+                 cv_atom_indices=None,
                  **kwargs
                  ):
         """
@@ -551,7 +912,16 @@ class MDTrajFunctionCV(CoordinateFunctionCV):
             one dimension less. e.g. ``[[1], [2], [3]]`` will be turned into
             ``[1, 2, 3]``. This is often useful, when you use en external
             function from mdtraj to get only a single value.
+        cv_atom_indices : list of int or None
+            if given, ``f`` is called with a trajectory of only these atoms
+            (in this order), so atom indices in ``kwargs`` refer to positions
+            in this list. For large systems, this makes the conversion to
+            mdtraj much faster. Default is `None`, which uses all atoms
 
+        Notes
+        -----
+        The conversion to mdtraj is shared with other mdtraj based CVs
+        through :data:`mdtraj_conversion_cache`.
         """
 
         super(MDTrajFunctionCV, self).__init__(
@@ -564,11 +934,11 @@ class MDTrajFunctionCV(CoordinateFunctionCV):
         )
 
         self.topology = topology
+        self.cv_atom_indices = cv_atom_indices
 
     def _eval(self, items):
-        trajectory = paths.Trajectory(items)
-
-        t = trajectory_to_mdtraj(trajectory, self.topology.mdtraj)
+        t = mdtraj_conversion_cache(items, self.topology.mdtraj,
+                                    self.cv_atom_indices)
         return self.cv_callable(t, **self.kwargs)
 
     @property
@@ -583,7 +953,9 @@ class MDTrajFunctionCV(CoordinateFunctionCV):
             'kwargs': self.kwargs,
             'cv_requires_lists': self.cv_requires_lists,
             'cv_wrap_numpy_array': self.cv_wrap_numpy_array,
-            'cv_scalarize_numpy_singletons': self.cv_scalarize_numpy_singletons
+            'cv_scalarize_numpy_singletons':
+                self.cv_scalarize_numpy_singletons,
+            'cv_atom_indices': self.cv_atom_indices
         }
 
 
@@ -654,10 +1026,8 @@ class MSMBFeaturizerCV(CoordinateGeneratorCV):
         return self.cv_callable
 
     def _eval(self, items):
-        trajectory = paths.Trajectory(items)
-
         # create an mdtraj trajectory out of it
-        ptraj = trajectory_to_mdtraj(trajectory, self.topology.mdtraj)
+        ptraj = mdtraj_conversion_cache(items, self.topology.mdtraj)
 
         # run the featurizer
         return self._instance.partial_transform(ptraj)
@@ -743,9 +1113,7 @@ class PyEMMAFeaturizerCV(MSMBFeaturizerCV):
         )
 
     def _eval(self, items):
-        trajectory = paths.Trajectory(items)
-
-        t = trajectory_to_mdtraj(trajectory, self.topology.mdtraj)
+        t = mdtraj_conversion_cache(items, self.topology.mdtraj)
         return self._instance.transform(t)
 
     def to_dict(self):
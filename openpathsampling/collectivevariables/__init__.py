@@ -1,6 +1,6 @@
 from openpathsampling.collectivevariable import (
     CollectiveVariable, FunctionCV, CoordinateFunctionCV, GeneratorCV,
-    CoordinateGeneratorCV, InVolumeCV, CallableCV,
+    CoordinateGeneratorCV, InVolumeCV, CallableCV, DerivedCV, CVGraph,
     MDTrajFunctionCV,
     PyEMMAFeaturizerCV,
     MSMBFeaturizerCV,
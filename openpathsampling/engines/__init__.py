@@ -1,5 +1,6 @@
 from .snapshot import BaseSnapshot, SnapshotFactory, SnapshotDescriptor
 from .trajectory import Trajectory
+from .array_trajectory import ArrayTrajectory
 
 from .topology import Topology, MDTrajTopology
 
@@ -0,0 +1,278 @@
+"""
+Trajectory with the data of all frames stored in contiguous arrays.
+"""
+
+import numpy as np
+
+from openpathsampling.integration_tools import unit
+from openpathsampling.netcdfplus import StorableObject
+from .features.shared import StaticContainer, KineticContainer
+from .trajectory import Trajectory
+
+
+_ARRAY_FEATURES = ['coordinates', 'velocities', 'box_vectors']
+
+
+def _quantity(array, unit_):
+    # wrapping (instead of multiplying) keeps the array a view
+    if array is None:
+        return None
+    return unit.Quantity(array, unit_)
+
+
+def _container(container_class, **attributes):
+    # containers copy their arrays in __init__; this one keeps the views
+    container = container_class.__new__(container_class)
+    StorableObject.__init__(container)
+    for name, value in attributes.items():
+        setattr(container, name, value)
+    return container
+
+
+def _view_snapshot(snapshot_class, engine, views):
+    """Create a snapshot whose arrays are the given views
+
+    Parameters
+    ----------
+    snapshot_class : class
+        the snapshot class, must support coordinates either as a feature
+        or through statics (and velocities through kinetics)
+    engine : :class:`.DynamicsEngine`
+        the engine of the snapshot
+    views : dict of str: numpy.ndarray
+        the arrays for `coordinates`, `velocities` and `box_vectors`
+    """
+    snapshot = snapshot_class.__new__(snapshot_class)
+    snapshot_class.init_empty(snapshot)
+
+    variables = snapshot_class.__features__.variables
+    if 'engine' in variables:
+        snapshot.engine = engine
+
+    for name in _ARRAY_FEATURES:
+        if name in variables:
+            setattr(snapshot, name, views.get(name))
+
+    if 'statics' in variables:
+        snapshot.statics = _container(
+            StaticContainer,
+            coordinates=_quantity(views['coordinates'], unit.nanometer),
+            box_vectors=_quantity(views.get('box_vectors'), unit.nanometer),
+            engine=engine
+        )
+
+    if 'kinetics' in variables:
+        velocities = views.get('velocities')
+        if velocities is None:
+            snapshot.kinetics = None
+        else:
+            snapshot.kinetics = _container(
+                KineticContainer,
+                velocities=_quantity(velocities,
+                                     unit.nanometer / unit.picosecond),
+                engine=engine
+            )
+        snapshot.is_reversed = False
+
+    return snapshot
+
+
+def _restore_array_trajectory(snapshots):
+    # used for pickling; the arrays are restored with the instance dict
+    traj = ArrayTrajectory.__new__(ArrayTrajectory)
+    list.extend(traj, snapshots)
+    return traj
+
+
+class ArrayTrajectory(Trajectory):
+    """
+    Trajectory with coordinates, velocities and box vectors stored as arrays
+
+    The data of all frames is kept in arrays with the frame as first axis.
+    The snapshots are lightweight views: their coordinates (and velocities
+    and box vectors) are views into these arrays, so that there is no
+    per-frame array allocation. Otherwise, this behaves like a
+    :class:`.Trajectory`, and can be used with ensembles, movers, and
+    storage. Slices are again array trajectories that share the arrays.
+
+    Since snapshots and arrays have to stay in sync, array trajectories
+    cannot be changed in place. Use ``Trajectory(array_traj)`` to get a
+    mutable trajectory of the same snapshots.
+
+    Parameters
+    ----------
+    coordinates : numpy.ndarray, shape=(n_frames, n_atoms, n_spatial)
+        the coordinates (without units) of all frames
+    velocities : numpy.ndarray, shape=(n_frames, n_atoms, n_spatial) or None
+        the velocities (without units) of all frames
+    box_vectors : numpy.ndarray, shape=(n_frames, n_spatial, n_spatial) or None
+        the box vectors (without units) of all frames
+    engine : :class:`.DynamicsEngine`
+        the engine of the snapshots
+    snapshot_class : class or None
+        the class of the snapshots. If None, the snapshot class of the
+        engine's descriptor is used.
+
+    Notes
+    -----
+    The arrays returned by :meth:`.coordinates_as_numpy` (and thus ``xyz``
+    and :meth:`.to_mdtraj`) are the arrays of the trajectory itself, not
+    copies. For float32 coordinates, conversion to MDTraj does not copy.
+
+    The :attr:`.reversed` trajectory is a view as well: its arrays are
+    reversed views of the same data, and velocities are only negated when
+    they are requested.
+    """
+
+    def __init__(self, coordinates, velocities=None, box_vectors=None,
+                 engine=None, snapshot_class=None):
+        super(ArrayTrajectory, self).__init__()
+        if snapshot_class is None:
+            try:
+                snapshot_class = engine.descriptor.snapshot_class
+            except AttributeError:
+                raise ValueError("Either an engine with a snapshot "
+                                 "descriptor or the snapshot class is "
+                                 "required")
+
+        # velocities of the snapshots are `_velocity_sign` times the array
+        self._velocity_sign = 1
+        self._arrays = {
+            'coordinates': np.asarray(coordinates),
+            'velocities': (None if velocities is None
+                           else np.asarray(velocities)),
+            'box_vectors': (None if box_vectors is None
+                            else np.asarray(box_vectors))
+        }
+        n_frames = len(self._arrays['coordinates'])
+        for name, array in self._arrays.items():
+            if array is not None and len(array) != n_frames:
+                raise ValueError("Expected %d frames for %s, got %d"
+                                 % (n_frames, name, len(array)))
+
+        list.extend(self, [
+            _view_snapshot(snapshot_class, engine,
+                           self._frame_views(self._arrays, frame))
+            for frame in range(n_frames)
+        ])
+
+    @classmethod
+    def from_trajectory(cls, trajectory):
+        """
+        Create an array trajectory from the frames of a trajectory
+
+        The snapshots of the new trajectory have the same UUIDs as the
+        original ones, so they are the same snapshots as far as storage is
+        concerned.
+
+        Parameters
+        ----------
+        trajectory : :class:`.Trajectory`
+            the trajectory to convert
+
+        Returns
+        -------
+        :class:`.ArrayTrajectory`
+            the trajectory with the data of all frames in arrays
+        """
+        if isinstance(trajectory, ArrayTrajectory):
+            return trajectory
+
+        trajectory = Trajectory(trajectory)
+        coordinates = trajectory.coordinates_as_numpy()
+        if coordinates is None:
+            raise ValueError("The trajectory has no coordinates")
+
+        first = trajectory[0]
+        array_traj = cls(coordinates=coordinates,
+                         velocities=trajectory.velocities_as_numpy(),
+                         box_vectors=trajectory.box_vectors_as_numpy(),
+                         engine=getattr(first, 'engine', None),
+                         snapshot_class=first.__class__)
+        for snapshot, frame in zip(list.__iter__(array_traj),
+                                   trajectory.iter_proxies()):
+            snapshot.__uuid__ = frame.__uuid__
+
+        return array_traj
+
+    @staticmethod
+    def _frame_views(arrays, frame):
+        return {name: array[frame] for name, array in arrays.items()
+                if array is not None}
+
+    @classmethod
+    def _from_frames(cls, snapshots, arrays, velocity_sign=1):
+        traj = cls.__new__(cls)
+        Trajectory.__init__(traj)
+        traj._arrays = arrays
+        traj._velocity_sign = velocity_sign
+        list.extend(traj, snapshots)
+        return traj
+
+    def to_dict(self):
+        return {
+            'snapshots': self.as_proxies()
+        }
+
+    @classmethod
+    def from_dict(cls, dct):
+        return cls.from_trajectory(Trajectory(dct['snapshots']))
+
+    def __reduce__(self):
+        return (_restore_array_trajectory, (list(self.iter_proxies()),),
+                self.__dict__)
+
+    def __str__(self):
+        return 'ArrayTrajectory[' + str(len(self)) + ']'
+
+    def __repr__(self):
+        return 'ArrayTrajectory[' + str(len(self)) + ']'
+
+    def _feature_as_numpy(self, feature, atom_indices=None):
+        array = self._arrays.get(feature)
+        if array is None or len(self) == 0:
+            return None
+
+        if atom_indices is not None:
+            array = array[:, atom_indices]
+
+        if feature == 'velocities' and self._velocity_sign < 0:
+            array = - array
+
+        return array
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            arrays = {name: (None if array is None else array[index])
+                      for name, array in self._arrays.items()}
+            return self._from_frames(list.__getitem__(self, index), arrays,
+                                     self._velocity_sign)
+
+        return super(ArrayTrajectory, self).__getitem__(index)
+
+    @property
+    def reversed(self):
+        """
+        Returns the reversed trajectory, with the reversed snapshots
+
+        Returns
+        -------
+        :class:`.ArrayTrajectory`
+            the reversed trajectory, also array-backed
+        """
+        # the arrays are reversed views; velocities are only negated when
+        # requested (see _feature_as_numpy), as are those of the snapshots
+        arrays = {name: (None if array is None else array[::-1])
+                  for name, array in self._arrays.items()}
+        snapshots = [snapshot.reversed
+                     for snapshot in list.__reversed__(self)]
+        return self._from_frames(snapshots, arrays,
+                                 - self._velocity_sign)
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("ArrayTrajectory cannot be changed in place; use "
+                        "Trajectory(trajectory) for a mutable copy")
+
+    append = extend = insert = remove = pop = _immutable
+    reverse = sort = clear = _immutable
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
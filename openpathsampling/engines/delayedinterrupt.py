@@ -1,5 +1,6 @@
 import signal
 import logging
+import threading
 
 
 # class based on: http://stackoverflow.com/a/21919644/487556
@@ -14,6 +15,9 @@ class DelayedInterrupt(object):
     def __enter__(self):
         self.signal_received = {}
         self.old_handlers = {}
+        if threading.current_thread() is not threading.main_thread():
+            # signals are only delivered to (and handled in) the main thread
+            self.sigs = []
         for sig in self.sigs:
             self.signal_received[sig] = False
             self.old_handlers[sig] = signal.getsignal(sig)
@@ -7,6 +7,8 @@ Created on 01.07.2014
 
 import logging
 import sys
+import threading
+from contextlib import contextmanager, ExitStack
 
 from openpathsampling.netcdfplus import StorableNamedObject
 from openpathsampling.integration_tools import is_simtk_unit_type
@@ -15,7 +17,7 @@ from openpathsampling.exports.trajectories import SimStoreTrajectoryWriter
 from .snapshot import BaseSnapshot
 from .trajectory import Trajectory
 
-from .delayedinterrupt import DelayedInterrupt
+from .delayedinterrupt import DelayedInterrupt, EmptyContext
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +43,10 @@ class EngineError(Exception):
         # Now for your custom code...
         self.last_trajectory = last_trajectory
 
+    def __reduce__(self):
+        # needed to send the error between processes
+        return (self.__class__, (str(self), self.last_trajectory))
+
 
 class EngineMaxLengthError(EngineError):
     pass
@@ -50,6 +56,131 @@ class EngineNaNError(EngineError):
     pass
 
 
+class _DynamicsContexts(threading.local):
+    def __init__(self):
+        self.contexts = []
+
+
+_dynamics_contexts = _DynamicsContexts()
+
+
+def add_dynamics_context(context):
+    """Enter a context whenever an engine generates a frame in this thread.
+
+    This lets other code use the time spent in dynamics; e.g., a
+    :class:`.BackgroundStorageWriter` releases its lock, so that it can
+    write while the simulation thread does not use the storage.
+
+    Parameters
+    ----------
+    context : callable
+        called without arguments, returns the context manager to enter
+    """
+    _dynamics_contexts.contexts.append(context)
+
+
+def remove_dynamics_context(context):
+    """Remove a context added with :func:`.add_dynamics_context`"""
+    _dynamics_contexts.contexts.remove(context)
+
+
+@contextmanager
+def _entered(contexts):
+    with ExitStack() as stack:
+        for context in contexts:
+            stack.enter_context(context())
+        yield
+
+
+def _dynamics_context():
+    contexts = _dynamics_contexts.contexts
+    if not contexts:
+        return EmptyContext()
+    return _entered(list(contexts))
+
+
+class TrajectoryGrowthBuffer(object):
+    """Trajectory being grown one frame at a time in a given direction.
+
+    New frames are appended to a buffer in the order they are generated,
+    which is O(1) per frame in both directions. The frames are only added
+    to the :class:`.Trajectory` when it is requested, in one block. For
+    backward growth, this replaces a ``trajectory.insert(0, snapshot)``
+    (which shifts the entire list) for every frame.
+
+    The trajectory should only be requested by consumers that need the
+    list: :meth:`.DynamicsEngine.iter_generate` requests it when yielding
+    and at the end. Running conditions that are :class:`.EnsembleState`
+    objects are fed :attr:`.frames` instead; only conditions that are
+    plain functions of the trajectory need it after every frame.
+
+    The same :class:`.Trajectory` object is returned (and extended) every
+    time the trajectory is requested, as is the case when growing a
+    trajectory in place.
+
+    Parameters
+    ----------
+    initial : :class:`.Trajectory`
+        the trajectory to grow from
+    direction : -1 or +1
+        if +1, new frames are appended to the end of the trajectory; if -1
+        they are prepended to its start
+    """
+    def __init__(self, initial, direction=+1):
+        self.direction = direction
+        self._trajectory = Trajectory(initial)
+        self._frames = []
+        self._n_synced = 0
+
+    def __len__(self):
+        return len(self._trajectory) + len(self._frames) - self._n_synced
+
+    @property
+    def frames(self):
+        """list : generated frames, in the order of generation"""
+        return self._frames
+
+    def append(self, snapshot):
+        """Add a newly generated frame.
+
+        Parameters
+        ----------
+        snapshot : :class:`.BaseSnapshot`
+            the new frame, as it should appear in the trajectory (i.e.,
+            already reversed for backward growth)
+        """
+        self._frames.append(snapshot)
+
+    def pop(self):
+        """Remove the most recently generated frame.
+
+        Returns
+        -------
+        :class:`.BaseSnapshot`
+            the removed frame
+        """
+        if self._n_synced == len(self._frames):
+            # already in the trajectory: remove it there
+            self._n_synced -= 1
+            if self.direction > 0:
+                del self._trajectory[-1]
+            else:
+                del self._trajectory[0]
+        return self._frames.pop()
+
+    @property
+    def trajectory(self):
+        """:class:`.Trajectory` : the trajectory including all frames"""
+        pending = self._frames[self._n_synced:]
+        if pending:
+            if self.direction > 0:
+                self._trajectory.extend(pending)
+            else:
+                self._trajectory[0:0] = pending[::-1]
+            self._n_synced = len(self._frames)
+        return self._trajectory
+
+
 class DynamicsEngine(StorableNamedObject):
     """
     Wraps simulation tool (parameters, storage, etc.)
@@ -291,10 +422,12 @@ class DynamicsEngine(StorableNamedObject):
             # give the default message; to change, add something here like:
             # raise AttributeError("Something went wrong with " + str(item))
 
-        # see, if the attribute is actually a dimension
-        if self.descriptor is not None:
-            if item in self.descriptor.dimensions:
-                return self.descriptor.dimensions[item]
+        # see, if the attribute is actually a dimension; use __dict__
+        # directly since this can be called before __init__ (unpickling)
+        descriptor = self.__dict__.get('descriptor')
+        if descriptor is not None:
+            if item in descriptor.dimensions:
+                return descriptor.dimensions[item]
 
         # fallback is to look for an option and return it's value
         try:
@@ -381,22 +514,68 @@ class DynamicsEngine(StorableNamedObject):
         when you hit a stop condition."""
         pass
 
+    @staticmethod
+    def incremental_conditions(running, direction):
+        """
+        Replace running conditions by incremental versions where possible.
+
+        Running conditions which are methods of an ensemble (such as
+        ``ensemble.can_append``) are replaced by the
+        :class:`.EnsembleState` given by the ensemble's
+        ``incremental_condition``, if there is one. Such states are fed one
+        frame at a time by :meth:`.stop_conditions`, instead of testing the
+        whole trajectory after every frame. New states must be created for
+        every trajectory.
+
+        Parameters
+        ----------
+        running : list of function(:class:`.Trajectory`)
+            the running conditions
+        direction : -1 or +1
+            whether frames are prepended (-1) or appended (+1)
+
+        Returns
+        -------
+        list of function(:class:`.Trajectory`) or :class:`.EnsembleState`
+            the conditions to give to :meth:`.stop_conditions`
+        """
+        conditions = []
+        for condition in running:
+            ensemble = getattr(condition, '__self__', None)
+            make_state = getattr(ensemble, 'incremental_condition', None)
+            state = None
+            if make_state is not None:
+                state = make_state(condition.__name__, direction)
+            conditions.append(state if state is not None else condition)
+
+        return conditions
+
     def stop_conditions(self, trajectory, continue_conditions=None,
-                        trusted=True):
+                        trusted=True, new_frames=None):
         """
         Test whether we can continue; called by generate a couple of times,
         so the logic is separated here.
 
         Parameters
         ----------
-        trajectory : :class:`openpathsampling.trajectory.Trajectory`
-            the trajectory we've generated so far
+        trajectory : :class:`openpathsampling.trajectory.Trajectory` or \
+                :class:`.TrajectoryGrowthBuffer`
+            the trajectory we've generated so far. A growth buffer is only
+            turned into a trajectory if one of the conditions needs it.
         continue_conditions : (list of) function(Trajectory)
             callable function of a 'Trajectory' that returns True or False.
-            If one of these returns False the simulation is stopped.
+            If one of these returns False the simulation is stopped. Can
+            also be an :class:`.EnsembleState` (see
+            :meth:`.incremental_conditions`), which stops the simulation
+            if the trajectory can't be extended.
         trusted : bool
             If `True` (default) the stopping conditions are evaluated
             as trusted.
+        new_frames : list of :class:`.BaseSnapshot`
+            the frames added to the trajectory since the last test, in the
+            order they were added; these are fed to the
+            :class:`.EnsembleState` conditions. If `None`, the states are
+            fed all frames of the trajectory.
 
         Returns
         -------
@@ -407,7 +586,31 @@ class DynamicsEngine(StorableNamedObject):
         if callable(continue_conditions):
             continue_conditions = [continue_conditions]
 
+        if isinstance(trajectory, TrajectoryGrowthBuffer):
+            growth = trajectory
+            trajectory = None
+        else:
+            growth = None
+
+        def get_trajectory():
+            # only build the trajectory from the growth buffer if needed
+            if trajectory is None:
+                return growth.trajectory
+            return trajectory
+
         for condition in continue_conditions:
+            if not callable(condition):
+                # an EnsembleState: feed it the new frames
+                frames = new_frames
+                if frames is None:
+                    frames = list(get_trajectory())
+                    if condition.direction < 0:
+                        frames.reverse()
+                condition.add_frames(frames)
+                stop = (not condition.can_extend) or stop
+                continue
+
+            trajectory = get_trajectory()
             stop = (not condition(trajectory, trusted)) or stop
             # TODO: Consider short-circuit logic (uncomment code below).
             # Pros: short circuit will be faster; avoid wasted effort.
@@ -523,6 +726,8 @@ class DynamicsEngine(StorableNamedObject):
         attempt_error = 0
         attempt_max_length = 0
         trajectory = initial
+        growth = TrajectoryGrowthBuffer(initial, direction)
+        conditions = self.incremental_conditions(running, direction)
 
         final_error = None
         errors = []
@@ -547,6 +752,14 @@ class DynamicsEngine(StorableNamedObject):
                 elif hasattr(self.on_retry, '__call__'):
                     trajectory = self.on_retry(trajectory)
 
+            if attempt_nan + attempt_error > 0:
+                # the conditions have seen the frames of the failed attempt;
+                # start them again from the trajectory we continue from
+                growth = TrajectoryGrowthBuffer(trajectory, direction)
+                conditions = self.incremental_conditions(running, direction)
+
+            trajectory = growth.trajectory
+
             """ Case of run dying before first output"""
             if len(trajectory) >= 1:
                 if direction > 0:
@@ -561,8 +774,9 @@ class DynamicsEngine(StorableNamedObject):
             frame = 0
             # maybe we should stop before we even begin?
             stop = self.stop_conditions(trajectory=trajectory,
-                                        continue_conditions=running,
+                                        continue_conditions=conditions,
                                         trusted=False)
+            n_checked = len(growth.frames)
 
             log_rate = 10
             has_nan = False
@@ -573,6 +787,7 @@ class DynamicsEngine(StorableNamedObject):
                 if intervals > 0 and frame % intervals == 0:
                     # return the current status
                     logger.info("Through frame: %d", frame)
+                    trajectory = growth.trajectory
                     yield trajectory
 
                 elif frame % log_rate == 0:
@@ -585,7 +800,8 @@ class DynamicsEngine(StorableNamedObject):
 
                 try:
                     with self.interrupter():
-                        snapshot = self.generate_next_frame()
+                        with _dynamics_context():
+                            snapshot = self.generate_next_frame()
 
                         # if self.on_nan != 'ignore' and \
                         if not self.is_valid_snapshot(snapshot):
@@ -617,14 +833,15 @@ class DynamicsEngine(StorableNamedObject):
                 # Store snapshot and add it to the trajectory.
                 # Stores also final frame the last time
                 if direction > 0:
-                    trajectory.append(snapshot)
+                    growth.append(snapshot)
                 elif direction < 0:
-                    trajectory.insert(0, snapshot.reversed)
+                    growth.append(snapshot.reversed)
 
-                if 0 < max_length < len(trajectory):
+                if 0 < max_length < len(growth):
                     # hit the max length criterion
                     on = self.on_max_length
-                    del trajectory[-1]
+                    growth.pop()
+                    trajectory = growth.trajectory
 
                     if on == 'fail':
                         final_error = EngineMaxLengthError(
@@ -650,8 +867,14 @@ class DynamicsEngine(StorableNamedObject):
 
                 if stop is False:
                     # Check if we should stop. If not, continue simulation
-                    stop = self.stop_conditions(trajectory=trajectory,
-                                            continue_conditions=running)
+                    stop = self.stop_conditions(
+                        trajectory=growth,
+                        continue_conditions=conditions,
+                        new_frames=growth.frames[n_checked:]
+                    )
+                    n_checked = len(growth.frames)
+
+            trajectory = growth.trajectory
 
             # check what to do if stop is True
             if has_nan:
@@ -11,8 +11,14 @@ import logging
 import psutil
 import signal
 import shlex
+import threading
 import time
 
+try:
+    import queue
+except ImportError:  # pragma: no cover
+    import Queue as queue
+
 from subprocess import PIPE
 
 import sys
@@ -134,9 +140,145 @@ class _InternalizedEngineProxy(DynamicsEngine):
         return getattr(self.engine, attr)
 
 
+class _EngineDied(object):
+    """Marker put in the frame queue when the engine stopped writing"""
+    pass
+
+
+class BackgroundFrameReader(threading.Thread):
+    """Thread that reads the frames of an external engine as they appear.
+
+    The reader tails the output file of the engine and puts each new
+    snapshot into a bounded queue, from which
+    :meth:`.ExternalEngine.generate_next_frame` takes them. Parsing thus
+    overlaps with the evaluation of the stopping conditions in the main
+    thread. Instead of sleeping for a fixed time, the reader checks the
+    size and modification time of the output file every ``poll_ms``
+    milliseconds, and only tries to read again once the file has changed.
+
+    If the reader finds no more frames after the engine process has ended,
+    it puts a marker in the queue so that the engine can report that it
+    died. If reading raises an error, the error is put in the queue and
+    re-raised in the main thread.
+
+    Parameters
+    ----------
+    engine : :class:`.ExternalEngine`
+        the engine to read frames for; its ``read_frame_from_file`` is only
+        called from the reader thread
+    filename : str
+        the output file to tail
+    proc : psutil.Popen
+        the engine process
+    maxsize : int
+        maximum number of parsed frames waiting in the queue; the reader
+        stops reading while the queue is full
+    poll_ms : float
+        time between checks for changes of the output file, in ms
+    """
+    def __init__(self, engine, filename, proc, maxsize=100, poll_ms=1.0):
+        super(BackgroundFrameReader, self).__init__()
+        self.daemon = True
+        self.engine = engine
+        self.filename = filename
+        self.proc = proc
+        self.poll_ms = poll_ms
+        self.frames = queue.Queue(maxsize=maxsize)
+        self._stop_event = threading.Event()
+
+    def _file_state(self):
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime)
+
+    def _put(self, item):
+        # block while the queue is full, but react to stop()
+        while not self._stop_event.is_set():
+            try:
+                self.frames.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            else:
+                return True
+        return False
+
+    def run(self):
+        frame_num = 0
+        unchanged_state = None
+        while not self._stop_event.is_set():
+            finished = self.proc.poll() is not None
+            state = self._file_state()
+            unchanged = (unchanged_state is not None
+                         and state == unchanged_state)
+            if unchanged and not finished:
+                # nothing new since the last unsuccessful read
+                self._stop_event.wait(self.poll_ms / 1000.0)
+                continue
+
+            try:
+                frame = self.engine.read_frame_from_file(self.filename,
+                                                         frame_num)
+            except IOError:
+                # maybe the file doesn't exist yet
+                frame = None
+            except Exception as e:
+                self._put(e)
+                return
+
+            if isinstance(frame, BaseSnapshot):
+                unchanged_state = None
+                frame_num += 1
+                if not self._put(frame):
+                    return
+            elif frame is None or frame == "partial":
+                if finished:
+                    # the engine ended before this read: no more frames
+                    self._put(_EngineDied())
+                    return
+                unchanged_state = state
+            else:  # pragma: no cover
+                self._put(RuntimeError("Strange return value from "
+                                       "read_next_frame_from_file"))
+                return
+
+    def next_frame(self):
+        """Wait for the next frame and return it.
+
+        Raises
+        ------
+        RuntimeError
+            if the engine process ended before writing the next frame
+        """
+        item = self.frames.get()
+        if isinstance(item, _EngineDied):
+            raise RuntimeError("External engine died unexpectedly")
+        elif isinstance(item, Exception):
+            raise item
+        return item
+
+    def stop(self):
+        """Stop reading and wait for the thread to end"""
+        self._stop_event.set()
+        self.join()
+
+
 class ExternalEngine(DynamicsEngine):
     """
     Generic object to handle arbitrary external engines. Subclass to use.
+
+    Options common to all external engines include:
+
+        * ``background_reader``: If True, frames are read by a
+          :class:`.BackgroundFrameReader` thread that tails the output
+          file, instead of polling the file with ``time.sleep`` between
+          reads. Default is False.
+        * ``reader_queue_size``: Maximum number of parsed frames the
+          background reader keeps ahead of the stopping conditions.
+          Default is 100.
+        * ``reader_poll_ms``: Time between checks for changes of the
+          output file by the background reader, in ms. Default is 1.
     """
 
     _default_options = {
@@ -150,6 +292,9 @@ class ExternalEngine(DynamicsEngine):
         'n_atoms': 1,
         'n_poll_per_step': 1,
         'filename_setter': FilenameSetter(),
+        'background_reader': False,
+        'reader_queue_size': 100,
+        'reader_poll_ms': 1.0,
     }
 
     killsig = signal.SIGTERM
@@ -166,6 +311,7 @@ class ExternalEngine(DynamicsEngine):
         self._traj_num = -1
         self._current_snapshot = template
         self.n_frames_since_start = None
+        self._reader = None
         self.internalized_engine = _InternalizedEngineProxy(self)
         if 'filename_setter' not in options:
             # Level 6 is needed to raise it to the initialization of a
@@ -203,7 +349,18 @@ class ExternalEngine(DynamicsEngine):
     def current_snapshot(self, snap):
         self._current_snapshot = snap
 
+    def _next_frame_from_reader(self):
+        next_frame = self._reader.next_frame()
+        self.n_frames_since_start += 1
+        logger.debug("Found frame %d", self.n_frames_since_start)
+        self.current_snapshot = next_frame
+        self.frame_num += 1
+        return self.current_snapshot
+
     def generate_next_frame(self):
+        if self._reader is not None:
+            return self._next_frame_from_reader()
+
         # should be completely general
         next_frame_found = False
         logger.debug("Looking for frame %d", self.n_frames_since_start+1)
@@ -268,6 +425,16 @@ class ExternalEngine(DynamicsEngine):
         else:
             logger.info("Started engine: " + str(self.proc))
 
+        if self.options['background_reader']:
+            self._reader = BackgroundFrameReader(
+                engine=self,
+                filename=self.output_file,
+                proc=self.proc,
+                maxsize=self.options['reader_queue_size'],
+                poll_ms=self.options['reader_poll_ms']
+            )
+            self._reader.start()
+
         if self.first_frame_in_file:
             _ = self.generate_next_frame()  # throw away repeat first frame
 
@@ -278,6 +445,10 @@ class ExternalEngine(DynamicsEngine):
     def stop(self, trajectory):
         super(ExternalEngine, self).stop(trajectory)
         logger.info("total_time {:.4f}".format(time.time() - self.start_time))
+        if self._reader is not None:
+            # stop reading before the output file goes away
+            self._reader.stop()
+            self._reader = None
         proc = self.who_to_kill()
         logger.info("About to send signal %s to %s", str(self.killsig),
                     str(proc))
@@ -43,6 +43,44 @@ def _snapshot_function_overridden(cls, method):
         return _snapshot_function_overridden(cls.__base__, method)
 
 
+class ReversedMinusFeature(object):
+    """
+    Descriptor for `minus` features of reversed snapshots
+
+    A reversed snapshot does not get a negated copy of its `minus` features
+    (e.g., velocities) when it is created. Instead, the value is negated
+    from the reversed partner on first access and then kept as a normal
+    instance attribute, which takes precedence over this (non-data)
+    descriptor. Creating a reversed snapshot therefore does not allocate
+    any arrays.
+
+    Parameters
+    ----------
+    name : str
+        the name of the feature
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        partner = getattr(instance, '_reversed', None)
+        if partner is None or self.name not in partner.__dict__:
+            # neither snapshot has the value
+            raise AttributeError(
+                "'{0}' object has no attribute '{1}'".format(
+                    owner.__name__, self.name))
+
+        value = partner.__dict__[self.name]
+        if value is not None:
+            value = - value
+
+        instance.__dict__[self.name] = value
+        return value
+
+
 def _register_function(cls, name, code, __features__):
 
     import numpy as np
@@ -355,6 +393,11 @@ def attach_features(features, use_lazy_reversed=False):
         for attr in __features__['lazy']:
             setattr(cls, attr, DelayedLoader())
 
+        # add descriptors that negate minus features on access
+        for attr in __features__['minus']:
+            if attr not in __features__['lazy']:
+                setattr(cls, attr, ReversedMinusFeature(attr))
+
         # update the docstring to be a union of docstrings from the class
         # and the features
 
@@ -485,9 +528,10 @@ def attach_features(features, use_lazy_reversed=False):
         #     this = cls.__new__(cls)
         #     this._lazy = { ... }
         #     this.feature1 = self.feature1
-        #     this.feature2 = - self.feature2  # minus feature
         #     this.feature3 = ~ self.feature3  # flip features
         #     return this
+        #
+        # minus features are negated on access (see ReversedMinusFeature)
 
         with context.Function('create_reversed') as code:
             code += [
@@ -524,7 +568,6 @@ def attach_features(features, use_lazy_reversed=False):
             code += default_none_code
 
             code.format("    this.{0} = self.{0}", 'reversal', [], ['lazy'])
-            code.format("    this.{0} = - self.{0}", 'minus', [], ['lazy'])
             code.format("    this.{0} = not self.{0}", 'flip', [], ['lazy'])
 
             code += [
@@ -147,11 +147,34 @@ class StaticContainerStore(ObjectStore):
         if atom_indices is None:
             atom_indices = slice(None)
 
-        variable = self.storage.variables[self.prefix + '_coordinates']
+        variable = self.variables['coordinates']
 
         return variable[frame_indices, atom_indices, :].astype(
             np.float32).copy()
 
+    def box_vectors_as_numpy(self, frame_indices=None):
+        """
+        Return the box vectors in the storage for given frame indices
+
+        Parameters
+        ----------
+        frame_indices : list of int or None
+            the frame indices to be included. If None all frames are returned
+
+        Returns
+        -------
+        numpy.array, shape=(n_frames, n_spatial, n_spatial)
+            the array of box vectors in a float32 numpy array. Frames
+            without box vectors are all zero.
+
+        """
+        if frame_indices is None:
+            frame_indices = slice(None)
+
+        variable = self.variables['box_vectors']
+
+        return variable[frame_indices, :, :].astype(np.float32).copy()
+
     def initialize(self):
         super(StaticContainerStore, self).initialize()
         error_if_no_simtk_unit("StaticContainerStore")
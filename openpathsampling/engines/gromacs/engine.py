@@ -21,6 +21,7 @@ from openpathsampling.engines.external_snapshots import \
         ExternalMDSnapshot, InternalizedMDSnapshot
 from openpathsampling.tools import ensure_file
 from openpathsampling.exports.trajectories import TRRTrajectoryWriter
+from .trr import TRRFileCache
 
 import os
 import psutil
@@ -167,8 +168,8 @@ class GromacsEngine(ExternalEngine):
             except OSError:
                 pass  # the directory already exists
 
-        self._file = None  # file open/close efficiency
-        self._last_filename = None
+        # open TRR files, with the offsets of the frames read so far
+        self._trr_files = TRRFileCache()
         # TODO: add snapshot_timestep; first via options, later read mdp
         template = snapshot_from_gro(self.gro)
         self.topology = template.topology
@@ -227,44 +228,24 @@ class GromacsEngine(ExternalEngine):
     def read_frame_data(self, filename, frame_num):
         """
         Returns pos, vel, box or raises error
-        """
-        # if self._last_filename != filename:
-            # try:
-                # self._file.close()
-            # except AttributeError:
-                # pass  # first time thru, self._file is None
-            # self._file = TRRTrajectoryFile(filename)
-        # f = self._file
-        # do we need to reopen the TRR each time to avoid problems with the
-        # fiel length changing?
-        trr = TRRTrajectoryFile(filename)
-        f = trr
-        logger.debug("Reading file %s frame %d (of %d)",
-                     filename, frame_num, len(f))
-        # logger.debug("File length: %d", len(f))
-        try:
-            f.seek(offset=frame_num)
-            data = f._read(n_frames=1, atom_indices=None, get_velocities=True)
-        finally:
-            trr.close()
 
-        return data[0][0], data[5][0], data[3][0]
+        The file is kept open (see :class:`.TRRFileCache`), so that reading
+        further frames of the same file does not need to scan the earlier
+        frames again.
+        """
+        trr = self._trr_files[filename]
+        logger.debug("Reading file %s frame %d", filename, frame_num)
+        return trr.read_frame(frame_num)
 
     def read_frame_from_file(self, file_name, frame_num):
         # note: this only needs to return the file pointers -- but should
         # only do so once that frame has been written!
-        basename = os.path.basename(file_name)
-        # basename should be in the format [0-9]+\.trr (as set by the
-        # trajectory_filename method)
-        # file_number = int(basename.split('.')[0])
         try:
             xyz, vel, box = self.read_frame_data(file_name, frame_num)
         except (IndexError, OSError, IOError) as e:
-            # this means that no such frame exists yet, so we return None
-            # IndexError in older version, OSError more recently (specific
-            # MDTraj error)
+            # this means that no such frame exists yet (IndexError), or
+            # that the file doesn't exist yet (OSError), so we return None
             logger.debug("Expected exception caught: " + str(e))
-            close_file_descriptors(basename)
             return None
         except RuntimeError as e:
             # TODO: matches "TRR read error"
@@ -285,6 +266,8 @@ class GromacsEngine(ExternalEngine):
             # you don't want them.
             raise RuntimeError("File " + str(filename) + " exists. "
                                + "Preventing overwrite.")
+        # forget an earlier file of the same name
+        self._trr_files.discard(filename)
         # type control before passing things to Cython code
         xyz = np.asarray([snapshot.xyz], dtype=np.float32)
         time = np.asarray([0.0], dtype=np.float32)
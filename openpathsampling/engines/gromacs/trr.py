@@ -0,0 +1,261 @@
+"""
+Incremental reading of Gromacs TRR files
+
+While Gromacs writes a trajectory, OPS reads each new frame as soon as it is
+complete. Reopening the file and seeking to a frame (as MDTraj's
+``TRRTrajectoryFile`` does) scans all previous frames, so that reading a
+whole trajectory this way takes quadratic time. Here, files are kept open,
+and the byte offset of each complete frame is recorded once, from the
+frame headers. Reading any frame that has been indexed is then a single
+seek and read.
+"""
+
+import collections
+import os
+import struct
+import threading
+
+import numpy as np
+
+TRR_MAGIC = 1993
+
+# magic number, version string length, and the version string itself (as
+# an XDR string: length and the padded characters of "GMX_trn_file")
+_VERSION_SIZE = 24
+_HEADER_INTS = struct.Struct('>13i')
+_HEADER_INT_NAMES = ['ir_size', 'e_size', 'box_size', 'vir_size',
+                     'pres_size', 'top_size', 'sym_size', 'x_size',
+                     'v_size', 'f_size', 'natoms', 'step', 'nre']
+# data blocks of a frame, in the order they are written
+_BLOCKS = ['ir_size', 'e_size', 'box_size', 'vir_size', 'pres_size',
+           'top_size', 'sym_size', 'x_size', 'v_size', 'f_size']
+# size of the frame header in double precision; t and lambda are reals
+_MAX_HEADER_SIZE = _VERSION_SIZE + _HEADER_INTS.size + 2 * 8
+
+
+def _real_size(header):
+    if header['box_size']:
+        return header['box_size'] // 9
+    natoms = header['natoms']
+    for block in ['x_size', 'v_size', 'f_size']:
+        if header[block] and natoms:
+            return header[block] // (natoms * 3)
+    raise RuntimeError("TRR read error: cannot determine precision")
+
+
+def parse_trr_header(buf):
+    """Parse the header of a TRR frame.
+
+    Parameters
+    ----------
+    buf : bytes
+        the start of the frame; must contain at least the complete header
+
+    Returns
+    -------
+    dict or None
+        the block sizes (in bytes) and other header entries, with the
+        additional keys ``header_size`` and ``frame_size`` (the size of the
+        whole frame, including the header). None if ``buf`` is too short to
+        contain the header.
+
+    Raises
+    ------
+    RuntimeError
+        if the data is not a TRR frame header
+    """
+    if len(buf) < _VERSION_SIZE + _HEADER_INTS.size:
+        return None
+    magic = struct.unpack_from('>i', buf)[0]
+    if magic != TRR_MAGIC:
+        raise RuntimeError("TRR read error: bad magic number %d" % magic)
+
+    values = _HEADER_INTS.unpack_from(buf, _VERSION_SIZE)
+    header = dict(zip(_HEADER_INT_NAMES, values))
+    real_size = _real_size(header)
+    header['real_size'] = real_size
+    header['header_size'] = (_VERSION_SIZE + _HEADER_INTS.size
+                             + 2 * real_size)
+    if len(buf) < header['header_size']:
+        return None
+
+    header['frame_size'] = (header['header_size']
+                            + sum(header[block] for block in _BLOCKS))
+    return header
+
+
+class TRRFrameIndex(object):
+    """Open TRR file with the byte offsets of its complete frames.
+
+    The index grows as frames are requested, so the file can still be
+    written to. Frames are only indexed once they are completely written.
+    All methods are thread-safe.
+
+    Parameters
+    ----------
+    filename : str
+        the TRR file
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._lock = threading.Lock()
+        self.offsets = []
+        self._headers = []
+        self._end = 0  # byte offset after the last complete frame
+
+    def is_current(self):
+        """Whether the file at ``filename`` is still the open file.
+
+        This is False if the file has been removed or replaced, or if it has
+        become shorter than the part that has already been indexed.
+        """
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return False
+        return stat.st_ino == self._inode and stat.st_size >= self._end
+
+    def _update(self, n_frames=None):
+        # index new complete frames, up to n_frames; returns the file size
+        size = os.fstat(self._file.fileno()).st_size
+        while n_frames is None or len(self.offsets) < n_frames:
+            if size - self._end < _VERSION_SIZE + _HEADER_INTS.size:
+                break
+            self._file.seek(self._end)
+            header = parse_trr_header(self._file.read(_MAX_HEADER_SIZE))
+            if header is None or self._end + header['frame_size'] > size:
+                break
+            self.offsets.append(self._end)
+            self._headers.append(header)
+            self._end += header['frame_size']
+        return size
+
+    def __len__(self):
+        with self._lock:
+            self._update()
+            return len(self.offsets)
+
+    def read_frame(self, frame_num):
+        """Read the coordinates, velocities and box vectors of a frame.
+
+        Parameters
+        ----------
+        frame_num : int
+            the index of the frame in the file
+
+        Returns
+        -------
+        xyz : numpy.ndarray, shape=(n_atoms, 3)
+            the coordinates (in nm)
+        velocities : numpy.ndarray, shape=(n_atoms, 3) or None
+            the velocities (in nm/ps); None if not in this frame
+        box : numpy.ndarray, shape=(3, 3) or None
+            the box vectors (in nm); None if not in this frame
+
+        Raises
+        ------
+        IndexError
+            if the frame has not been written (yet)
+        RuntimeError
+            if the frame has only partially been written
+        """
+        with self._lock:
+            size = self._update(frame_num + 1)
+            if frame_num >= len(self.offsets):
+                if frame_num == len(self.offsets) and size > self._end:
+                    raise RuntimeError("TRR read error: frame %d of %s is "
+                                       "incomplete"
+                                       % (frame_num, self.filename))
+                raise IndexError("Frame %d not in %s (%d frames)"
+                                 % (frame_num, self.filename,
+                                    len(self.offsets)))
+
+            header = self._headers[frame_num]
+            self._file.seek(self.offsets[frame_num])
+            buf = self._file.read(header['frame_size'])
+
+        dtype = '>f%d' % header['real_size']
+        natoms = header['natoms']
+        starts = {}
+        position = header['header_size']
+        for block in _BLOCKS:
+            starts[block] = position
+            position += header[block]
+
+        def read_block(block, shape):
+            if header[block] == 0:
+                return None
+            data = np.frombuffer(buf, dtype=dtype, offset=starts[block],
+                                 count=header[block] // header['real_size'])
+            return data.reshape(shape).astype(np.float32)
+
+        xyz = read_block('x_size', (natoms, 3))
+        vel = read_block('v_size', (natoms, 3))
+        box = read_block('box_size', (3, 3))
+        return xyz, vel, box
+
+    def close(self):
+        """Close the file"""
+        with self._lock:
+            self._file.close()
+
+
+class TRRFileCache(object):
+    """Least recently used cache of open, indexed TRR files.
+
+    Files that are evicted from the cache are closed. Open files are not
+    pickled; after unpickling, files are reopened when they are needed.
+
+    Parameters
+    ----------
+    size_limit : int
+        maximum number of files kept open
+    """
+    def __init__(self, size_limit=8):
+        self.size_limit = size_limit
+        self._indices = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {'size_limit': self.size_limit}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __contains__(self, filename):
+        return filename in self._indices
+
+    def __getitem__(self, filename):
+        """The :class:`.TRRFrameIndex` of ``filename``, opened if needed"""
+        with self._lock:
+            index = self._indices.pop(filename, None)
+            if index is not None and not index.is_current():
+                index.close()
+                index = None
+            if index is None:
+                index = TRRFrameIndex(filename)
+            self._indices[filename] = index
+            while len(self._indices) > self.size_limit:
+                _, evicted = self._indices.popitem(last=False)
+                evicted.close()
+            return index
+
+    def discard(self, filename):
+        """Close ``filename`` if it is open"""
+        with self._lock:
+            index = self._indices.pop(filename, None)
+        if index is not None:
+            index.close()
+
+    def clear(self):
+        """Close all files"""
+        with self._lock:
+            indices = list(self._indices.values())
+            self._indices.clear()
+        for index in indices:
+            index.close()
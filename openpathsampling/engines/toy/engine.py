@@ -1,9 +1,44 @@
 import numpy as np
 
-from openpathsampling.engines import DynamicsEngine, SnapshotDescriptor
+from openpathsampling.engines import (
+    DynamicsEngine, EngineMaxLengthError, SnapshotDescriptor, Trajectory
+)
+from openpathsampling.engines.dynamics_engine import TrajectoryGrowthBuffer
 from .snapshot import ToySnapshot as Snapshot
 
 
+class ToyBatchState(object):
+    """State of several independent walkers in the same toy system.
+
+    This provides the attributes the integrators and potential energy
+    surfaces use from a :class:`.ToyEngine`, but with ``positions`` and
+    ``velocities`` of shape ``(n_walkers, n_spatial)``.
+
+    Parameters
+    ----------
+    engine : :class:`.ToyEngine`
+        engine providing the potential energy surface and masses
+    positions : numpy.ndarray (n_walkers, n_spatial)
+        positions of all walkers
+    velocities : numpy.ndarray (n_walkers, n_spatial)
+        velocities of all walkers
+    """
+    def __init__(self, engine, positions, velocities):
+        self.pes = engine.pes
+        self.mass = engine.mass
+        self._minv = engine._minv
+        self.positions = positions
+        self.velocities = velocities
+
+    def __len__(self):
+        return len(self.positions)
+
+    def take(self, rows):
+        """Keep only the walkers in the given rows (in that order)"""
+        self.positions = self.positions[rows]
+        self.velocities = self.velocities[rows]
+
+
 class ToyEngine(DynamicsEngine):
     """Engine for toy models. Mostly used for 2D examples.
 
@@ -135,6 +170,176 @@ class ToyEngine(DynamicsEngine):
             self.integ.step(sys=self)
         return self.current_snapshot
 
+    def batch_state(self, snapshots):
+        """Create a :class:`.ToyBatchState` from several snapshots.
+
+        Parameters
+        ----------
+        snapshots : list of :class:`.Snapshot`
+            initial snapshots, one per walker
+
+        Returns
+        -------
+        :class:`.ToyBatchState`
+            the batched state; positions and velocities are copies
+        """
+        for snap in snapshots:
+            self.check_snapshot_type(snap)
+
+        n_spatial = self.topology.n_spatial
+        positions = np.array([snap.coordinates[0] for snap in snapshots],
+                             dtype=float).reshape(-1, n_spatial)
+        velocities = np.array([snap.velocities[0] for snap in snapshots],
+                              dtype=float).reshape(-1, n_spatial)
+        return ToyBatchState(self, positions, velocities)
+
+    def batch_snapshots(self, state):
+        """Snapshots for the current frame of each walker in a batch.
+
+        Parameters
+        ----------
+        state : :class:`.ToyBatchState`
+            the batched state
+
+        Returns
+        -------
+        list of :class:`.Snapshot`
+            one snapshot per walker
+        """
+        return [
+            Snapshot(
+                coordinates=np.array([pos]),
+                velocities=np.array([vel]),
+                engine=self
+            )
+            for pos, vel in zip(state.positions, state.velocities)
+        ]
+
+    def generate_next_frame_batch(self, state):
+        """Advance all walkers in a batch by one frame, in place.
+
+        Parameters
+        ----------
+        state : :class:`.ToyBatchState`
+            the batched state
+        """
+        for i in range(self.n_steps_per_frame):
+            self.integ.step(sys=state)
+
+    def generate_n_frames_batch(self, snapshots, n_frames=1):
+        """Generate n_frames for each of several initial snapshots.
+
+        Batched analog of :meth:`.generate_n_frames`: all walkers are
+        integrated together in a single array.
+
+        Parameters
+        ----------
+        snapshots : list of :class:`.Snapshot`
+            initial snapshots, one per walker
+        n_frames : int
+            number of frames to generate
+
+        Returns
+        -------
+        list of :class:`.Trajectory`
+            for each initial snapshot, the `n_frames` following (and not
+            including) it
+        """
+        state = self.batch_state(snapshots)
+        trajectories = [Trajectory() for _ in snapshots]
+        for _ in range(n_frames):
+            self.generate_next_frame_batch(state)
+            for traj, snap in zip(trajectories, self.batch_snapshots(state)):
+                traj.append(snap)
+
+        return trajectories
+
+    def generate_batch(self, snapshots, running=None, direction=+1):
+        """Generate independent trajectories from several snapshots.
+
+        Batched analog of :meth:`.generate`. The integration of all walkers
+        that are still running is done in a single array; stopping
+        conditions are evaluated for each walker separately, and walkers
+        drop out of the batch as soon as they stop.
+
+        Parameters
+        ----------
+        snapshots : list of :class:`.Snapshot`
+            initial snapshots, one per walker
+        running : (list of) function(:class:`.Trajectory`)
+            callable function of a 'Trajectory' that returns True or False.
+            If one of these returns False the walker is stopped.
+        direction : -1 or +1 (DynamicsEngine.FORWARD or DynamicsEngine.BACKWARD)
+            direction of integration; see :meth:`.generate`
+
+        Returns
+        -------
+        list of :class:`.Trajectory`
+            the generated trajectory for each initial snapshot
+
+        Notes
+        -----
+        Retrying on errors is not supported in batched mode. If a walker
+        hits `n_frames_max`, it is stopped if `on_max_length` is 'stop';
+        otherwise an :class:`.EngineMaxLengthError` is raised.
+        """
+        if direction == 0:
+            raise RuntimeError(
+                'direction must be positive (FORWARD) or negative (BACKWARD).')
+
+        if running is None:
+            running = []
+        elif callable(running):
+            running = [running]
+
+        max_length = self.options['n_frames_max'] or 0
+
+        # frames are added to the trajectories in one block at the end
+        growths = [TrajectoryGrowthBuffer(Trajectory([snap]), direction)
+                   for snap in snapshots]
+        conditions = [self.incremental_conditions(running, direction)
+                      for _ in growths]
+        active = [
+            idx for idx, growth in enumerate(growths)
+            if not self.stop_conditions(trajectory=growth,
+                                        continue_conditions=conditions[idx],
+                                        trusted=False)
+        ]
+        if direction > 0:
+            state = self.batch_state([snapshots[idx] for idx in active])
+        else:
+            state = self.batch_state([snapshots[idx].reversed
+                                      for idx in active])
+
+        while active:
+            self.generate_next_frame_batch(state)
+            keep = []
+            new_snapshots = self.batch_snapshots(state)
+            for row, (idx, snap) in enumerate(zip(active, new_snapshots)):
+                growth = growths[idx]
+                new_frame = snap if direction > 0 else snap.reversed
+                growth.append(new_frame)
+
+                if 0 < max_length < len(growth):
+                    growth.pop()
+
+                    if self.on_max_length != 'stop':
+                        raise EngineMaxLengthError(
+                            'Hit maximal length of %d frames.' % max_length,
+                            growth.trajectory
+                        )
+                elif not self.stop_conditions(
+                        trajectory=growth,
+                        continue_conditions=conditions[idx],
+                        new_frames=[new_frame]):
+                    keep.append(row)
+
+            if len(keep) < len(active):
+                active = [active[row] for row in keep]
+                state.take(keep)
+
+        return [growth.trajectory for growth in growths]
+
     def n_degrees_of_freedom(self):
         topol = self.topology
         return topol.n_atoms * topol.n_spatial
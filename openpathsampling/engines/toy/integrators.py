@@ -8,6 +8,12 @@ from openpathsampling.netcdfplus import StorableNamedObject
 class ToyIntegrator(StorableNamedObject):
     """
     Abstract base class for toy engine integrators.
+
+    Integrators only act on the ``positions``, ``velocities``, ``_minv``
+    and ``pes`` of the system they are given. These may carry a leading
+    batch axis (shape ``(n_walkers, n_spatial)``), in which case all
+    walkers are advanced by a single vectorized step. Random forces are
+    drawn independently for each walker.
     """
     def __init__(self):
         super(StorableNamedObject, self).__init__()
@@ -110,7 +116,7 @@ class LangevinBAOABIntegrator(LeapfrogVerletIntegrator):
 
 
     def _OU_update(self, sys, mydt):
-        R = np.random.normal(size=len(sys.velocities))
+        R = np.random.normal(size=np.shape(sys.velocities))
         sys.velocities = (self._c1 * sys.velocities +
                           self._c3 * np.sqrt(sys._minv) * R)
 
@@ -157,7 +163,8 @@ class OverdampedLangevinIntegrator(ToyIntegrator):
 
     def _position_update(self, sys, mydt):
         sys.positions += - self.A * np.array(sys.pes.dVdx(sys)) \
-                         + self.R * np.random.normal(size=len(sys.positions))
+                         + self.R * np.random.normal(
+                             size=np.shape(sys.positions))
 
     def step(self, sys):
         """
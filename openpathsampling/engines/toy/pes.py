@@ -8,6 +8,13 @@ from openpathsampling.netcdfplus import StorableObject
 
 class PES(StorableObject):
     """Abstract base class for toy potential energy surfaces.
+
+    The ``V`` and ``dVdx`` methods of the built-in surfaces broadcast over
+    a leading batch axis: if ``sys.positions`` has shape ``(n_walkers,
+    n_spatial)`` instead of ``(n_spatial,)``, ``V`` returns one energy per
+    walker and ``dVdx`` returns an array with the shape of the positions.
+    This is used by :meth:`.ToyEngine.generate_batch`. User-defined
+    surfaces only need to support this if they are used in batched mode.
     """
     # For now, we only support additive combinations; maybe someday that can
     # include multiplication, too
@@ -31,7 +38,7 @@ class PES(StorableObject):
         """
         v = sys.velocities
         m = sys.mass
-        return 0.5*np.dot(m, np.multiply(v, v))
+        return 0.5*np.dot(np.multiply(v, v), m)
 
 
 class PES_Combination(PES):
@@ -169,7 +176,7 @@ class HarmonicOscillator(PES):
         """
         dx = sys.positions - self.x0
         k = self.omega*self.omega*sys.mass
-        return 0.5*np.dot(self.A * k, dx * dx)
+        return 0.5*np.dot(dx * dx, self.A * k)
 
     def dVdx(self, sys):
         """Derivative of potential energy (-force)
@@ -231,7 +238,7 @@ class Gaussian(PES):
             the potential energy
         """
         dx = sys.positions - self.x0
-        return self.A*np.exp(-np.dot(self.alpha, np.multiply(dx, dx)))
+        return self.A*np.exp(-np.dot(np.multiply(dx, dx), self.alpha))
 
     def dVdx(self, sys):
         """Derivative of potential energy (-force)
@@ -247,7 +254,9 @@ class Gaussian(PES):
             the derivatives of the potential at this point
         """
         dx = sys.positions - self.x0
-        exp_part = self.A*np.exp(-np.dot(self.alpha, np.multiply(dx, dx)))
+        exp_part = self.A*np.exp(-np.dot(np.multiply(dx, dx), self.alpha))
+        if dx.ndim > 1:
+            return -2*self.alpha*dx*exp_part[:, np.newaxis]
         for i in range(len(dx)):
             self._local_dVdx[i] = -2*self.alpha[i]*dx[i]*exp_part
         return self._local_dVdx
@@ -294,6 +303,8 @@ class OuterWalls(PES):
             the potential energy
         """
         dx = sys.positions - self.x0
+        if dx.ndim > 1:
+            return np.dot(dx**6, self.sigma)
         myV = 0.0
         for i in range(len(dx)):
             myV += self.sigma[i]*dx[i]**6
@@ -313,6 +324,8 @@ class OuterWalls(PES):
             the derivatives of the potential at this point
         """
         dx = sys.positions - self.x0
+        if dx.ndim > 1:
+            return 6.0*self.sigma*dx**5
         for i in range(len(dx)):
             self._local_dVdx[i] = 6.0*self.sigma[i]*dx[i]**5
         return self._local_dVdx
@@ -351,7 +364,7 @@ class LinearSlope(PES):
         float
             the potential energy
         """
-        return np.dot(self.m, sys.positions) + self.c
+        return np.dot(sys.positions, self.m) + self.c
 
     def dVdx(self, sys):
         """Derivative of potential energy (-force)
@@ -367,6 +380,8 @@ class LinearSlope(PES):
             the derivatives of the potential at this point
         """
         # this is independent of the position
+        if np.ndim(sys.positions) > 1:
+            return np.broadcast_to(self._local_dVdx, np.shape(sys.positions))
         return self._local_dVdx
 
 
@@ -413,7 +428,7 @@ class DoubleWell(PES):
             the potential energy
         """
         dx2 = sys.positions * sys.positions - self.x0 * self.x0
-        return np.dot(self.A, dx2 * dx2)
+        return np.dot(dx2 * dx2, self.A)
 
     def dVdx(self, sys):
         """Derivative of potential energy (-force)
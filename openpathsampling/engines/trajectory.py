@@ -6,7 +6,7 @@
 import numpy as np
 
 from openpathsampling.integration_tools import (
-    error_if_no_mdtraj, is_simtk_quantity_type, md
+    error_if_no_mdtraj, is_simtk_quantity, is_simtk_quantity_type, md
 )
 from openpathsampling.netcdfplus import StorableObject, LoaderProxy
 import openpathsampling as paths
@@ -17,6 +17,12 @@ import openpathsampling as paths
 # ==============================================================================
 
 
+def _strip_unit(value):
+    if is_simtk_quantity(value):
+        return value._value
+    return value
+
+
 class Trajectory(list, StorableObject):
     """
     Simulation trajectory. Essentially a python list of snapshots
@@ -24,6 +30,13 @@ class Trajectory(list, StorableObject):
 
     engine = None
 
+    # snapshot attributes that are gathered with `_feature_as_numpy`; only
+    # for attributes without units (others keep the snapshots' values, use
+    # e.g. `coordinates_as_numpy` for the arrays)
+    _array_features = {
+        'xyz': 'coordinates',
+    }
+
     def __init__(self, trajectory=None):
         """
         Create a simulation trajectory object
@@ -97,13 +110,17 @@ class Trajectory(list, StorableObject):
         creates a new Trajectory object and then fills it with shallow reversed
         copies of the contained snapshots.
 
+        Proxies to stored snapshots are reversed without loading the
+        snapshots, and each snapshot creates its reversed copy only once.
+
         Returns
         -------
         :class:`openpathsampling.trajectory.Trajectory`
             the reversed trajectory
         """
 
-        return Trajectory([snap for snap in reversed(self)])
+        return Trajectory([frame.reversed
+                           for frame in reversed(self.as_proxies())])
 
     @property
     def n_snapshots(self):
@@ -131,6 +148,14 @@ class Trajectory(list, StorableObject):
         Fallback to access Snapshot properties
 
         """
+        if item.startswith('__') and item.endswith('__'):
+            # special attributes (e.g., pickle's `__setstate__`) are never
+            # delegated to snapshots
+            raise AttributeError(
+                "'{0}' object has no attribute '{1}'".format(
+                    self.__class__.__name__, item)
+            )
+
         if len(self) == 0:
             return []
 
@@ -147,6 +172,11 @@ class Trajectory(list, StorableObject):
                 traj_func = getattr(snapshot_class, traj_item)
                 return traj_func(self)
 
+            if item in self._array_features:
+                out = self._feature_as_numpy(self._array_features[item])
+                if out is not None:
+                    return out
+
             # get the results
             out = [getattr(snap, item) for snap in self]
 
@@ -510,6 +540,97 @@ class Trajectory(list, StorableObject):
     # UTILITY FUNCTIONS
     # ==========================================================================
 
+    def coordinates_as_numpy(self, atom_indices=None):
+        """
+        Return the coordinates of all frames as a single numpy array
+
+        Frames that are proxies to stored snapshots are read directly from
+        the storage, without loading the snapshots.
+
+        Parameters
+        ----------
+        atom_indices : list of int or None
+            the atom indices to be included. If None all atoms are returned
+
+        Returns
+        -------
+        numpy.ndarray, shape=(n_frames, n_atoms, n_spatial) or None
+            the coordinates without units (like `xyz`); None if the frames
+            have no coordinates
+        """
+        return self._feature_as_numpy('coordinates', atom_indices)
+
+    def velocities_as_numpy(self, atom_indices=None):
+        """
+        Return the velocities of all frames as a single numpy array
+
+        Parameters
+        ----------
+        atom_indices : list of int or None
+            the atom indices to be included. If None all atoms are returned
+
+        Returns
+        -------
+        numpy.ndarray, shape=(n_frames, n_atoms, n_spatial) or None
+            the velocities without units; None if the frames have no
+            velocities
+
+        See also
+        --------
+        coordinates_as_numpy
+        """
+        return self._feature_as_numpy('velocities', atom_indices)
+
+    def box_vectors_as_numpy(self):
+        """
+        Return the box vectors of all frames as a single numpy array
+
+        Returns
+        -------
+        numpy.ndarray, shape=(n_frames, n_spatial, n_spatial) or None
+            the box vectors without units; None if the frames have no box
+            vectors. Frames loaded from storage without box vectors are
+            all zero.
+
+        See also
+        --------
+        coordinates_as_numpy
+        """
+        return self._feature_as_numpy('box_vectors')
+
+    def _feature_as_numpy(self, feature, atom_indices=None):
+        frames = self.as_proxies()
+        if len(frames) == 0:
+            return None
+
+        store = getattr(frames[0], '_store', None)
+        if hasattr(store, 'feature_as_numpy') and all(
+                type(frame) is LoaderProxy and frame._store is store
+                for frame in frames):
+            out = store.feature_as_numpy(
+                feature, [frame.__uuid__ for frame in frames], atom_indices)
+            if out is not None:
+                return out
+
+        # fill a preallocated array from the snapshots
+        out = None
+        for frame_idx, snap in enumerate(self):
+            value = _strip_unit(getattr(snap, feature, None))
+            if not isinstance(value, np.ndarray):
+                return None
+
+            if atom_indices is not None:
+                value = value[atom_indices]
+
+            if out is None:
+                out = np.empty((len(frames),) + value.shape, value.dtype)
+            elif value.shape != out.shape[1:]:
+                return None
+
+            out[frame_idx] = value
+
+        return out
+
     def to_mdtraj(self, topology=None):
         """
         Construct a mdtraj.Trajectory object from the Trajectory itself
@@ -545,12 +666,11 @@ class Trajectory(list, StorableObject):
             # if AttributeError here, engine doesn't support mdtraj
             topology = snap.engine.mdtraj_topology
 
-        output = self.xyz
+        output = self.coordinates_as_numpy()
 
         traj = md.Trajectory(output, topology)
-        box_vectors = self.box_vectors
-        # box_vectors is a list with an entry for each frame of the traj
-        # if they're all None, we return None, not [None, None, ..., None]
+        box_vectors = self.box_vectors_as_numpy()
+        # if there are no box vectors (or all are zero), we return None
         if not np.any(box_vectors):
             box_vectors = None
 
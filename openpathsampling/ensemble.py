@@ -71,6 +71,30 @@ def _get_list_traj(trajectory):
     return list(itraj())
 
 
+def _test_frames_in_volume(volume, frames, stop_value, first_batch=8):
+    """Test frames for being in a volume, in growing batches
+
+    Each batch is tested with :meth:`.Volume.evaluate` (one CV call for the
+    batch). Batch sizes double, so that we stop soon after the first frame
+    for which the volume gives `stop_value`, as with frame-by-frame tests.
+
+    Returns
+    -------
+    bool :
+        True if the volume gives `stop_value` for any of the frames
+    """
+    start = 0
+    size = first_batch
+    n_frames = len(frames)
+    while start < n_frames:
+        batch = volume.evaluate(frames[start:start + size])
+        if (batch == stop_value).any():
+            return True
+        start += size
+        size *= 2
+    return False
+
+
 # note: the cache is not storable, because that would just be silly!
 class EnsembleCache(object):
     """Object used by ensembles to enable fast algorithms for basic functions.
@@ -225,6 +249,424 @@ class EnsembleCache(object):
         return reset
 
 
+class EnsembleState(object):
+    """Incremental evaluation of an ensemble on a growing trajectory.
+
+    The state is fed the frames of a trajectory one at a time, in the order
+    in which they are added to the trajectory. If `direction` is +1, frames
+    are appended, and :attr:`.can_extend` gives the result of
+    ``ensemble.can_append(trajectory)``; if `direction` is -1, frames are
+    prepended, and :attr:`.can_extend` gives the result of
+    ``ensemble.can_prepend(trajectory)``. In both cases,
+    :attr:`.in_ensemble` tells whether the trajectory is in the ensemble.
+
+    This class is the fallback for ensembles without an incremental
+    algorithm: it keeps the frames and tests the whole trajectory when a
+    result is requested. The states created by
+    :meth:`.Ensemble.incremental_state` for the basic ensembles (volume,
+    length, sequential, and combination ensembles) have O(1) amortized cost
+    per frame. They only test frames when a result is requested, so that
+    short-circuit logic in combinations works as it does for the ensembles.
+
+    Parameters
+    ----------
+    ensemble : :class:`.Ensemble`
+        the ensemble to evaluate
+    direction : +1 or -1
+        whether frames are appended (+1) or prepended (-1)
+
+    Attributes
+    ----------
+    n_frames : int
+        number of frames fed to the state
+    """
+    def __init__(self, ensemble, direction=+1):
+        self.ensemble = ensemble
+        self.direction = direction
+        self.n_frames = 0
+        self._frames = []
+        self._results = {}
+
+    def __len__(self):
+        return self.n_frames
+
+    def add_frame(self, snapshot):
+        """Add the next frame to the trajectory.
+
+        Parameters
+        ----------
+        snapshot : :class:`.BaseSnapshot`
+            the new frame
+        """
+        self.n_frames += 1
+        self._frames.append(snapshot)
+        self._results = {}
+
+    def add_frames(self, snapshots):
+        """Add several frames, in the order they are added to the trajectory.
+
+        Parameters
+        ----------
+        snapshots : iterable of :class:`.BaseSnapshot`
+            the new frames
+        """
+        for snapshot in snapshots:
+            self.add_frame(snapshot)
+
+    def _evaluate(self, function_name):
+        try:
+            return self._results[function_name]
+        except KeyError:
+            pass
+
+        frames = self._frames if self.direction > 0 else self._frames[::-1]
+        function = getattr(self.ensemble, function_name)
+        result = function(paths.Trajectory(frames), trusted=False)
+        self._results[function_name] = result
+        return result
+
+    @property
+    def can_extend(self):
+        """bool : whether the trajectory can be extended by another frame"""
+        if self.direction > 0:
+            return self._evaluate('can_append')
+        else:
+            return self._evaluate('can_prepend')
+
+    @property
+    def in_ensemble(self):
+        """bool : whether the trajectory is in the ensemble"""
+        if self.direction > 0:
+            return self._evaluate('__call__')
+        else:
+            return self._evaluate('check_reverse')
+
+
+class ConstantEnsembleState(EnsembleState):
+    """State with results that don't depend on the frames.
+
+    Parameters
+    ----------
+    ensemble : :class:`.Ensemble`
+        the ensemble to evaluate
+    direction : +1 or -1
+        whether frames are appended (+1) or prepended (-1)
+    can_extend : bool
+        the value of :attr:`.can_extend`
+    in_ensemble : bool
+        the value of :attr:`.in_ensemble`
+    """
+    def __init__(self, ensemble, direction, can_extend, in_ensemble):
+        super(ConstantEnsembleState, self).__init__(ensemble, direction)
+        self._can_extend = can_extend
+        self._in_ensemble = in_ensemble
+
+    def add_frame(self, snapshot):
+        self.n_frames += 1
+
+    @property
+    def can_extend(self):
+        return self._can_extend
+
+    @property
+    def in_ensemble(self):
+        return self._in_ensemble
+
+
+class NegatedEnsembleState(EnsembleState):
+    """State of a :class:`.NegatedEnsemble`"""
+    def __init__(self, ensemble, direction=+1):
+        super(NegatedEnsembleState, self).__init__(ensemble, direction)
+        self.state = ensemble.ensemble.incremental_state(direction)
+
+    def add_frame(self, snapshot):
+        self.n_frames += 1
+        self.state.add_frame(snapshot)
+
+    @property
+    def can_extend(self):
+        return True
+
+    @property
+    def in_ensemble(self):
+        return not self.state.in_ensemble
+
+
+class CombinationEnsembleState(EnsembleState):
+    """State of an :class:`.EnsembleCombination`.
+
+    Both sub-states are fed every frame, but (as for the ensemble itself)
+    the second is only asked for a result if the first doesn't determine
+    the result of the combination.
+    """
+    def __init__(self, ensemble, direction=+1):
+        super(CombinationEnsembleState, self).__init__(ensemble, direction)
+        self.state1 = ensemble.ensemble1.incremental_state(direction)
+        self.state2 = ensemble.ensemble2.incremental_state(direction)
+
+    def add_frame(self, snapshot):
+        self.n_frames += 1
+        self.state1.add_frame(snapshot)
+        self.state2.add_frame(snapshot)
+
+    def _combine(self, attribute):
+        fnc = self.ensemble.fnc
+        a = getattr(self.state1, attribute)
+        res_true = fnc(a, True)
+        if res_true == fnc(a, False):
+            return res_true
+        return fnc(a, getattr(self.state2, attribute))
+
+    @property
+    def can_extend(self):
+        return self._combine('can_extend')
+
+    @property
+    def in_ensemble(self):
+        return self._combine('in_ensemble')
+
+
+class LengthEnsembleState(EnsembleState):
+    """State of a :class:`.LengthEnsemble`; only counts frames"""
+    def add_frame(self, snapshot):
+        self.n_frames += 1
+
+    @property
+    def can_extend(self):
+        return self.ensemble._can_append_length(self.n_frames)
+
+    @property
+    def in_ensemble(self):
+        return self.ensemble._call_length(self.n_frames)
+
+
+class AllInXEnsembleState(EnsembleState):
+    """State of an :class:`.AllInXEnsemble` (or :class:`.AllOutXEnsemble`).
+
+    Frames are only tested when a result is requested, and frames after
+    the first frame outside the volume are never tested.
+    """
+    def __init__(self, ensemble, direction=+1):
+        super(AllInXEnsembleState, self).__init__(ensemble, direction)
+        self._volume = ensemble._volume
+        self._all_in = True
+
+    def add_frame(self, snapshot):
+        self.n_frames += 1
+        if self._all_in:
+            self._frames.append(snapshot)
+
+    def _update(self):
+        if self._frames:
+            volume = self._volume
+            for frame in self._frames:
+                if not volume(frame):
+                    self._all_in = False
+                    break
+            self._frames = []
+        return self._all_in
+
+    @property
+    def can_extend(self):
+        return self.n_frames == 0 or self._update()
+
+    @property
+    def in_ensemble(self):
+        return self.n_frames > 0 and self._update()
+
+
+class PartInXEnsembleState(EnsembleState):
+    """State of a :class:`.PartInXEnsemble` (or :class:`.PartOutXEnsemble`).
+
+    Frames are only tested when :attr:`.in_ensemble` is requested, and
+    frames after the first frame in the volume are never tested.
+    """
+    def __init__(self, ensemble, direction=+1):
+        super(PartInXEnsembleState, self).__init__(ensemble, direction)
+        self._volume = ensemble._volume
+        self._part_in = False
+
+    def add_frame(self, snapshot):
+        self.n_frames += 1
+        if not self._part_in:
+            self._frames.append(snapshot)
+
+    @property
+    def can_extend(self):
+        return True
+
+    @property
+    def in_ensemble(self):
+        if self._frames:
+            volume = self._volume
+            for frame in self._frames:
+                if volume(frame):
+                    self._part_in = True
+                    break
+            self._frames = []
+        return self._part_in
+
+
+class SequentialEnsembleState(EnsembleState):
+    """State of a :class:`.SequentialEnsemble`.
+
+    This follows the same (greedy) assignment of frames to subensembles as
+    :meth:`.SequentialEnsemble.can_append` (or ``can_prepend``, with the
+    order of subensembles reversed), but keeps the state of the
+    subensemble for the current segment, so each frame is only tested once
+    by that subensemble. If no assignment can be found starting with the
+    first subensemble, the assignment is restarted from the beginning of
+    the trajectory with the next subensemble, as in ``can_append``; this
+    happens at most once per subensemble.
+
+    For prepended frames, :attr:`.in_ensemble` is evaluated on the whole
+    trajectory, because the ensemble test assigns frames in forward order.
+
+    This is not used if the last subensemble to be assigned frames (the
+    last one for appended frames, the first one for prepended frames)
+    allows zero frames; see :meth:`.SequentialEnsemble.incremental_state`.
+    """
+    def __init__(self, ensemble, direction=+1):
+        super(SequentialEnsembleState, self).__init__(ensemble, direction)
+        ensembles = list(ensemble.ensembles)
+        if direction < 0:
+            ensembles.reverse()
+        self._ensembles = ensembles
+        self._final = len(ensembles) - 1
+        self._zero_ok = {}
+        self._start(0)
+
+    def _start(self, ens_first):
+        # completed segments as (ens_num, first, final), for in_ensemble
+        self._ens_first = ens_first
+        self._alive = True
+        self._n_processed = 0
+        self._segments = []
+        self._segments_ok = True
+        self._n_segments_checked = 0
+        self._new_segment(ens_first, 0)
+
+    def _new_segment(self, ens_num, first):
+        self._ens_num = ens_num
+        self._subtraj_first = first
+        self._sub = self._ensembles[ens_num].incremental_state(
+            self.direction)
+
+    def _allows_zero_length(self, ens_num):
+        try:
+            return self._zero_ok[ens_num]
+        except KeyError:
+            result = self._ensembles[ens_num](paths.Trajectory([]))
+            self._zero_ok[ens_num] = result
+            return result
+
+    def add_frame(self, snapshot):
+        self.n_frames += 1
+        self._frames.append(snapshot)
+        self._results = {}
+
+    def _update(self):
+        frames = self._frames
+        while self._alive and self._n_processed < len(frames):
+            self._process(frames[self._n_processed])
+
+    def _process(self, frame):
+        # assign the frame with index self._n_processed
+        frame_num = self._n_processed
+        while True:
+            sub = self._sub
+            sub.add_frame(frame)
+            if sub.can_extend or sub.in_ensemble:
+                self._n_processed += 1
+                return
+
+            ens_num = self._ens_num
+            if frame_num > self._subtraj_first:
+                # the segment ends before this frame
+                if ens_num == self._final:
+                    self._alive = False  # frames left after last ensemble
+                    return
+                self._segments.append((ens_num, self._subtraj_first,
+                                       frame_num))
+                self._new_segment(ens_num + 1, frame_num)
+            elif self._allows_zero_length(ens_num) and ens_num < self._final:
+                self._new_segment(ens_num + 1, frame_num)
+            elif self._ens_first < self._final:
+                # reassign all frames, starting with the next ensemble
+                self._start(self._ens_first + 1)
+                return
+            else:
+                self._alive = False
+                return
+
+    @property
+    def can_extend(self):
+        self._update()
+        if not self._alive:
+            return False
+        elif self.n_frames > 0 and self._ens_num == self._final:
+            return self._sub.can_extend
+        else:
+            return True
+
+    @property
+    def in_ensemble(self):
+        if self.direction < 0:
+            return self._evaluate('check_reverse')
+
+        self._update()
+        if not self._alive or self._ens_first != 0:
+            return False
+
+        if self.n_frames == 0:
+            return all(self._allows_zero_length(i)
+                       for i in range(len(self._ensembles)))
+
+        # test each finished segment only once
+        for ens_num, first, final in \
+                self._segments[self._n_segments_checked:]:
+            if self._segments_ok:
+                subtraj = paths.Trajectory(self._frames[first:final])
+                self._segments_ok = self._ensembles[ens_num](subtraj)
+            self._n_segments_checked += 1
+
+        return (
+            self._segments_ok
+            and self._sub.in_ensemble
+            and all(self._allows_zero_length(i)
+                    for i in range(self._ens_num + 1, self._final + 1))
+        )
+
+
+class SuffixTrajectoryEnsembleState(EnsembleState):
+    """State for :meth:`.SuffixTrajectoryEnsemble.can_prepend`.
+
+    In backward shooting, the engine appends frames to a trajectory of
+    reversed snapshots. Each appended frame corresponds to a reversed frame
+    prepended to the suffix trajectory; that is what the state of the
+    wrapped ensemble is fed. :attr:`.can_extend` gives the result of
+    ``can_prepend`` (``can_append`` is nonsense for this ensemble).
+    """
+    def __init__(self, ensemble, direction=+1):
+        super(SuffixTrajectoryEnsembleState, self).__init__(ensemble,
+                                                            direction)
+        self.state = ensemble._new_ensemble.incremental_state(-1)
+        add_frames = _get_list_traj(ensemble.add_trajectory)
+        self.state.add_frames(reversed(add_frames))
+
+    def add_frame(self, snapshot):
+        self.n_frames += 1
+        self.state.add_frame(snapshot.reversed)
+
+    @property
+    def can_extend(self):
+        return self.state.can_extend
+
+    @property
+    def in_ensemble(self):
+        return self.state.in_ensemble
+
+
 class Ensemble(with_metaclass(abc.ABCMeta, StorableNamedObject)):
     """
     Path ensemble object.
@@ -410,6 +852,59 @@ class Ensemble(with_metaclass(abc.ABCMeta, StorableNamedObject)):
         # default behavior is to be the same as can_prepend
         return self.can_prepend(trajectory, trusted)
 
+    def incremental_state(self, direction=+1):
+        """
+        State object to evaluate this ensemble one frame at a time.
+
+        Parameters
+        ----------
+        direction : +1 or -1
+            if +1, frames are appended to the trajectory and the state
+            gives the result of `can_append`; if -1, frames are prepended
+            and the state gives the result of `can_prepend`
+
+        Returns
+        -------
+        :class:`.EnsembleState`
+            the state for an empty trajectory
+        """
+        # default: no incremental algorithm; test the whole trajectory
+        return EnsembleState(self, direction)
+
+    def incremental_condition(self, function_name, direction):
+        """
+        Incremental replacement for a method used as running condition.
+
+        This is used by :class:`.DynamicsEngine` to avoid testing the whole
+        trajectory after every frame, if a running condition like
+        ``ensemble.can_append`` has an incremental algorithm.
+
+        Parameters
+        ----------
+        function_name : str
+            name of the method used as running condition, e.g.,
+            ``'can_append'``
+        direction : +1 or -1
+            whether the engine appends (+1) or prepends (-1) new frames
+
+        Returns
+        -------
+        :class:`.EnsembleState` or None
+            a state whose `can_extend` gives the result of the method, or
+            None if there is no incremental algorithm for it
+        """
+        if direction > 0 and function_name == 'can_append':
+            state = self.incremental_state(+1)
+        elif direction < 0 and function_name == 'can_prepend':
+            state = self.incremental_state(-1)
+        else:
+            return None
+
+        if type(state) is EnsembleState:
+            # the fallback is no faster than calling the method directly
+            return None
+        return state
+
     def iter_valid_slices(
             self,
             trajectory,
@@ -1206,6 +1701,10 @@ class EmptyEnsemble(Ensemble):
     def can_prepend(self, trajectory, trusted=False):
         return False
 
+    def incremental_state(self, direction=+1):
+        return ConstantEnsembleState(self, direction, can_extend=False,
+                                     in_ensemble=False)
+
     def __invert__(self):
         return FullEnsemble()
 
@@ -1242,6 +1741,10 @@ class FullEnsemble(Ensemble):
     def can_prepend(self, trajectory, trusted=False):
         return True
 
+    def incremental_state(self, direction=+1):
+        return ConstantEnsembleState(self, direction, can_extend=True,
+                                     in_ensemble=True)
+
     def __invert__(self):
         return EmptyEnsemble()
 
@@ -1292,6 +1795,9 @@ class NegatedEnsemble(Ensemble):
         # We cannot guess the result here so keep on running forever
         return True
 
+    def incremental_state(self, direction=+1):
+        return NegatedEnsembleState(self, direction)
+
     def _str(self):
         return 'not ' + str(self.ensemble)
 
@@ -1418,6 +1924,9 @@ class EnsembleCombination(Ensemble):
             fname="strict_can_prepend"
         )
 
+    def incremental_state(self, direction=+1):
+        return CombinationEnsembleState(self, direction)
+
     def _str(self):
         # print self.sfnc, self.ensemble1, self.ensemble2,
         # print self.sfnc.format(
@@ -2081,6 +2590,16 @@ class SequentialEnsemble(Ensemble):
     def strict_can_prepend(self, trajectory, trusted=False):
         return self._generic_can_prepend(trajectory, trusted, strict=True)
 
+    def incremental_state(self, direction=+1):
+        # if the last subensemble to be assigned frames allows zero frames,
+        # can_append/can_prepend go past the end of the subensembles; the
+        # greedy assignment of SequentialEnsembleState does not reproduce
+        # that, so the whole trajectory is tested instead
+        last = self.ensembles[-1] if direction > 0 else self.ensembles[0]
+        if last(self._zero_traj):
+            return EnsembleState(self, direction)
+        return SequentialEnsembleState(self, direction)
+
     def _str(self):
         head = "[\n"
         tail = "\n]"
@@ -2109,7 +2628,9 @@ class LengthEnsemble(Ensemble):
         self.length = length
 
     def __call__(self, trajectory, trusted=None, candidate=False):
-        length = len(trajectory)
+        return self._call_length(len(trajectory))
+
+    def _call_length(self, length):
         if type(self.length) is int:
             return length == self.length
         else:
@@ -2117,7 +2638,9 @@ class LengthEnsemble(Ensemble):
                 self.length.stop is None or length < self.length.stop)
 
     def can_append(self, trajectory, trusted=False):
-        length = len(trajectory)
+        return self._can_append_length(len(trajectory))
+
+    def _can_append_length(self, length):
         if type(self.length) is int:
             return_value = (length < self.length)
             logger.debug("LengthEnsemble.can_append: Segment length " +
@@ -2130,6 +2653,9 @@ class LengthEnsemble(Ensemble):
     def can_prepend(self, trajectory, trusted=False):
         return self.can_append(trajectory)
 
+    def incremental_state(self, direction=+1):
+        return LengthEnsembleState(self, direction)
+
     def _str(self):
         if type(self.length) is int:
             return 'len(x) = {0}'.format(self.length)
@@ -2267,10 +2793,8 @@ class AllInXEnsemble(VolumeEnsemble):
             # logger.debug("Trajectory " + repr(trajectory))
             # This can sometimes get a list instead of a Trajectory
             # Make sure this is a proxy list
-            for frame in _get_list_traj(trajectory):
-                if not self._volume(frame):
-                    return False
-            return True
+            frames = _get_list_traj(trajectory)
+            return not _test_frames_in_volume(self._volume, frames, False)
 
     def check_reverse(self, trajectory, trusted=False):
         # order in this one only matters if it is trusted
@@ -2283,6 +2807,9 @@ class AllInXEnsemble(VolumeEnsemble):
             # print "Rev UnTrusted"
             return self(trajectory)  # in this case, order wouldn't matter
 
+    def incremental_state(self, direction=+1):
+        return AllInXEnsembleState(self, direction)
+
     def __invert__(self):
         return PartOutXEnsemble(self.volume, self.trusted)
 
@@ -2326,10 +2853,11 @@ class PartInXEnsemble(VolumeEnsemble):
         trajectory : :class:`openpathsampling.trajectory.Trajectory`
             The trajectory to be checked
         """
-        for frame in _get_list_traj(trajectory):
-            if self._volume(frame):
-                return True
-        return False
+        frames = _get_list_traj(trajectory)
+        return _test_frames_in_volume(self._volume, frames, True)
+
+    def incremental_state(self, direction=+1):
+        return PartInXEnsembleState(self, direction)
 
     def __invert__(self):
         return AllOutXEnsemble(self.volume, self.trusted)
@@ -2355,10 +2883,8 @@ class PartOutXEnsemble(PartInXEnsemble):
 
     def __call__(self, trajectory, trusted=None, candidate=False):
         # Don't load proxies if this is a Trajectory
-        for frame in _get_list_traj(trajectory):
-            if self._volume(frame):
-                return True
-        return False
+        frames = _get_list_traj(trajectory)
+        return _test_frames_in_volume(self._volume, frames, True)
 
 
 class WrappedEnsemble(Ensemble):
@@ -2406,6 +2932,12 @@ class WrappedEnsemble(Ensemble):
         return self._new_ensemble.strict_can_prepend(self._alter(trajectory),
                                                      trusted)
 
+    def incremental_state(self, direction=+1):
+        if type(self)._alter is not WrappedEnsemble._alter:
+            # no general way to follow the altered trajectory
+            return super(WrappedEnsemble, self).incremental_state(direction)
+        return self._new_ensemble.incremental_state(direction)
+
     def _str(self):
         return str(self._new_ensemble)
 
@@ -2479,6 +3011,15 @@ class SuffixTrajectoryEnsemble(WrappedEnsemble):
     def can_append(self, trajectory, trusted=None):
         raise RuntimeError("SuffixTrajectoryEnsemble.can_append is nonsense.")
 
+    def incremental_condition(self, function_name, direction):
+        # backward shooting: the engine grows the (reversed) trajectory
+        # forward, while this checks can_prepend
+        if direction > 0 and function_name == 'can_prepend':
+            return SuffixTrajectoryEnsembleState(self, direction)
+        return super(SuffixTrajectoryEnsemble, self).incremental_condition(
+            function_name, direction
+        )
+
     def strict_can_append(self, trajectory, trusted=None):
         # was overridden in WrappedEnsemble: here should raise same error as
         # can_append does
@@ -2524,6 +3065,15 @@ class PrefixTrajectoryEnsemble(WrappedEnsemble):
     def can_prepend(self, trajectory, trusted=None):
         raise RuntimeError("PrefixTrajectoryEnsemble.can_prepend is nonsense.")
 
+    def incremental_state(self, direction=+1):
+        if direction < 0:
+            return super(PrefixTrajectoryEnsemble, self).incremental_state(
+                direction
+            )
+        state = self._new_ensemble.incremental_state(direction)
+        state.add_frames(_get_list_traj(self.add_trajectory))
+        return state
+
     def strict_can_prepend(self, trajectory, trusted=None):
         # was overridden in WrappedEnsemble: here should raise same error as
         # can_append does
@@ -2922,11 +3472,29 @@ class TISEnsemble(WrappedEnsemble):
                 & self._final_volumes(trajectory[-1])
                 & (max(self.orderparameter(trajectory)) > self.lambda_i)
             )
+        elif not trusted:
+            logger.debug("Testing all frames with volume arrays")
+            return self._untrusted_call(trajectory)
         else:
             logger.debug("No shortcut possible")
             # it still works fine if we use the slower algorithm
             return super(TISEnsemble, self).__call__(trajectory, trusted)
 
+    def _untrusted_call(self, trajectory):
+        # Equivalent to the sequential ensemble for a full trajectory: the
+        # first frame is in the initial states, the last frame in any
+        # state, no other frame in a state, and some frame outside the
+        # interface. This tests the frames in batches (see Volume.evaluate)
+        frames = _get_list_traj(trajectory)
+        if len(frames) < 2:
+            return False
+        if not (self._initial_volumes(frames[0])
+                and self._final_volumes(frames[-1])):
+            return False
+        if _test_frames_in_volume(self._final_volumes, frames[1:-1], True):
+            return False
+        return _test_frames_in_volume(self.interface, frames, False)
+
     def trajectory_summary(self, trajectory):
         initial_state_i = None
         final_state_i = None
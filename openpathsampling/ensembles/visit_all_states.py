@@ -174,6 +174,10 @@ class VisitAllStatesEnsemble(paths.WrappedEnsemble):
 
     strict_can_append = can_append
 
+    def incremental_state(self, direction=+1):
+        # progress reporting needs the whole trajectory
+        return paths.EnsembleState(self, direction)
+
     def can_prepend(self, trajectory, trusted=False):
         raise NotImplementedError("prepend methods not implemented for ",
                                   "VisitAllStateEnsemble")
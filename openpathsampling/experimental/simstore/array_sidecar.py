@@ -0,0 +1,103 @@
+"""
+Append-only binary files for the fixed-shape array columns of a table.
+"""
+import os
+import numpy as np
+
+from .my_types import parse_ndarray_type
+
+
+def sidecar_dtype(entries):
+    """Record dtype for the fixed-shape array attributes of a table.
+
+    Parameters
+    ----------
+    entries : List[Tuple[str, str]]
+        the schema entries (attribute name, type name) of the table
+
+    Returns
+    -------
+    :class:`numpy.dtype` or None
+        structured dtype with one field per array attribute, or None if the
+        table has no array attributes
+    """
+    fields = []
+    for attr, type_name in entries:
+        ndarray_info = parse_ndarray_type(type_name)
+        if ndarray_info:
+            dtype, shape = ndarray_info
+            fields.append((attr, dtype, shape))
+
+    if not fields:
+        return None
+    return np.dtype(fields)
+
+
+class ArraySidecar(object):
+    """Append-only file of array records, read by memory-mapping.
+
+    Each record holds the values of all array attributes of one table row.
+    Records are only ever appended, so the record number (the offset of the
+    record, in units of records) stays valid for the lifetime of the file.
+    Records that were written but never referenced by a row (e.g., because
+    the database transaction was rolled back) are simply never read.
+
+    Parameters
+    ----------
+    filename : str
+        path of the sidecar file
+    dtype : :class:`numpy.dtype`
+        structured record dtype, see :func:`.sidecar_dtype`
+    mode : 'r', 'w', or 'a'
+        file mode; 'w' truncates an existing file
+    """
+    def __init__(self, filename, dtype, mode='r'):
+        self.filename = filename
+        self.dtype = dtype
+        self.mode = mode
+        if mode == 'w' or not os.path.exists(filename):
+            if mode == 'r':
+                raise FileNotFoundError(
+                    f"No such file or directory: '{filename}'")
+            open(filename, 'wb').close()
+
+        self._memmap = None
+
+    def __len__(self):
+        return os.path.getsize(self.filename) // self.dtype.itemsize
+
+    @property
+    def memmap(self):
+        """:class:`numpy.memmap` : read-only view of all records"""
+        n_records = len(self)
+        if self._memmap is None or len(self._memmap) != n_records:
+            if n_records == 0:
+                # numpy can't memory-map an empty file
+                return np.empty(0, dtype=self.dtype)
+            self._memmap = np.memmap(self.filename, dtype=self.dtype,
+                                     mode='r', shape=(n_records,))
+        return self._memmap
+
+    def append(self, records):
+        """Append records to the file.
+
+        Parameters
+        ----------
+        records : :class:`numpy.ndarray`
+            array of records (with the dtype of this sidecar)
+
+        Returns
+        -------
+        int :
+            offset of the first appended record
+        """
+        if self.mode == 'r':
+            raise IOError("Sidecar file opened in read-only mode")
+        records = np.ascontiguousarray(records, dtype=self.dtype)
+        with open(self.filename, 'ab') as f:
+            offset = f.tell() // self.dtype.itemsize
+            f.write(records.tobytes())
+        return offset
+
+    def __getitem__(self, offsets):
+        return self.memmap[offsets]
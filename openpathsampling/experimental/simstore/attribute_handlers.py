@@ -139,6 +139,10 @@ class NDArrayHandler(AttributeHandler):
         return obj.astype(dtype=self.dtype, copy=False).tobytes()
 
     def deserialize(self, data, caches=None):
+        if isinstance(data, np.ndarray):
+            # already an array, e.g., read from a sidecar file
+            return data.astype(dtype=self.dtype, copy=False)\
+                    .reshape(self.shape)
         return np.frombuffer(data, dtype=self.dtype).reshape(self.shape)
 
 DEFAULT_HANDLERS = [NDArrayHandler, StandardHandler]
@@ -1,5 +1,6 @@
 import os
 import collections
+import contextlib
 from collections import abc
 
 from .storage import universal_schema
@@ -119,6 +120,11 @@ class MemoryStorageBackend(object):
     def load_storable_function_table(self, table_name):
         return self.data[table_name].copy()
 
+    @contextlib.contextmanager
+    def transaction(self):
+        # nothing to commit: all changes are immediate
+        yield
+
     def add_to_table(self, table_name, objects):
         uuids = [obj['uuid'] for obj in objects]
         # TODO: check for existence (for safety)
@@ -514,3 +514,39 @@ def get_reload_order(to_load, dependencies):
     no_deps.difference_update(set(dag.nodes))
     ordered_uuids = list(no_deps) + dag_reload_order(dag)
     return ordered_uuids
+
+def get_reload_levels(to_load, dependencies):
+    """Group the objects to reload into levels of independent objects.
+
+    Objects in a level only depend on objects in earlier levels (or on
+    objects that are not reloaded, e.g., because they are already cached),
+    so all objects within one level can be reconstructed in any order, or
+    concurrently.
+
+    Parameters
+    ----------
+    to_load : List
+        table rows of the objects to reload
+    dependencies : Dict[str, Set[str]]
+        dependency mapping; maps UUID of an object to the UUIDs it depends
+        on
+
+    Returns
+    -------
+    List[List[str]]
+        UUIDs of the objects to reload, by level
+    """
+    to_reload = {row.uuid for row in to_load}
+    uuid_level = {}
+    levels = []
+    for uuid in get_reload_order(to_load, dependencies):
+        if uuid not in to_reload:
+            continue
+        dep_levels = [uuid_level[dep] for dep in dependencies.get(uuid, [])
+                      if dep in uuid_level]
+        level = max(dep_levels, default=-1) + 1
+        uuid_level[uuid] = level
+        if level == len(levels):
+            levels.append([])
+        levels[level].append(uuid)
+    return levels
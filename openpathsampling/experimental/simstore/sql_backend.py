@@ -1,6 +1,7 @@
 import os
 import warnings
 import collections
+import contextlib
 from collections import abc
 import sqlalchemy as sql
 from .storage import universal_schema
@@ -10,7 +11,9 @@ from . import tools
 import json
 
 from .backend import extract_backend_metadata
-from .my_types import backend_registration_type
+from .my_types import backend_registration_type, parse_ndarray_type
+from .array_sidecar import ArraySidecar, sidecar_dtype
+import numpy as np
 from .serialization_helpers import import_class
 
 import logging
@@ -40,7 +43,11 @@ universal_sql_meta = {
     'sfr_result_types': {'uuid': {'primary_key': True}},
 }
 
-def make_columns(table_name, schema, sql_schema_metadata, backend_types):
+# column holding the record number in the sidecar file (columnar mode)
+SIDECAR_COLUMN = 'sidecar_idx'
+
+def make_columns(table_name, schema, sql_schema_metadata, backend_types,
+                 columnar=False):
     columns = []
     type_mapping = {k: v[0] for k, v in backend_types.items()}
     # TODO: use size_info for fixed-width columns
@@ -49,11 +56,17 @@ def make_columns(table_name, schema, sql_schema_metadata, backend_types):
         columns.append(sql.Column('idx', sql.Integer,
                                   primary_key=True))
         columns.append(sql.Column('uuid', sql.String, index=True))
+    in_sidecar = False
     for col, type_name in schema[table_name]:
+        if columnar and parse_ndarray_type(type_name):
+            in_sidecar = True
+            continue
         col_type = sql_type[type_mapping[type_name]]
         metadata = extract_backend_metadata(sql_schema_metadata,
                                             table_name, col)
         columns.append(sql.Column(col, col_type, **metadata))
+    if in_sidecar:
+        columns.append(sql.Column(SIDECAR_COLUMN, sql.Integer))
     return columns
 
 
@@ -92,6 +105,13 @@ class SQLStorageBackend(StorableNamedObject):
         databases, but keeps the interface consistent
     sql_dialect : str
         name of the SQL dialect to use; default is sqlite
+    columnar : bool
+        if True, fixed-shape ndarray attributes are not stored in the
+        database, but in an append-only binary sidecar file per table
+        (``<filename>.<table>.bin``), and the table row only holds the
+        record number in that file. Arrays can then be read for many rows at
+        once with :meth:`.ndarray_column`. Only used when creating a new
+        database; existing databases keep the mode they were created with.
 
     Additional keyword arguments are passed to sqlalchemy.create_engine. Of
     particular use is ``echo`` (bool) which echos SQL commands to stdout
@@ -100,14 +120,20 @@ class SQLStorageBackend(StorableNamedObject):
     More info: https://docs.sqlalchemy.org/en/latest/core/engines.html
     """
     MAX_SQL_ITEMS = 900
-    def __init__(self, filename, mode='r', sql_dialect='sqlite', **kwargs):
+    def __init__(self, filename, mode='r', sql_dialect='sqlite',
+                 columnar=False, **kwargs):
         super().__init__()
         self.filename = filename
         self.sql_dialect = sql_dialect
         self.mode = mode
+        self.columnar = columnar
         self.kwargs = kwargs
         self.debug = False
 
+        # maps table name to the ArraySidecar of that table (columnar mode)
+        self.sidecars = {}
+        self._row_types = {}
+
         # maps a specific type name, to generic type info, e.g.
         # 'ndarray.float32(1651,3)': 'ndarray'
         # keys here are in the schema, values are (sql_type, size)
@@ -127,6 +153,9 @@ class SQLStorageBackend(StorableNamedObject):
         # TODO: change this to an LRU cache
         self.known_uuids = collections.defaultdict(set)
 
+        # connection of the active transaction, see transaction()
+        self._connection = None
+
         # we prevent writes by disallowing write method in read mode;
         # for everything else; just connect to the database
         self.engine = None
@@ -204,6 +233,13 @@ class SQLStorageBackend(StorableNamedObject):
                                        sql.Column('value', sql.String))
 
             self.metadata.create_all(self.engine)
+            if self.columnar:
+                if self.filename in [None, ':memory:']:
+                    raise ValueError("Columnar mode requires a database "
+                                     "file for the sidecar files")
+                with self.engine.begin() as conn:
+                    conn.execute(metadata_table.insert(),
+                                 {'key': 'columnar', 'value': 'true'})
             self.register_schema(universal_schema, universal_sql_meta)
             uuid_table = self.metadata.tables['uuid']
             index = sql.Index('uuids_index', *uuid_table.c, unique=True)
@@ -215,6 +251,11 @@ class SQLStorageBackend(StorableNamedObject):
             self.table_to_number, self.number_to_table = \
                     self.internal_tables_from_db()
 
+            self.columnar = self._load_columnar()
+            if self.columnar:
+                for table_name in self.table_to_number:
+                    self._add_sidecar(table_name, self.schema[table_name])
+
             self.sfr_result_types.update(self._load_sfr_types())
 
     def _load_sfr_types(self):
@@ -230,6 +271,75 @@ class SQLStorageBackend(StorableNamedObject):
 
         return sfr_types
 
+    def _load_columnar(self):
+        metadata_table = self.metadata.tables['metadata']
+        sel = metadata_table.select().where(metadata_table.c.key
+                                            == 'columnar')
+        with self.engine.connect() as conn:
+            rows = list(conn.execute(sel))
+        return any(row.value == 'true' for row in rows)
+
+    def _sidecar_filename(self, table_name):
+        return "{}.{}.bin".format(self.filename, table_name)
+
+    def _add_sidecar(self, table_name, entries, mode=None):
+        dtype = sidecar_dtype(entries)
+        if dtype is not None:
+            mode = tools.none_to_default(mode, self.mode)
+            self.sidecars[table_name] = ArraySidecar(
+                self._sidecar_filename(table_name),
+                dtype=dtype,
+                mode=mode
+            )
+
+    def _sidecar_to_rows(self, table_name, rows):
+        # replace the sidecar record number by the array values
+        sidecar = self.sidecars.get(table_name, None)
+        if sidecar is None or not rows:
+            return rows
+
+        offsets = [getattr(row, SIDECAR_COLUMN) for row in rows]
+        records = sidecar[offsets]
+        arrays = {name: np.ascontiguousarray(records[name])
+                  for name in sidecar.dtype.names}
+
+        row_type = self._row_types.get(table_name, None)
+        if row_type is None:
+            fields = [f for f in rows[0]._fields if f != SIDECAR_COLUMN]
+            row_type = collections.namedtuple(
+                'Row', fields + list(sidecar.dtype.names)
+            )
+            self._row_types[table_name] = row_type
+
+        results = []
+        for num, row in enumerate(rows):
+            values = dict(row._mapping)
+            del values[SIDECAR_COLUMN]
+            values.update({name: arr[num] for name, arr in arrays.items()})
+            results.append(row_type(**values))
+        return results
+
+    def _rows_to_sidecar(self, table_name, rows):
+        # write arrays to the sidecar; rows keep the record number
+        sidecar = self.sidecars.get(table_name, None)
+        if sidecar is None:
+            return rows
+
+        records = np.empty(len(rows), dtype=sidecar.dtype)
+        for name in sidecar.dtype.names:
+            dtype, shape = sidecar.dtype.fields[name][0].subdtype
+            records[name] = [np.frombuffer(row[name], dtype=dtype)
+                             .reshape(shape) for row in rows]
+
+        first = sidecar.append(records)
+        new_rows = []
+        for num, row in enumerate(rows):
+            row = {k: v for k, v in row.items()
+                   if k not in sidecar.dtype.names}
+            row[SIDECAR_COLUMN] = first + num
+            new_rows.append(row)
+        return new_rows
+
     @classmethod
     def from_engine(cls, engine, connection_uri=None, **kwargs):
         """Constructor allowing user to specify the SQLAlchemy Engine.
@@ -254,6 +364,31 @@ class SQLStorageBackend(StorableNamedObject):
         # is this necessary?
         self.engine.dispose()
 
+    @contextlib.contextmanager
+    def transaction(self):
+        """Context in which all writes happen in a single transaction.
+
+        Writes with :meth:`.add_to_table` within this context use the same
+        connection, and are committed together when the context ends (or
+        rolled back on an error). Nested contexts join the outer
+        transaction.
+        """
+        if self._connection is not None:
+            yield self._connection
+            return
+
+        with self.engine.begin() as conn:
+            if conn.dialect.name == 'sqlite':
+                # pysqlite only starts the transaction at the first write;
+                # take the write lock now, so that no other writer can add
+                # rows after we read the last row index in add_to_table
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+            self._connection = conn
+            try:
+                yield conn
+            finally:
+                self._connection = None
+
     @property
     def metadata(self):
         return self._metadata
@@ -318,11 +453,10 @@ class SQLStorageBackend(StorableNamedObject):
         results = []
         with self.engine.connect() as conn:
             for block in grouper(idx_list, self.MAX_SQL_ITEMS):
-                or_stmt = sql.or_(*(table.c.idx == idx for idx in block))
-                sel = table.select().where(or_stmt)
+                sel = table.select().where(table.c.idx.in_(block))
                 results.extend(list(conn.execute(sel)))
 
-        return results
+        return self._sidecar_to_rows(table_name, results)
 
     ### FROM HERE IS THE GENERIC PUBLIC API
     def register_type(self, type_str, backend_type):
@@ -342,7 +476,7 @@ class SQLStorageBackend(StorableNamedObject):
         for table_name in schema:
             logger.info("Add schema table " + str(table_name))
             columns = make_columns(table_name, schema, sql_schema_metadata,
-                                   self.known_types)
+                                   self.known_types, self.columnar)
             try:
                 table = sql.Table(table_name, self.metadata, *columns)
             except sql.exc.InvalidRequestError:
@@ -353,6 +487,9 @@ class SQLStorageBackend(StorableNamedObject):
                 self._add_table_to_tables_list(table_name,
                                                schema[table_name],
                                                table_to_class[table_name])
+                if self.columnar:
+                    self._add_sidecar(table_name, schema[table_name],
+                                      mode='w')
 
         self.metadata.create_all(self.engine)
         self.schema.update(schema)
@@ -495,33 +632,27 @@ class SQLStorageBackend(StorableNamedObject):
         objects : list of dict
             dict representation of the objects to be added
         """
+        if not objects:
+            return
+
         # this will insert objects into the table
         table = self.metadata.tables[table_name]
         table_num = self.table_to_number[table_name]
-
-        # this is if we don't use the UUID in the schema... but doing so
-        # would be another option (redundant data, but better sanity checks)
-
-        with self.engine.begin() as conn:
-            conn.execute(table.insert(), objects)
-
-        res = []
-        uuids = [obj['uuid'] for obj in objects]
-        for uuid_block in tools.block(uuids, self.MAX_SQL_ITEMS):
-            sel_uuids_idx = sql.select(table.c.uuid, table.c.idx).\
-                    where(table.c.uuid.in_(uuid_block))
-            with self.engine.begin() as conn:
-                res += list(conn.execute(sel_uuids_idx))
-
-        uuid_to_rows = {r[0]: r[1] for r in res}
-
-
         uuid_table = self.metadata.tables['uuid']
-        uuid_insert_dicts = [{'uuid': k, 'table': table_num, 'row':v}
-                             for (k, v) in uuid_to_rows.items()]
 
-        with self.engine.begin() as conn:
+        with self.transaction() as conn:
+            # we assign the row indices ourselves, so we don't need to
+            # select the new rows again to learn their indices
+            max_idx = sql.select(sql.func.max(table.c.idx))
+            last_idx = conn.execute(max_idx).scalar() or 0
+            rows = [dict(obj, idx=last_idx + num)
+                    for num, obj in enumerate(objects, start=1)]
+            rows = self._rows_to_sidecar(table_name, rows)
+            uuid_insert_dicts = [{'uuid': row['uuid'], 'table': table_num,
+                                  'row': row['idx']}
+                                 for row in rows]
             # here we use executemany for performance
+            conn.execute(table.insert(), rows)
             conn.execute(uuid_table.insert(), uuid_insert_dicts)
 
     def load_n_rows_from_table(self, table_name, first_row, n_rows):
@@ -626,6 +757,9 @@ class SQLStorageBackend(StorableNamedObject):
             results = conn.execute(table.select())
             representative = results.fetchone()
             results.close()
+        if representative is not None:
+            representative = self._sidecar_to_rows(table_name,
+                                                   [representative])[0]
         return representative
 
     @property
@@ -653,7 +787,7 @@ class SQLStorageBackend(StorableNamedObject):
         table = self.metadata.tables[table_name]
         with self.engine.connect() as conn:
             results = list(conn.execute(table.select()))
-        for row in results:
+        for row in self._sidecar_to_rows(table_name, results):
             yield row
 
     def table_len(self, table_name):
@@ -677,8 +811,62 @@ class SQLStorageBackend(StorableNamedObject):
         item_sel = table.select().where(table.c.idx == item + 1)
         with self.engine.connect() as conn:
             results = list(conn.execute(item_sel))
+        results = self._sidecar_to_rows(table_name, results)
 
         if self.debug:
             assert len(results) == 1
 
         return results[0]
+
+    def ndarray_column(self, table_name, column, rows=None):
+        """Array values of one attribute for many rows of a table.
+
+        Only available in columnar mode. The values are read from the
+        memory-mapped sidecar file with a single (fancy) index; if the
+        requested rows are stored contiguously, the result is a view of the
+        memory-mapped file, so that large data sets can be processed
+        without reading all of it into memory.
+
+        Parameters
+        ----------
+        table_name : str
+            name of the table
+        column : str
+            name of the ndarray attribute
+        rows : List[int] or None
+            row indices (as in the ``row`` of the UUID table); default None
+            gives all rows of the table, in order
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            array with the values for the rows stacked along the first axis
+        """
+        try:
+            sidecar = self.sidecars[table_name]
+        except KeyError:
+            raise KeyError("No columnar array data for table '{}'".format(
+                table_name))
+
+        table = self.metadata.tables[table_name]
+        offset_col = table.c[SIDECAR_COLUMN]
+        with self.engine.connect() as conn:
+            if rows is None:
+                sel = sql.select(offset_col).order_by(table.c.idx)
+                offsets = [r[0] for r in conn.execute(sel)]
+            else:
+                found = {}
+                for block in tools.block(list(rows), self.MAX_SQL_ITEMS):
+                    sel = sql.select(table.c.idx, offset_col).\
+                            where(table.c.idx.in_(block))
+                    found.update({r[0]: r[1] for r in conn.execute(sel)})
+                offsets = [found[row] for row in rows]
+
+        offsets = np.asarray(offsets, dtype=int)
+        values = sidecar.memmap[column]
+        n_offsets = len(offsets)
+        if n_offsets > 0 and np.array_equal(
+            offsets, np.arange(offsets[0], offsets[0] + n_offsets)
+        ):
+            return values[offsets[0]:offsets[0] + n_offsets]
+        return values[offsets]
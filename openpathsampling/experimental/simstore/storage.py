@@ -20,11 +20,13 @@ import logging
 import collections
 from collections import abc
 import itertools
+import time
+from concurrent import futures
 
 from . import tools
 from .serialization_helpers import get_uuid, get_all_uuids
 from .serialization_helpers import get_all_uuids_loading
-from .serialization_helpers import get_reload_order
+from .serialization_helpers import get_reload_order, get_reload_levels
 # from .serialization import Serialization
 from .proxy import ProxyObjectFactory, GenericLazyLoader
 from .storable_functions import StorageFunctionHandler, StorableFunction
@@ -48,9 +50,27 @@ universal_schema = {
 }
 
 
-from openpathsampling.netcdfplus import StorableNamedObject
+from openpathsampling.netcdfplus import StorableNamedObject, LRUCache
 class GeneralStorage(StorableNamedObject):
+    """Storage for simulation objects.
+
+    Attributes
+    ----------
+    load_workers : int
+        number of threads used to reconstruct objects in :meth:`.load`.
+        Objects that don't depend on each other (the same level of the
+        dependency graph) are reconstructed concurrently. Since
+        reconstruction is mostly Python code, this only helps if the
+        deserializers release the GIL (e.g., large arrays); default 1.
+    load_times : collections.Counter
+        total time (in seconds) spent reconstructing objects, per table
+    load_counts : collections.Counter
+        number of objects reconstructed, per table
+    """
     _known_storages = {}
+    load_workers = 1
+    # number of UUIDs remembered as saved, see filter_existing_uuids
+    known_uuids_size = 100000
     def __init__(self, backend, class_info, schema=None,
                  simulation_classes=None, fallbacks=None, safemode=False):
         super().__init__()
@@ -64,6 +84,11 @@ class GeneralStorage(StorableNamedObject):
         self.type_identification = STANDARD_TYPING  # TODO: copy
         # TODO: implement fallback
         self.fallbacks = tools.none_to_default(fallbacks, [])
+        # UUIDs known to be saved in the backend (older ones are forgotten
+        # and looked up in the backend again)
+        self._known_uuids = LRUCache(self.known_uuids_size)
+        self.load_times = collections.Counter()
+        self.load_counts = collections.Counter()
 
         self.simulation_classes = tools.none_to_default(simulation_classes,
                                                         {})
@@ -194,11 +219,6 @@ class GeneralStorage(StorableNamedObject):
                 lookup_examples |= {lookup}
 
     def filter_existing_uuids(self, uuid_dict):
-        existing = self.backend.load_uuids_table(
-            uuids=list(uuid_dict.keys()),
-            ignore_missing=True
-        )
-
         # "special" here indicates that we always try to re-save these, even
         # if they've already been saved once. This is (currently) necessary
         # for objects that contain mutable components (such as the way
@@ -206,8 +226,23 @@ class GeneralStorage(StorableNamedObject):
         # TODO: make `special` customizable
         special = set(self._sf_handler.canonical_functions.keys())
 
+        # UUIDs we already know to be in the database are not looked up
+        known = self._known_uuids
+        unknown = []
+        for uuid in list(uuid_dict.keys()):
+            if uuid not in known:
+                unknown.append(uuid)
+            elif uuid not in special:
+                del uuid_dict[uuid]
+
+        existing = self.backend.load_uuids_table(
+            uuids=unknown,
+            ignore_missing=True
+        )
+
         for uuid_row in existing:
             uuid = uuid_row.uuid
+            known[uuid] = True
             if uuid not in special:
                 del uuid_dict[uuid_row.uuid]
 
@@ -303,21 +338,28 @@ class GeneralStorage(StorableNamedObject):
 
         # TODO: add simulation objects to the cache
 
-        # this is the actual serialization
+        # this is the actual serialization; all tables are written in one
+        # transaction
         logger.debug("Filling %d tables: %s", len(by_table),
                      str(list(by_table.keys())))
-        for table in by_table:
-            logger.debug("Storing %d objects to table %s",
-                         len(by_table[table]), table)
-            serialize = self.class_info[table].serializer
-            storables_list = [serialize(o) for o in by_table[table].values()]
-            self.backend.add_to_table(table, storables_list)
+        with self.backend.transaction():
+            for table in by_table:
+                logger.debug("Storing %d objects to table %s",
+                             len(by_table[table]), table)
+                serialize = self.class_info[table].serializer
+                storables_list = [serialize(o)
+                                  for o in by_table[table].values()]
+                self.backend.add_to_table(table, storables_list)
+                logger.debug("Storing complete")
+
+        for table, uuid_dict in by_table.items():
+            for uuid in uuid_dict:
+                self._known_uuids[uuid] = True
             # special handling for simulation objects
             if table == 'simulation_objects':
-                self._update_pseudo_tables(by_table[table])
-                self._simulation_objects.update(by_table[table])
+                self._update_pseudo_tables(uuid_dict)
+                self._simulation_objects.update(uuid_dict)
                 self._reset_fixed_cache()
-            logger.debug("Storing complete")
 
     def save_function_results(self, funcs=None):
         # TODO: move this to sf_handler; where the equivalent load happens
@@ -381,14 +423,16 @@ class GeneralStorage(StorableNamedObject):
         uuid_list = [uuid for uuid in input_uuids if uuid not in self.cache]
         logger.debug("Getting internal structure of %d non-cached objects",
                      len(uuid_list))
+        start = time.perf_counter()
         to_load, lazy_uuids, dependencies, uuid_to_table = \
                 get_all_uuids_loading(uuid_list=uuid_list,
                                       backend=self.backend,
                                       schema=self.schema,
                                       existing_uuids=self.cache,
                                       allow_lazy=allow_lazy)
-        logger.debug("Loading %d objects; creating %d lazy proxies",
-                     len(to_load), len(lazy_uuids))
+        logger.debug("Loading %d objects; creating %d lazy proxies "
+                     "(%.3f s to load table rows)", len(to_load),
+                     len(lazy_uuids), time.perf_counter() - start)
 
         # to_load : List (table rows from backend)
         # lazy : Set[str] (lazy obj UUIDs)
@@ -405,9 +449,9 @@ class GeneralStorage(StorableNamedObject):
 
         # get order and deserialize
         uuid_to_table_row = {r.uuid: r for r in to_load}
-        ordered_uuids = get_reload_order(to_load, dependencies)
-        new_uuids = self.deserialize_uuids(ordered_uuids, uuid_to_table,
-                                           uuid_to_table_row, new_uuids)
+        levels = get_reload_levels(to_load, dependencies)
+        new_uuids = self.deserialize_levels(levels, uuid_to_table,
+                                            uuid_to_table_row, new_uuids)
 
         self.cache.update(new_uuids)
         results.update(new_uuids)
@@ -420,21 +464,113 @@ class GeneralStorage(StorableNamedObject):
 
         return new_results
 
+    def _deserialize_rows(self, uuids, uuid_to_table, uuid_to_table_row,
+                          cache_list):
+        # reconstruct objects in the given order; returns the objects and
+        # the time spent per table
+        objects = {}
+        times = collections.Counter()
+        counts = collections.Counter()
+        cache_list = [objects] + cache_list
+        for uuid in uuids:
+            # is_in = [k for (k, v) in dependencies.items() if v==uuid]
+            start = time.perf_counter()
+            table = uuid_to_table[uuid]
+            table_row = uuid_to_table_row[uuid]
+            table_dict = {attr: getattr(table_row, attr)
+                          for (attr, type_name) in self.schema[table]}
+            deserialize = self.class_info[table].deserializer
+            objects[uuid] = deserialize(uuid, table_dict, cache_list)
+            times[table] += time.perf_counter() - start
+            counts[table] += 1
+        return objects, times, counts
+
+    def _record_load_times(self, times, counts):
+        self.load_times.update(times)
+        self.load_counts.update(counts)
+
     def deserialize_uuids(self, ordered_uuids, uuid_to_table,
                           uuid_to_table_row, new_uuids=None):
         # TODO: remove this, replace with SerializationSchema
         logger.debug("Reconstructing from %d objects", len(ordered_uuids))
         new_uuids = tools.none_to_default(new_uuids, {})
-        for uuid in ordered_uuids:
-            if uuid not in self.cache and uuid not in new_uuids:
-                # is_in = [k for (k, v) in dependencies.items() if v==uuid]
-                table = uuid_to_table[uuid]
-                table_row = uuid_to_table_row[uuid]
-                table_dict = {attr: getattr(table_row, attr)
-                              for (attr, type_name) in self.schema[table]}
-                deserialize = self.class_info[table].deserializer
-                obj = deserialize(uuid, table_dict, [new_uuids, self.cache])
-                new_uuids[uuid] = obj
+        uuids = [uuid for uuid in ordered_uuids
+                 if uuid not in self.cache and uuid not in new_uuids]
+        objects, times, counts = self._deserialize_rows(
+            uuids, uuid_to_table, uuid_to_table_row, [new_uuids, self.cache]
+        )
+        new_uuids.update(objects)
+        self._record_load_times(times, counts)
+        return new_uuids
+
+    def deserialize_levels(self, levels, uuid_to_table, uuid_to_table_row,
+                           new_uuids=None):
+        """Reconstruct objects, level by level of the dependency graph.
+
+        The objects within a level are split over :attr:`.load_workers`
+        threads.
+
+        Parameters
+        ----------
+        levels : List[List[str]]
+            UUIDs of the objects to reconstruct, grouped in levels as
+            from :func:`.get_reload_levels`
+        uuid_to_table : Dict[str, str]
+            mapping of UUID to the name of its table
+        uuid_to_table_row : Dict[str, Any]
+            mapping of UUID to its table row
+        new_uuids : Dict[str, Any]
+            objects that are already reconstructed (e.g., lazy proxies);
+            reconstructed objects are added to this
+
+        Returns
+        -------
+        Dict[str, Any]
+            mapping of UUID to object, for all reconstructed objects
+        """
+        new_uuids = tools.none_to_default(new_uuids, {})
+        n_objects = sum(len(level) for level in levels)
+        logger.debug("Reconstructing %d objects in %d levels", n_objects,
+                     len(levels))
+        n_workers = max(self.load_workers, 1)
+        executor = None
+        if n_workers > 1:
+            executor = futures.ThreadPoolExecutor(max_workers=n_workers)
+
+        try:
+            for level in levels:
+                uuids = [uuid for uuid in level
+                         if uuid not in self.cache and uuid not in new_uuids]
+                n_chunk = -(-len(uuids) // n_workers)  # ceiling division
+                if executor is None or n_chunk < 2:
+                    chunks = [uuids]
+                else:
+                    chunks = [chunk for chunk in tools.block(uuids, n_chunk)
+                              if chunk]
+
+                # the caches are not changed while a level is reconstructed
+                cache_list = [new_uuids, self.cache]
+                if len(chunks) == 1:
+                    results = [self._deserialize_rows(
+                        chunks[0], uuid_to_table, uuid_to_table_row,
+                        cache_list
+                    )]
+                else:
+                    results = list(executor.map(
+                        lambda chunk: self._deserialize_rows(
+                            chunk, uuid_to_table, uuid_to_table_row,
+                            cache_list
+                        ),
+                        chunks
+                    ))
+
+                for objects, times, counts in results:
+                    new_uuids.update(objects)
+                    self._record_load_times(times, counts)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
         return new_uuids
 
     def sync(self):
@@ -0,0 +1,44 @@
+import pytest
+import numpy as np
+
+from .array_sidecar import *
+
+
+def test_sidecar_dtype():
+    entries = [('coordinates', 'ndarray.float32(4,3)'), ('index', 'int'),
+               ('box_vectors', 'ndarray.float64(3,3)')]
+    dtype = sidecar_dtype(entries)
+    assert dtype.names == ('coordinates', 'box_vectors')
+    assert dtype['coordinates'].subdtype == (np.dtype(np.float32), (4, 3))
+    assert dtype['box_vectors'].subdtype == (np.dtype(np.float64), (3, 3))
+    assert sidecar_dtype([('index', 'int')]) is None
+
+
+class TestArraySidecar(object):
+    def setup_method(self):
+        self.dtype = sidecar_dtype([('xyz', 'ndarray.float32(2,3)')])
+
+    def _records(self, values):
+        records = np.empty(len(values), dtype=self.dtype)
+        records['xyz'] = [np.full((2, 3), v) for v in values]
+        return records
+
+    def test_append_and_read(self, tmpdir):
+        filename = str(tmpdir.join("table.bin"))
+        sidecar = ArraySidecar(filename, self.dtype, mode='w')
+        assert len(sidecar) == 0
+        assert len(sidecar.memmap) == 0
+        assert sidecar.append(self._records([0, 1])) == 0
+        assert sidecar.append(self._records([2])) == 2
+        assert len(sidecar) == 3
+        np.testing.assert_array_equal(sidecar[[2, 0]]['xyz'][:, 0, 0],
+                                      [2, 0])
+
+        reopened = ArraySidecar(filename, self.dtype, mode='r')
+        assert len(reopened) == 3
+        with pytest.raises(IOError):
+            reopened.append(self._records([3]))
+
+    def test_missing_file(self, tmpdir):
+        with pytest.raises(FileNotFoundError):
+            ArraySidecar(str(tmpdir.join("missing.bin")), self.dtype)
@@ -48,3 +48,10 @@ class TestNDArrayHandler(object):
         np.testing.assert_equal(deser, self.data)
         reser = self.ndarray_handler.serialize(deser)
         assert ser == reser
+
+    def test_deserialize_array(self):
+        # arrays read from sidecar files are not serialized to bytes
+        data = self.data.astype(np.float32)
+        deser = self.ndarray_handler.deserialize(data)
+        assert deser.dtype == np.float32
+        np.testing.assert_equal(deser, self.data)
@@ -247,3 +247,14 @@ def test_dependency_dag_with_initial_dag():
 def test_get_reload_order():
     # check order, including no-dep orders
     pytest.skip()
+
+def test_get_reload_levels():
+    Row = namedtuple('Row', ['uuid'])
+    # a depends on b and c; b depends on c; d depends on the cached x
+    to_load = [Row(uuid) for uuid in ['a', 'b', 'c', 'd', 'e']]
+    dependencies = {'a': {'b', 'c'}, 'b': {'c'}, 'c': set(), 'd': {'x'},
+                    'e': set()}
+    levels = get_reload_levels(to_load, dependencies)
+    assert len(levels) == 3
+    assert set(levels[0]) == {'c', 'd', 'e'}
+    assert levels[1:] == [['b'], ['a']]
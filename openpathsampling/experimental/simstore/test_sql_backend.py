@@ -1,5 +1,8 @@
 from .sql_backend import *
+import glob
+import sqlite3
 import pytest
+import numpy as np
 
 class TestSQLStorageBackend(object):
     def setup_method(self):
@@ -63,6 +66,9 @@ class TestSQLStorageBackend(object):
         for f in tmp_files:
             if os.path.isfile(f):
                 os.remove(f)
+            # sidecar files of columnar mode
+            for sidecar in glob.glob(f + ".*.bin"):
+                os.remove(sidecar)
 
     @pytest.mark.parametrize('test_input,expected', [
         (("file.sql", "sqlite"), "sqlite:///file.sql"),
@@ -170,6 +176,182 @@ class TestSQLStorageBackend(object):
         for dct in returned_sample_dict:
             assert dct in sample_dict
 
+    def test_add_to_table_appends_rows(self):
+        sample_dict = self._add_sample_data()
+        snap_dicts = [{'filename': 'file.trr', 'index': idx,
+                       'uuid': 'snap' + str(idx)} for idx in range(4)]
+        snapshot_schema = {'snapshot0': self.schema['snapshot0']}
+        self.database.register_schema(snapshot_schema, self.table_to_class)
+        self.database.add_to_table('snapshot0', snap_dicts[:2])
+        self.database.add_to_table('snapshot0', snap_dicts[2:])
+        self.database.add_to_table('snapshot0', [])
+        assert self.database.table_len('snapshot0') == 4
+        for num, snap in enumerate(snap_dicts):
+            row = self.database.table_get_item('snapshot0', num)
+            assert row.uuid == snap['uuid']
+            assert row.index == snap['index']
+
+        uuid_rows = self.database.load_uuids_table(
+            [s['uuid'] for s in sample_dict + snap_dicts]
+        )
+        assert sorted((r.table, r.row) for r in uuid_rows) == \
+            [(0, 1), (0, 2), (0, 3), (1, 1), (1, 2), (1, 3), (1, 4)]
+
+    def test_transaction_rollback(self):
+        schema = {'samples': self.schema['samples']}
+        self.database.register_schema(schema, self.table_to_class)
+        sample_dict = self._sample_data_dict()
+        with pytest.raises(RuntimeError):
+            with self.database.transaction():
+                self.database.add_to_table('samples', sample_dict[:1])
+                with self.database.transaction():
+                    self.database.add_to_table('samples', sample_dict[1:])
+                assert self.database.table_len('samples') == 3
+                raise RuntimeError("failed")
+
+        assert self.database.table_len('samples') == 0
+        assert self.database.load_uuids_table(
+            [s['uuid'] for s in sample_dict]
+        ) == []
+        self.database.add_to_table('samples', sample_dict)
+        assert self.database.table_len('samples') == 3
+
+    def test_transaction_locks_writers(self):
+        database = SQLStorageBackend('test1.sql', mode='w')
+        schema = {'samples': self.schema['samples']}
+        database.register_schema(schema, self.table_to_class)
+        other = sqlite3.connect('test1.sql', timeout=0)
+        with database.transaction():
+            # the lock is held before anything is written
+            with pytest.raises(sqlite3.OperationalError):
+                other.execute("BEGIN IMMEDIATE")
+            database.add_to_table('samples', self._sample_data_dict())
+        other.execute("BEGIN IMMEDIATE")
+        other.rollback()
+        other.close()
+        assert database.table_len('samples') == 3
+        database.close()
+
+    def test_add_to_table_wal(self):
+        database = SQLStorageBackend('test1.sql', mode='w')
+        with database.engine.connect() as conn:
+            mode = conn.exec_driver_sql("PRAGMA journal_mode=WAL").scalar()
+        assert mode == 'wal'
+        schema = {'samples': self.schema['samples']}
+        database.register_schema(schema, self.table_to_class)
+        sample_dict = self._sample_data_dict()
+        database.add_to_table('samples', sample_dict)
+        database.close()
+
+        database = SQLStorageBackend('test1.sql', mode='r')
+        uuid_rows = database.load_uuids_table([s['uuid']
+                                               for s in sample_dict])
+        assert len(database.load_table_data(uuid_rows)) == 3
+        database.close()
+
+    def _columnar_database(self, mode='w'):
+        database = SQLStorageBackend('test1.sql', mode=mode, columnar=True)
+        if mode == 'w':
+            schema = {'snapshot1': [('coordinates', 'ndarray.float32(2,3)'),
+                                    ('index', 'int')]}
+            database.register_type('ndarray.float32(2,3)',
+                                   ('ndarray', None))
+            database.register_schema(schema, self.table_to_class)
+        return database
+
+    @staticmethod
+    def _columnar_data(n_snaps):
+        return [{'coordinates': np.full((2, 3), i, dtype=np.float32),
+                 'index': i, 'uuid': 'snap' + str(i)}
+                for i in range(n_snaps)]
+
+    def _add_columnar_data(self, database, data):
+        database.add_to_table('snapshot1', [
+            dict(d, coordinates=d['coordinates'].tobytes()) for d in data
+        ])
+
+    def test_columnar_requires_file(self):
+        with pytest.raises(ValueError):
+            SQLStorageBackend(":memory:", mode='w', columnar=True)
+
+    def test_columnar_add_and_load(self):
+        database = self._columnar_database()
+        data = self._columnar_data(5)
+        self._add_columnar_data(database, data)
+        assert os.path.isfile('test1.sql.snapshot1.bin')
+        table = database.metadata.tables['snapshot1']
+        assert 'coordinates' not in table.c
+        assert len(database.sidecars['snapshot1']) == 5
+
+        uuid_rows = database.load_uuids_table(['snap1', 'snap3'])
+        loaded = database.load_table_data(uuid_rows)
+        assert {row.uuid for row in loaded} == {'snap1', 'snap3'}
+        for row in loaded:
+            assert row.coordinates.shape == (2, 3)
+            assert np.all(row.coordinates == row.index)
+
+        row = database.table_get_item('snapshot1', 2)
+        np.testing.assert_array_equal(row.coordinates, data[2]['coordinates'])
+        database.close()
+
+    def test_columnar_reopen(self):
+        database = self._columnar_database()
+        data = self._columnar_data(3)
+        self._add_columnar_data(database, data)
+        database.close()
+
+        database = self._columnar_database(mode='a')
+        assert database.columnar
+        more_data = self._columnar_data(5)[3:]
+        self._add_columnar_data(database, more_data)
+        rows = list(database.table_iterator('snapshot1'))
+        assert [row.index for row in rows] == list(range(5))
+        for row, expected in zip(rows, data + more_data):
+            np.testing.assert_array_equal(row.coordinates,
+                                          expected['coordinates'])
+        database.close()
+
+        database = SQLStorageBackend('test1.sql', mode='r')
+        assert database.columnar
+        assert len(list(database.table_iterator('snapshot1'))) == 5
+        database.close()
+
+    def test_ndarray_column(self):
+        database = self._columnar_database()
+        data = self._columnar_data(6)
+        self._add_columnar_data(database, data)
+        expected = np.array([d['coordinates'] for d in data])
+
+        # contiguous rows give a view of the memory-mapped file
+        all_coords = database.ndarray_column('snapshot1', 'coordinates')
+        assert isinstance(all_coords, np.memmap)
+        np.testing.assert_array_equal(all_coords, expected)
+
+        # rows of the UUID table count from 1
+        coords = database.ndarray_column('snapshot1', 'coordinates',
+                                         rows=[5, 2, 3])
+        np.testing.assert_array_equal(coords, expected[[4, 1, 2]])
+        with pytest.raises(KeyError):
+            database.ndarray_column('samples', 'coordinates')
+        database.close()
+
+    def test_columnar_rollback(self):
+        database = self._columnar_database()
+        data = self._columnar_data(4)
+        self._add_columnar_data(database, data[:2])
+        with pytest.raises(RuntimeError):
+            with database.transaction():
+                self._add_columnar_data(database, data[2:3])
+                raise RuntimeError("failed")
+
+        # the orphaned record in the sidecar is never referenced
+        self._add_columnar_data(database, data[3:])
+        coords = database.ndarray_column('snapshot1', 'coordinates')
+        np.testing.assert_array_equal(
+            coords, [data[i]['coordinates'] for i in [0, 1, 3]]
+        )
+        database.close()
+
     def test_load_table_data(self):
         sample_dict = self._add_sample_data()
         uuids = [s['uuid'] for s in sample_dict]
@@ -0,0 +1,125 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from openpathsampling.tests.test_helpers import make_1d_traj
+
+from ..simstore.sql_backend import SQLStorageBackend
+from .ops_storage import Storage
+
+
+class TestStorageSave(object):
+    def setup_method(self):
+        self.traj = make_1d_traj(coordinates=[0.1, 0.2, 0.3],
+                                 velocities=[1.0, 1.0, 1.0])
+
+    def test_known_uuids_not_looked_up(self, tmpdir):
+        filename = str(tmpdir.join("known_uuids.db"))
+        storage = Storage(filename, mode='w')
+        storage.save(self.traj)
+        backend = storage.backend
+        with mock.patch.object(backend, 'load_uuids_table',
+                               wraps=backend.load_uuids_table) as lookup:
+            storage.save(self.traj)
+            storage.save(self.traj[:2])
+
+        looked_up = set()
+        for args, kwargs in lookup.call_args_list:
+            uuids = kwargs['uuids'] if 'uuids' in kwargs else args[0]
+            looked_up.update(uuids)
+        known = [s.__uuid__ for s in self.traj] + [self.traj.__uuid__]
+        assert looked_up.isdisjoint(str(uuid) for uuid in known)
+        # the new (sub)trajectory is saved
+        assert len(storage.trajectories) == 2
+        storage.close()
+
+    def test_reopen(self, tmpdir):
+        filename = str(tmpdir.join("known_uuids.db"))
+        storage = Storage(filename, mode='w')
+        storage.save(self.traj)
+        storage.close()
+
+        Storage._known_storages = {}
+        storage = Storage(filename, mode='a')
+        with mock.patch.object(storage.backend, 'add_to_table') as add:
+            storage.save(self.traj)
+        add.assert_not_called()
+        assert len(storage.trajectories) == 1
+        assert storage.trajectories[0] == self.traj
+        storage.close()
+
+    def test_known_uuids_bounded(self, tmpdir):
+        filename = str(tmpdir.join("known_uuids.db"))
+        storage = Storage(filename, mode='w')
+        storage._known_uuids.size_limit = 2
+        storage.save(self.traj)
+        assert len(storage._known_uuids) == 2
+        # forgotten UUIDs are found in the backend, and not saved again
+        with mock.patch.object(storage.backend, 'add_to_table') as add:
+            storage.save(self.traj)
+        add.assert_not_called()
+        assert len(storage.trajectories) == 1
+        storage.close()
+
+
+class TestColumnarStorage(object):
+    def setup_method(self):
+        self.traj = make_1d_traj(coordinates=[0.1, 0.2, 0.3],
+                                 velocities=[1.0, -1.0, 1.0])
+
+    def test_roundtrip(self, tmpdir):
+        filename = str(tmpdir.join("columnar.db"))
+        backend = SQLStorageBackend(filename, mode='w', columnar=True)
+        storage = Storage.from_backend(backend)
+        storage.save(self.traj)
+        storage.close()
+
+        Storage._known_storages = {}
+        storage = Storage(filename, mode='r')
+        loaded = storage.trajectories[0]
+        assert loaded == self.traj
+        np.testing.assert_allclose(loaded.xyz, self.traj.xyz, rtol=1e-6)
+        np.testing.assert_array_equal(
+            [snap.velocities for snap in loaded],
+            [snap.velocities for snap in self.traj]
+        )
+        # the coordinates of all frames, without loading the snapshots
+        (table,) = storage.backend.sidecars
+        coords = storage.backend.ndarray_column(table, 'coordinates')
+        np.testing.assert_allclose(coords, self.traj.xyz, rtol=1e-6)
+        storage.close()
+
+
+class TestStorageLoad(object):
+    def setup_method(self):
+        self.trajs = [
+            make_1d_traj(coordinates=[0.1 * i, 0.1 * i + 0.05],
+                         velocities=[1.0, -1.0])
+            for i in range(4)
+        ]
+
+    @pytest.mark.parametrize('workers', [1, 3])
+    def test_load(self, tmpdir, workers):
+        filename = str(tmpdir.join("load.db"))
+        storage = Storage(filename, mode='w')
+        storage.save(self.trajs)
+        storage.close()
+
+        Storage._known_storages = {}
+        storage = Storage(filename, mode='r')
+        storage.load_workers = workers
+        loaded = list(storage.trajectories)
+        assert loaded == self.trajs
+        for traj, expected in zip(loaded, self.trajs):
+            np.testing.assert_allclose(traj.xyz, expected.xyz)
+
+        snapshot_tables = [table for table in storage.load_counts
+                           if table.startswith('snapshot')]
+        assert storage.load_counts['trajectories'] == 4
+        assert sum(storage.load_counts[table]
+                   for table in snapshot_tables) == 8
+        assert all(storage.load_times[table] >= 0.0
+                   for table in storage.load_counts)
+        storage.close()
+
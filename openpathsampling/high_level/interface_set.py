@@ -5,6 +5,10 @@ import copy
 
 from functools import partial
 
+import numpy as np
+
+from openpathsampling.integration_tools import is_simtk_quantity
+
 def _cv_max_func(trajectory, cv):
     return max(cv(trajectory))
 
@@ -125,6 +129,49 @@ class InterfaceSet(netcdfplus.StorableNamedObject):
         """
         return self._lambda_dict[volume]
 
+    def frame_interface_index(self, trajectory):
+        """Innermost interface volume that contains each frame.
+
+        Parameters
+        ----------
+        trajectory : :class:`.Trajectory` or list of :class:`.BaseSnapshot`
+            the frames to test
+
+        Returns
+        -------
+        np.ndarray of int
+            for each frame, the index of the first interface volume that
+            contains the frame, or ``len(self)`` if no volume contains it
+        """
+        frames = list(trajectory)
+        result = np.full(len(frames), len(self), dtype=int)
+        for idx in reversed(range(len(self.volumes))):
+            result[self.volumes[idx].evaluate(frames)] = idx
+        return result
+
+    def highest_crossed_interface(self, trajectory):
+        """Highest interface that a trajectory crosses.
+
+        An interface is crossed if the trajectory has a frame outside the
+        interface volume. This assumes that the interface volumes are
+        nested, i.e., each interface volume contains the previous one.
+
+        Parameters
+        ----------
+        trajectory : :class:`.Trajectory`
+            the trajectory to test
+
+        Returns
+        -------
+        int
+            index of the highest crossed interface, -1 if the trajectory
+            stays inside all interfaces
+        """
+        indices = self.frame_interface_index(trajectory)
+        if len(indices) == 0:
+            return -1
+        return int(indices.max()) - 1
+
     def _slice_dict(self, slicer):
         dct = self.to_dict()
         dct['volumes'] = self.volumes[slicer]
@@ -208,6 +255,159 @@ class GenericVolumeInterfaceSet(InterfaceSet):
             self.volume_func = lambda maxv: volume_func(self.minvals, maxv)
         elif self.direction < 0:
             self.volume_func = lambda minv: volume_func(minv, self.maxvals)
+        self._set_boundary_index(volume_func)
+
+    def _set_boundary_index(self, volume_func):
+        """Sort the interface boundaries for :meth:`lambda_interface_index`.
+
+        For an increasing interface set, all volumes share the lower bound
+        (the base) and differ in the upper bound; the other way around for
+        a decreasing one. A boundary "wraps" if a periodic volume contains
+        the period boundary. The volumes are nested if the boundaries that
+        do not wrap come first and all boundaries are sorted outward. If
+        the volumes are not nested (or have units), the index is None and
+        the volumes are tested one by one.
+        """
+        self._boundary_index = None
+        if self.direction == 0:
+            return
+
+        minvs, maxvs, _ = self._sanitize_input(self.minvals, self.maxvals)
+        range_volumes = [volume_func(minv, maxv)
+                         for (minv, maxv) in zip(minvs, maxvs)]
+        bounds = [(vol.lambda_min, vol.lambda_max) for vol in range_volumes]
+        if any(is_simtk_quantity(value) for bound in bounds
+               for value in bound):
+            return
+
+        periodic = isinstance(range_volumes[0], paths.PeriodicCVDefinedVolume)
+        # periodic volumes spanning the full period contain all values
+        full = [periodic and vol.wrap
+                and (vol.lambda_min, vol.lambda_max)
+                == (vol.period_min, vol.period_max)
+                for vol in range_volumes]
+        partial = [bound for (bound, is_full) in zip(bounds, full)
+                   if not is_full] or [(-np.inf, np.inf)]
+
+        # sign turns decreasing boundaries into increasing ones
+        if self.direction > 0:
+            sign = 1
+            base = partial[0][0]
+            boundaries = [lmax for (lmin, lmax) in bounds]
+        else:
+            sign = -1
+            base = partial[0][1]
+            boundaries = [lmin for (lmin, lmax) in bounds]
+
+        keys = []
+        for (vol, boundary, is_full) in zip(range_volumes, boundaries, full):
+            if is_full:
+                keys.append((True, np.inf))
+            else:
+                wrap = periodic and sign * boundary < sign * base
+                keys.append((wrap, sign * boundary))
+        if keys != sorted(keys):
+            return
+
+        wraps = np.array([wrap for (wrap, _) in keys], dtype=bool)
+        boundaries = np.array([boundary for (_, boundary) in keys],
+                              dtype=float)
+        # NaN is in all CVDefinedVolumes, but only in full periodic ones
+        if periodic:
+            nan_index = full.index(True) if any(full) else len(full)
+        else:
+            nan_index = 0
+
+        self._boundary_index = {
+            'base': base,
+            'sign': sign,
+            'inner': boundaries[~wraps],
+            'wrapped': boundaries[wraps],
+            'nan': nan_index,
+            'volume': range_volumes[0],
+        }
+
+    def lambda_interface_index(self, values):
+        """Innermost interface that contains each value of the CV.
+
+        This only considers the CV, not the ``intersect_with`` volume. The
+        lookup is a binary search over the sorted interface boundaries
+        (instead of testing each interface volume). For example, the
+        highest interface crossed by a path is
+        ``lambda_interface_index(max_lambda) - 1`` for an increasing
+        interface set (with the minimum value for a decreasing one).
+
+        Parameters
+        ----------
+        values : float or array-like of float
+            the values of the CV (without units)
+
+        Returns
+        -------
+        int or np.ndarray of int
+            the index of the first interface volume that contains the value,
+            or ``len(self)`` if no interface volume contains it
+
+        Raises
+        ------
+        RuntimeError
+            if the interfaces do not have a direction or are not nested
+        """
+        index = self._boundary_index
+        if index is None:
+            raise RuntimeError("Interfaces are not nested along the CV; "
+                               "no boundary index available")
+
+        scalar = np.ndim(values) == 0
+        values = np.asarray(values, dtype=float).reshape(-1)
+        volume = index['volume']
+        if getattr(volume, 'wrap', False):
+            values = volume._do_wrap_array(values)
+
+        # same comparisons as the volumes: lmin <= x < lmax, and infinite
+        # bounds are not tested at all
+        base = index['base']
+        inner = index['inner']
+        if index['sign'] > 0:
+            from_base = (values >= base) | (base == -np.inf)
+            result = np.where(
+                from_base,
+                np.searchsorted(inner, values, side='right'),
+                len(inner) + np.searchsorted(index['wrapped'], values,
+                                             side='right')
+            )
+            n_finite = np.searchsorted(inner, np.inf, side='left')
+            result[from_base & (values == np.inf)] = n_finite
+        else:
+            from_base = (values < base) | (base == np.inf)
+            result = np.where(
+                from_base,
+                np.searchsorted(inner, -values, side='left'),
+                len(inner) + np.searchsorted(index['wrapped'], -values,
+                                             side='left')
+            )
+        result[np.isnan(values)] = index['nan']
+
+        if scalar:
+            return int(result[0])
+        return result
+
+    def frame_interface_index(self, trajectory):
+        frames = list(trajectory)
+        index = self._boundary_index
+        values = None
+        if index is not None:
+            values = index['volume']._get_cv_floats(frames)
+        if values is None:
+            return super(GenericVolumeInterfaceSet,
+                         self).frame_interface_index(frames)
+
+        result = self.lambda_interface_index(values)
+        if not isinstance(self.intersect_with, paths.FullVolume):
+            result[~self.intersect_with.evaluate(frames)] = len(self)
+        return result
+
+    frame_interface_index.__doc__ = InterfaceSet.frame_interface_index.__doc__
 
     def to_dict(self):
         dct = {'cv': self.cv,
@@ -0,0 +1,264 @@
+"""
+Batched writing and reading of rows of the variables of a storage
+"""
+
+import netCDF4
+import numpy as np
+
+
+def _contiguous_runs(idxs):
+    # split sorted indices into runs of consecutive indices
+    start = 0
+    for end in range(1, len(idxs) + 1):
+        if end == len(idxs) or idxs[end] != idxs[end - 1] + 1:
+            yield idxs[start:end]
+            start = end
+
+
+def _clustered_runs(idxs, max_gap):
+    # split sorted indices into runs with gaps of at most max_gap
+    start = 0
+    for end in range(1, len(idxs) + 1):
+        if end == len(idxs) or idxs[end] - idxs[end - 1] > max_gap:
+            yield idxs[start:end]
+            start = end
+
+
+def _is_object_variable(variable):
+    # strings and variable-length arrays are written as object arrays
+    return variable.dtype is str or isinstance(variable.datatype,
+                                               netCDF4.VLType)
+
+
+class WriteBatch(object):
+    """
+    Collect writes to single rows of variables and write them at once
+
+    While a batch is active, all values that the stores write to a single
+    index of a variable (through the value delegates in ``storage.vars``)
+    are kept in memory. When the batch ends, consecutive rows of each
+    variable are written with one slice assignment. Saving an object
+    appends a row to each variable of its store, so all objects saved to a
+    store within a batch end up as one contiguous write per variable.
+
+    Batches are used as context managers, see :meth:`.NetCDFPlus.batch`.
+    Nested batches join the outermost one, which writes all rows at its
+    end. Reads from a variable within a batch return the pending values;
+    reads of several rows and the length of stores write all pending rows
+    first.
+
+    Parameters
+    ----------
+    storage : :class:`.NetCDFPlus`
+        the storage to write to
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._pending = {}
+
+    def __enter__(self):
+        if self.storage._batch is None:
+            self.storage._batch = self
+
+        return self.storage._batch
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.storage._batch is self:
+            # objects are already in the indices of the stores, even if
+            # saving failed later on, so we always write what we have
+            try:
+                self.flush()
+            finally:
+                self.storage._batch = None
+
+    def __len__(self):
+        return sum(len(rows) for rows in self._pending.values())
+
+    def add(self, delegate, idx, value):
+        """
+        Add a value to be written to a row of a variable
+
+        Parameters
+        ----------
+        delegate : :class:`.NetCDFPlus.ValueDelegate`
+            the delegate of the variable to write to
+        idx : int
+            the index of the row
+        value : object
+            the value to be written, already converted by the setter of the
+            delegate
+        """
+        variable = delegate.variable
+        if not _is_object_variable(variable):
+            # copy, so that later changes to the object are not written
+            value = np.array(value, dtype=variable.dtype)
+            if value.ndim == 0:
+                # single values are read as numpy scalars
+                value = value[()]
+
+        rows = self._pending.get(delegate)
+        if rows is None:
+            rows = self._pending[delegate] = {}
+
+        rows[int(idx)] = value
+
+    def get(self, delegate, idx, default=None):
+        """
+        Return a pending value of a row of a variable
+
+        Parameters
+        ----------
+        delegate : :class:`.NetCDFPlus.ValueDelegate`
+            the delegate of the variable
+        idx : int
+            the index of the row
+        default : object
+            returned if there is no pending value
+
+        Returns
+        -------
+        object
+            the pending (converted) value or `default`
+        """
+        rows = self._pending.get(delegate)
+        if rows is None:
+            return default
+
+        return rows.get(int(idx), default)
+
+    def flush(self, delegate=None):
+        """
+        Write pending values
+
+        Parameters
+        ----------
+        delegate : :class:`.NetCDFPlus.ValueDelegate` or None
+            if given, only write the values of this variable
+        """
+        if delegate is None:
+            delegates = list(self._pending)
+        elif delegate in self._pending:
+            delegates = [delegate]
+        else:
+            return
+
+        for delegate in delegates:
+            rows = self._pending.pop(delegate)
+            variable = delegate.variable
+            for run in _contiguous_runs(sorted(rows)):
+                if len(run) == 1:
+                    variable[run[0]] = rows[run[0]]
+                    continue
+
+                if _is_object_variable(variable):
+                    values = np.empty(len(run), dtype=object)
+                    for pos, idx in enumerate(run):
+                        values[pos] = rows[idx]
+                else:
+                    values = np.stack([rows[idx] for idx in run])
+
+                variable[run[0]:run[-1] + 1] = values
+
+
+class ReadBuffer(object):
+    """
+    Rows of variables that are read in bulk, before they are used
+
+    Reading many single rows of a variable is slow, since each read has a
+    fixed cost. The read buffer holds rows that were read with one slice
+    per variable; single-row reads from the value delegates in
+    ``storage.vars`` return buffered rows without accessing the file.
+
+    Rows are added with :meth:`read` and removed with :meth:`drop`, see
+    :meth:`.ObjectStore.preload`.
+
+    Parameters
+    ----------
+    storage : :class:`.NetCDFPlus`
+        the storage to read from
+    """
+
+    max_gap = 16
+    """int : largest gap between rows that are read with a single slice"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._rows = {}
+
+    def __len__(self):
+        return sum(len(rows) for rows in self._rows.values())
+
+    def read(self, delegate, idxs):
+        """
+        Read rows of a variable into the buffer
+
+        Parameters
+        ----------
+        delegate : :class:`.NetCDFPlus.ValueDelegate`
+            the delegate of the variable to read from
+        idxs : list of int
+            the sorted indices of the rows to read
+
+        Returns
+        -------
+        list of int
+            the indices of the rows that were added to the buffer (rows
+            already in the buffer are not read again)
+        """
+        rows = self._rows.get(delegate)
+        if rows is None:
+            rows = self._rows[delegate] = {}
+
+        idxs = [idx for idx in idxs if idx not in rows]
+        for run in _clustered_runs(idxs, self.max_gap):
+            values = delegate.variable[run[0]:run[-1] + 1]
+            for idx in run:
+                rows[idx] = values[idx - run[0]]
+
+        return idxs
+
+    def get(self, delegate, idx, default=None):
+        """
+        Return a buffered (raw) row of a variable
+
+        Parameters
+        ----------
+        delegate : :class:`.NetCDFPlus.ValueDelegate`
+            the delegate of the variable
+        idx : int
+            the index of the row
+        default : object
+            returned if the row is not buffered
+
+        Returns
+        -------
+        object
+            the row as read from the variable, or `default`
+        """
+        rows = self._rows.get(delegate)
+        if rows is None:
+            return default
+
+        return rows.get(idx, default)
+
+    def drop(self, delegate, idxs):
+        """
+        Remove rows of a variable from the buffer
+
+        Parameters
+        ----------
+        delegate : :class:`.NetCDFPlus.ValueDelegate`
+            the delegate of the variable
+        idxs : list of int
+            the indices of the rows to remove
+        """
+        rows = self._rows.get(delegate)
+        if rows is None:
+            return
+
+        for idx in idxs:
+            rows.pop(idx, None)
+
+        if not rows:
+            del self._rows[delegate]
@@ -1,13 +1,145 @@
 from collections import OrderedDict
+import itertools
+import sys
 import weakref
 
+import numpy as np
+
+from .base import StorableObject
+
 __author__ = 'Jan-Hendrik Prinz'
 
 
+class CacheStatistics(object):
+    """
+    Access counters of a cache
+
+    Attributes
+    ----------
+    hits : int
+        number of successful lookups
+    misses : int
+        number of failed lookups (or, for chunk loading caches, lookups
+        that had to load from the file)
+    evictions : int
+        number of objects dropped from the strongly referenced part of the
+        cache. Weak caches still hold an evicted object while it is in use
+        elsewhere
+    resurrections : int
+        number of hits on weakly referenced objects, which are then moved
+        back to the strongly referenced part. These are also counted as hits
+    """
+    counters = ['hits', 'misses', 'evictions', 'resurrections']
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.resurrections = 0
+
+    def reset(self):
+        """Set all counters to zero"""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.resurrections = 0
+
+    @property
+    def hit_rate(self):
+        """float : fraction of lookups that were hits, NaN if no lookups"""
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return float('nan')
+        return float(self.hits) / lookups
+
+    def to_dict(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'resurrections': self.resurrections,
+            'hit_rate': self.hit_rate,
+        }
+
+
 class Cache(object):
     """
     A cache like dict
+
+    Access statistics are off by default. If enabled with
+    :meth:`enable_statistics`, hits, misses, evictions and resurrections are
+    counted in :attr:`stats`.
+
+    Attributes
+    ----------
+    stats : :class:`CacheStatistics` or None
+        the access counters, `None` if statistics are disabled
     """
+    stats = None
+    nbytes_sample_size = 20
+
+    def enable_statistics(self):
+        """
+        Start counting cache accesses
+
+        Existing counters are kept, if statistics are already enabled.
+        """
+        if self.stats is None:
+            self.stats = CacheStatistics()
+
+    def disable_statistics(self):
+        """Stop counting cache accesses and drop the counters"""
+        self.stats = None
+
+    def _held_values(self):
+        """list : the values held by strong references"""
+        return []
+
+    def nbytes(self):
+        """
+        Estimate the memory used by the values held by the cache
+
+        The estimate uses :func:`object_nbytes` of a sample of at most
+        `nbytes_sample_size` of the strongly held values.
+
+        Returns
+        -------
+        int
+            the estimated number of bytes
+        """
+        values = self._held_values()
+        if not values:
+            return 0
+        sample = values[:self.nbytes_sample_size]
+        sample_nbytes = sum(object_nbytes(value) for value in sample)
+        return int(sample_nbytes * len(values) / len(sample))
+
+    def statistics(self):
+        """
+        Size and (if enabled) access statistics of the cache
+
+        Returns
+        -------
+        dict
+            the class name of the cache, the number of strongly and weakly
+            cached objects, the maximal numbers (-1 is infinite), the
+            estimated bytes held and, if statistics are enabled, the counters
+            of :class:`CacheStatistics` and the hit rate
+        """
+        count = self.count
+        size = self.size
+        stats = {
+            'cache': self.__class__.__name__,
+            'count_strong': count[0],
+            'count_weak': count[1],
+            'size_strong': size[0],
+            'size_weak': size[1],
+            'nbytes': self.nbytes(),
+        }
+        if self.stats is not None:
+            stats.update(self.stats.to_dict())
+        return stats
+
     @property
     def count(self):
         """
@@ -73,6 +205,11 @@ class Cache(object):
         old_cache : the cache from which this cache is to be filled
 
         """
+        # copying the values is not counted as access
+        old_stats = getattr(old_cache, 'stats', None)
+        if old_stats is not None:
+            old_cache.stats = None
+
         size = self.size
         if size[0] == -1 or size[1] == -1:
             for key in reversed(list(old_cache)):
@@ -87,8 +224,18 @@ class Cache(object):
                 except KeyError:
                     pass
 
+        if old_stats is not None:
+            old_cache.stats = old_stats
+
+        self._transfer_statistics(old_cache)
         return self
 
+    def _transfer_statistics(self, old_cache):
+        # keep counting, if the old cache did
+        old_stats = getattr(old_cache, 'stats', None)
+        if self.stats is None and old_stats is not None:
+            self.stats = old_stats
+
     get_silent = get
 
 
@@ -100,6 +247,8 @@ class NoCache(Cache):
         super(NoCache, self).__init__()
 
     def __getitem__(self, item):
+        if self.stats is not None:
+            self.stats.misses += 1
         raise KeyError('No Cache has no items')
 
     def __contains__(self, item):
@@ -123,6 +272,7 @@ class NoCache(Cache):
         return []
 
     def transfer(self, old_cache):
+        self._transfer_statistics(old_cache)
         return self
 
     def clear(self):
@@ -137,6 +287,20 @@ class MaxCache(dict, Cache):
         super(MaxCache, self).__init__()
         Cache.__init__(self)
 
+    def __getitem__(self, item):
+        if self.stats is None:
+            return dict.__getitem__(self, item)
+        try:
+            obj = dict.__getitem__(self, item)
+        except KeyError:
+            self.stats.misses += 1
+            raise
+        self.stats.hits += 1
+        return obj
+
+    def _held_values(self):
+        return list(self.values())
+
     @property
     def count(self):
         return len(self), 0
@@ -185,8 +349,15 @@ class LRUCache(Cache):
         return reversed(self._cache)
 
     def __getitem__(self, item):
-        obj = self._cache.pop(item)
+        try:
+            obj = self._cache.pop(item)
+        except KeyError:
+            if self.stats is not None:
+                self.stats.misses += 1
+            raise
         self._cache[item] = obj
+        if self.stats is not None:
+            self.stats.hits += 1
         return obj
 
     def __setitem__(self, key, value, **kwargs):
@@ -196,6 +367,11 @@ class LRUCache(Cache):
     def _check_size_limit(self):
         while len(self._cache) > self.size_limit:
             self._cache.popitem(last=False)
+            if self.stats is not None:
+                self.stats.evictions += 1
+
+    def _held_values(self):
+        return list(self._cache.values())
 
     def __contains__(self, item):
         return item in self._cache
@@ -255,14 +431,25 @@ class WeakLRUCache(Cache):
         return self._size_limit
 
     def __getitem__(self, item):
+        stats = self.stats
         try:
             obj = self._cache.pop(item)
             self._cache[item] = obj
+            if stats is not None:
+                stats.hits += 1
             return obj
         except KeyError:
-            obj = self._weak_cache[item]
+            try:
+                obj = self._weak_cache[item]
+            except KeyError:
+                if stats is not None:
+                    stats.misses += 1
+                raise
             del self._weak_cache[item]
             self._cache[item] = obj
+            if stats is not None:
+                stats.hits += 1
+                stats.resurrections += 1
             self._check_size_limit()
             return obj
 
@@ -311,6 +498,11 @@ class WeakLRUCache(Cache):
         if self.size_limit is not None:
             while len(self._cache) > self.size_limit:
                 self._weak_cache.__setitem__(*self._cache.popitem(last=False))
+                if self.stats is not None:
+                    self.stats.evictions += 1
+
+    def _held_values(self):
+        return list(self._cache.values())
 
     def __contains__(self, item):
         return item in self._cache or item in self._weak_cache
@@ -347,6 +539,17 @@ class WeakValueCache(weakref.WeakValueDictionary, Cache):
         weakref.WeakValueDictionary.__init__(self, *args, **kwargs)
         Cache.__init__(self)
 
+    def __getitem__(self, item):
+        if self.stats is None:
+            return weakref.WeakValueDictionary.__getitem__(self, item)
+        try:
+            obj = weakref.WeakValueDictionary.__getitem__(self, item)
+        except KeyError:
+            self.stats.misses += 1
+            raise
+        self.stats.hits += 1
+        return obj
+
     @property
     def count(self):
         return 0, len(self)
@@ -361,6 +564,21 @@ class WeakKeyCache(weakref.WeakKeyDictionary, Cache):
     Implements a cache that keeps weak references to all elements
     """
 
+    def __getitem__(self, item):
+        if self.stats is None:
+            return weakref.WeakKeyDictionary.__getitem__(self, item)
+        try:
+            obj = weakref.WeakKeyDictionary.__getitem__(self, item)
+        except KeyError:
+            self.stats.misses += 1
+            raise
+        self.stats.hits += 1
+        return obj
+
+    def _held_values(self):
+        # the keys are weak, but the values are held by the cache
+        return list(self.values())
+
     @property
     def count(self):
         return 0, len(self)
@@ -370,6 +588,175 @@ class WeakKeyCache(weakref.WeakKeyDictionary, Cache):
         return 0, -1
 
 
+class IndexedArrayCache(Cache):
+    """
+    Implements a cache that keeps values in a numpy array by storage index
+
+    Instead of one dictionary entry per object, the values of stored
+    objects are kept in a growable array indexed by the position of the
+    object in a store, together with a mask of the valid entries. The
+    values stay cached when the objects themselves are freed, and numeric
+    values for millions of objects take only a few MB.
+
+    Objects that are not in the index, and values that do not fit into the
+    array (non-numeric values, values with units, or values of a different
+    shape than the first one), are kept in a :class:`WeakKeyCache`.
+
+    Parameters
+    ----------
+    index : dict-like
+        maps the `__uuid__` of an object to its index in the store, e.g.,
+        the index of a :class:`.SnapshotWrapperStore`
+    reversible : bool
+        if `True`, an object and its reversed partner (stored at the indices
+        `2 * n` and `2 * n + 1`, as in a :class:`.SnapshotWrapperStore`)
+        share one entry
+    """
+
+    min_capacity = 1024
+
+    def __init__(self, index, reversible=False):
+        super(IndexedArrayCache, self).__init__()
+        self.index = index
+        self.reversible = reversible
+        self._values = None
+        self._valid = np.zeros(0, dtype=bool)
+        self._fallback = WeakKeyCache()
+
+    def _position(self, key):
+        uuid = getattr(key, '__uuid__', None)
+        if uuid is None:
+            return None
+        idx = self.index.get(uuid)
+        if idx is None or idx < 0:
+            # not in the index, or only marked
+            return None
+        if self.reversible:
+            return idx // 2
+        return idx
+
+    def _as_entry(self, value):
+        """The value as array, if it can be kept in the value array"""
+        if hasattr(value, 'unit'):
+            return None
+        try:
+            entry = np.asarray(value)
+        except (TypeError, ValueError):
+            return None
+        if entry.dtype.kind not in 'biufc':
+            return None
+        if self._values is not None and \
+                entry.shape != self._values.shape[1:]:
+            return None
+        return entry
+
+    def _reserve(self, pos, entry):
+        if self._values is None:
+            self._values = np.zeros((0,) + entry.shape, dtype=entry.dtype)
+
+        dtype = np.result_type(self._values.dtype, entry.dtype)
+        if dtype != self._values.dtype:
+            self._values = self._values.astype(dtype)
+
+        capacity = len(self._valid)
+        if pos >= capacity:
+            capacity = max(pos + 1, 2 * capacity, self.min_capacity)
+            values = np.zeros((capacity,) + self._values.shape[1:],
+                              dtype=self._values.dtype)
+            values[:len(self._values)] = self._values
+            valid = np.zeros(capacity, dtype=bool)
+            valid[:len(self._valid)] = self._valid
+            self._values = values
+            self._valid = valid
+
+    def __getitem__(self, item):
+        pos = self._position(item)
+        if pos is not None and pos < len(self._valid) and self._valid[pos]:
+            if self.stats is not None:
+                self.stats.hits += 1
+            value = self._values[pos]
+            if value.ndim == 0:
+                return value.item()
+            return value.copy()
+
+        if self.stats is None:
+            return self._fallback[item]
+        try:
+            value = self._fallback[item]
+        except KeyError:
+            self.stats.misses += 1
+            raise
+        self.stats.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        pos = self._position(key)
+        entry = self._as_entry(value) if pos is not None else None
+        if entry is None:
+            self._fallback[key] = value
+            return
+
+        self._reserve(pos, entry)
+        self._values[pos] = entry
+        self._valid[pos] = True
+
+    def __contains__(self, item):
+        pos = self._position(item)
+        if pos is not None and pos < len(self._valid) and self._valid[pos]:
+            return True
+        return item in self._fallback
+
+    def __len__(self):
+        return int(self._valid.sum()) + len(self._fallback)
+
+    def __iter__(self):
+        # the objects of array entries are not known, so only the objects
+        # in the fallback cache can be transferred to another cache
+        return iter(list(self._fallback.keys()))
+
+    def clear(self):
+        self._values = None
+        self._valid = np.zeros(0, dtype=bool)
+        self._fallback.clear()
+
+    def as_array(self):
+        """
+        All values in the array, masked where no value is cached
+
+        Returns
+        -------
+        :class:`numpy.ma.MaskedArray`
+            the values by store index (or by index // 2 for reversible
+            caches)
+        """
+        if self._values is None:
+            return np.ma.masked_array(np.zeros(0), mask=np.zeros(0, bool))
+        valid = np.flatnonzero(self._valid)
+        n_entries = int(valid[-1]) + 1 if len(valid) else 0
+        mask = ~self._valid[:n_entries]
+        if self._values.ndim > 1:
+            mask = np.broadcast_to(
+                mask.reshape((-1,) + (1,) * (self._values.ndim - 1)),
+                self._values[:n_entries].shape
+            )
+        return np.ma.masked_array(self._values[:n_entries].copy(),
+                                  mask=mask.copy())
+
+    def nbytes(self):
+        nbytes = self._valid.nbytes + self._fallback.nbytes()
+        if self._values is not None:
+            nbytes += self._values.nbytes
+        return nbytes
+
+    @property
+    def count(self):
+        return int(self._valid.sum()), len(self._fallback)
+
+    @property
+    def size(self):
+        return -1, -1
+
+
 class LRUChunkLoadingCache(Cache):
     """
     Implements a cache that keeps references loaded in chunks
@@ -472,10 +859,14 @@ class LRUChunkLoadingCache(Cache):
                 obj = self._chunkdict[chunk_idx][item % chunksize]
                 if chunk_idx != self._firstchunk:
                     self._update_chunk_order(chunk_idx)
+                if self.stats is not None:
+                    self.stats.hits += 1
                 return obj
             except IndexError:
                 pass
 
+        if self.stats is not None:
+            self.stats.misses += 1
         self.load_chunk(chunk_idx)
 
         try:
@@ -521,7 +912,12 @@ class LRUChunkLoadingCache(Cache):
 
     def _check_size_limit(self):
         if len(self._chunkdict) > self.max_chunks:
-            self._chunkdict.popitem(last=False)
+            _, chunk = self._chunkdict.popitem(last=False)
+            if self.stats is not None:
+                self.stats.evictions += len(chunk)
+
+    def _held_values(self):
+        return list(itertools.chain.from_iterable(self._chunkdict.values()))
 
     def __contains__(self, item):
         return any(item in chunk for chunk in self._chunkdict)
@@ -544,3 +940,315 @@ class LRUChunkLoadingCache(Cache):
         for chunk in reversed(self._chunkdict.values()):
             for key in reversed(chunk.keys()):
                 yield key
+
+
+def object_nbytes(obj, depth=3):
+    """
+    Estimate the memory used by an object
+
+    Counts the object itself, numpy arrays and (up to `depth` levels) the
+    contents of containers and of the attributes of the object. Other
+    storable objects that are referenced are not counted, since they are
+    cached by their own stores.
+
+    Parameters
+    ----------
+    obj : object
+        the object to measure
+    depth : int
+        how many levels of contained objects to include
+
+    Returns
+    -------
+    int
+        estimated size in bytes
+    """
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is not None
+                                     else 0)
+
+    size = sys.getsizeof(obj)
+    if depth <= 0:
+        return size
+
+    if isinstance(obj, dict):
+        children = list(obj.keys()) + list(obj.values())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        children = obj
+    elif hasattr(obj, '__dict__'):
+        children = [obj.__dict__] if not isinstance(obj, type) else []
+    else:
+        children = []
+
+    return size + sum(
+        object_nbytes(child, depth - 1) for child in children
+        if not isinstance(child, StorableObject)
+    )
+
+
+class AdaptiveLRUCache(WeakLRUCache):
+    """
+    WeakLRUCache with access statistics, whose size is set by a budget
+
+    Statistics are always enabled. Besides the total counts in
+    :attr:`stats`, :attr:`recent_stats` gives the same counters with the
+    accesses before each :meth:`reset_statistics` scaled down. Misses of
+    recently evicted keys (kept in a ghost list with as many keys as the
+    cache can hold) are counted as ghost hits: these objects are used
+    again and a larger cache would have kept them. The size of every
+    `sample_interval`-th stored object is estimated with
+    :func:`object_nbytes`.
+
+    Usually created by :class:`CacheBudget`, which sets the size limits.
+
+    Parameters
+    ----------
+    size_limit : int
+        initial number of objects kept in the LRU part of the cache
+    budget : :class:`CacheBudget` or None
+        the budget this cache is part of; informed about every access
+    """
+    sample_interval = 50
+
+    def __init__(self, size_limit=100, budget=None):
+        super(AdaptiveLRUCache, self).__init__(size_limit)
+        self.enable_statistics()
+        self.budget = budget
+        self._ghosts = OrderedDict()
+        # `stats` at the last reset, and the scaled down counts until then
+        self._stats_at_reset = CacheStatistics()
+        self._decayed = CacheStatistics()
+        self.ghost_hits = 0
+        self._n_stored = 0
+        self._n_sampled = 0
+        self._sampled_nbytes = 0
+
+    @property
+    def object_nbytes(self):
+        """float or None : mean estimated size of the stored objects"""
+        if self._n_sampled == 0:
+            return None
+        return float(self._sampled_nbytes) / self._n_sampled
+
+    def disable_statistics(self):
+        # the budget needs the counters
+        pass
+
+    @property
+    def recent_stats(self):
+        """
+        :class:`CacheStatistics` : the counters of :attr:`stats`, with the
+        accesses before each :meth:`reset_statistics` scaled down
+        """
+        recent = CacheStatistics()
+        for name in CacheStatistics.counters:
+            setattr(recent, name,
+                    getattr(self._decayed, name) + getattr(self.stats, name)
+                    - getattr(self._stats_at_reset, name))
+        return recent
+
+    def reset_statistics(self, factor=0.0):
+        """
+        Scale down the recent access counters
+
+        The total counts in :attr:`stats` are kept.
+
+        Parameters
+        ----------
+        factor : float
+            factor applied to the counters; 0 (default) resets them, 0.5
+            lets older accesses count half in the future
+        """
+        recent = self.recent_stats
+        for name in CacheStatistics.counters:
+            setattr(self._decayed, name, int(getattr(recent, name) * factor))
+            setattr(self._stats_at_reset, name, getattr(self.stats, name))
+        self.ghost_hits = int(self.ghost_hits * factor)
+
+    def statistics(self):
+        """
+        Access statistics of the cache
+
+        Returns
+        -------
+        dict
+            the statistics of :meth:`Cache.statistics` (with the total
+            counts), the recent hits, misses and ghost hits used for
+            rebalancing, the size limit and the mean object size
+        """
+        stats = super(AdaptiveLRUCache, self).statistics()
+        recent = self.recent_stats
+        stats.update({
+            'recent_hits': recent.hits,
+            'recent_misses': recent.misses,
+            'ghost_hits': self.ghost_hits,
+            'size_limit': self.size_limit,
+            'object_nbytes': self.object_nbytes,
+        })
+        return stats
+
+    def __getitem__(self, item):
+        try:
+            obj = super(AdaptiveLRUCache, self).__getitem__(item)
+        except KeyError:
+            if self._ghosts.pop(item, False):
+                self.ghost_hits += 1
+            if self.budget is not None:
+                self.budget.tick()
+            raise
+
+        if self.budget is not None:
+            self.budget.tick()
+        return obj
+
+    def __setitem__(self, key, value, **kwargs):
+        if self._n_stored % self.sample_interval == 0:
+            self._sampled_nbytes += object_nbytes(value)
+            self._n_sampled += 1
+        self._n_stored += 1
+        self._ghosts.pop(key, None)
+        super(AdaptiveLRUCache, self).__setitem__(key, value)
+
+    @property
+    def size_limit(self):
+        return self._size_limit
+
+    @size_limit.setter
+    def size_limit(self, new_size):
+        self._size_limit = new_size
+        self._check_size_limit()
+
+    def _check_size_limit(self):
+        while len(self._cache) > self._size_limit:
+            key, value = self._cache.popitem(last=False)
+            self._weak_cache[key] = value
+            self._ghosts[key] = True
+            if self.stats is not None:
+                self.stats.evictions += 1
+
+        while len(self._ghosts) > max(self._size_limit, 1):
+            self._ghosts.popitem(last=False)
+
+    def clear(self):
+        super(AdaptiveLRUCache, self).clear()
+        self._ghosts.clear()
+
+
+class CacheBudget(object):
+    """
+    A memory budget that is distributed over several caches
+
+    Each cache gets a share of the budget (in bytes), which is converted to
+    a size limit (number of objects) with the measured mean size of its
+    objects. Every `rebalance_interval` accesses, the shares are adjusted:
+    the share of a cache is proportional to the bytes of objects that are
+    used again, i.e., ``(hits + ghost_hits) * object_nbytes``. Objects
+    that are only used once (cold misses, as in a single pass over a
+    store) do not increase the share. After each rebalance, the counters
+    are halved, so that the shares follow changes in the access pattern.
+
+    Only the strongly referenced (LRU) part of the caches is budgeted;
+    objects that are still in memory elsewhere can be found in the weak
+    part of the caches at no extra cost.
+
+    Parameters
+    ----------
+    budget : int
+        total budget in bytes
+    rebalance_interval : int
+        number of cache accesses between rebalancing
+    min_size : int
+        smallest size limit (number of objects) of a cache
+    default_nbytes : int
+        assumed object size of caches without measured objects
+    """
+
+    def __init__(self, budget, rebalance_interval=10000, min_size=10,
+                 default_nbytes=10000):
+        self.budget = int(budget)
+        self.rebalance_interval = rebalance_interval
+        self.min_size = min_size
+        self.default_nbytes = default_nbytes
+        self.caches = OrderedDict()
+        self.allocation = {}
+        self.n_rebalanced = 0
+        self._n_accesses = 0
+
+    def create_cache(self, name):
+        """
+        Create a cache that takes part in this budget
+
+        Initially, the budget is split equally between all caches.
+
+        Parameters
+        ----------
+        name : str
+            the name of the cache (usually the name of its store)
+
+        Returns
+        -------
+        :class:`AdaptiveLRUCache`
+        """
+        cache = AdaptiveLRUCache(self.min_size, budget=self)
+        self.caches[name] = cache
+        equal_share = self.budget // len(self.caches)
+        for cache_name in self.caches:
+            self._allocate(cache_name, equal_share)
+        return cache
+
+    def _object_nbytes(self, cache):
+        nbytes = cache.object_nbytes
+        return self.default_nbytes if nbytes is None else max(nbytes, 1.0)
+
+    def _allocate(self, name, nbytes):
+        cache = self.caches[name]
+        self.allocation[name] = int(nbytes)
+        cache.size_limit = max(
+            self.min_size, int(nbytes / self._object_nbytes(cache))
+        )
+
+    def tick(self):
+        """Count one cache access and rebalance, if it is time"""
+        self._n_accesses += 1
+        if self._n_accesses >= self.rebalance_interval:
+            self.rebalance()
+
+    def rebalance(self):
+        """Distribute the budget according to the recent accesses"""
+        self._n_accesses = 0
+        weights = {
+            name: (cache.recent_stats.hits + cache.ghost_hits)
+            * self._object_nbytes(cache)
+            for name, cache in self.caches.items()
+        }
+        total = sum(weights.values())
+        if total > 0:
+            for name, weight in weights.items():
+                self._allocate(name, self.budget * weight / total)
+
+        for cache in self.caches.values():
+            cache.reset_statistics(0.5)
+
+        self.n_rebalanced += 1
+
+    @property
+    def nbytes(self):
+        """float : estimated bytes of all strongly cached objects"""
+        return sum(cache.count[0] * self._object_nbytes(cache)
+                   for cache in self.caches.values())
+
+    def statistics(self):
+        """
+        Statistics of all caches in this budget
+
+        Returns
+        -------
+        dict of str: dict
+            for each cache, the statistics of
+            :meth:`.AdaptiveLRUCache.statistics` and the allocated bytes
+        """
+        stats = {}
+        for name, cache in self.caches.items():
+            stats[name] = cache.statistics()
+            stats[name]['allocated_nbytes'] = self.allocation[name]
+        return stats
@@ -4,12 +4,15 @@ author
 
 import abc
 import logging
+import numbers
 import os.path
 from collections import OrderedDict
 from uuid import UUID
 
 import netCDF4
 import numpy as np
+import pandas as pd
+from .batch import ReadBuffer, WriteBatch
 from .dictify import UUIDObjectJSON
 from .stores import NamedObjectStore, ObjectStore, PseudoAttributeStore
 from .proxy import LoaderProxy
@@ -25,6 +28,9 @@ from openpathsampling.integration_tools import unit as u
 from openpathsampling.integration_tools import HAS_SIMTK_UNIT
 
 
+# marks rows that are not in the read buffer of a storage
+_NOT_BUFFERED = object()
+
 # ==============================================================================
 # Extended NetCDF Storage for multiple forked trajectories
 # ==============================================================================
@@ -88,12 +94,20 @@ class NetCDFPlus(netCDF4.Dataset):
             on the variable
         store : openpathsampling.netcdfplus.ObjectStore
             a reference to an object store used for convenience in some cases
+        storage : openpathsampling.netcdfplus.NetCDFPlus
+            the storage of the variable. If given, writes to single rows are
+            collected while a batch of the storage is active (see
+            :meth:`NetCDFPlus.batch`), and reads of single rows use the rows
+            in the read buffer of the storage (see
+            :meth:`ObjectStore.preload`)
 
         """
 
-        def __init__(self, variable, getter=None, setter=None, store=None):
+        def __init__(self, variable, getter=None, setter=None, store=None,
+                     storage=None):
             self.variable = variable
             self.store = store
+            self.storage = storage
 
             if setter is None:
                 # None should not be used
@@ -110,12 +124,38 @@ class NetCDFPlus(netCDF4.Dataset):
             if not HAS_SIMTK_UNIT:
                 self.support_simtk_unit = False
 
+        def _active_batch(self):
+            if self.storage is None:
+                return None
+
+            return self.storage._batch
+
         def __setitem__(self, key, value):
+            batch = self._active_batch()
+            if batch is not None:
+                if isinstance(key, numbers.Integral):
+                    batch.add(self, key, self.setter(value))
+                    return
+
+                batch.flush(self)
+
             self.variable[key] = self.setter(value)
 
         def __getitem__(self, key):
-            # print(self.variable[key])
-            # print(type(self.variable[key]))
+            batch = self._active_batch()
+            if batch is not None:
+                if isinstance(key, numbers.Integral):
+                    value = batch.get(self, key)
+                    if value is not None:
+                        return self.getter(value)
+                else:
+                    batch.flush(self)
+
+            if self.storage is not None and isinstance(key, numbers.Integral):
+                value = self.storage._read_buffer.get(self, key, _NOT_BUFFERED)
+                if value is not _NOT_BUFFERED:
+                    return self.getter(value)
+
             return self.getter(self.variable[key])
 
         def __getattr__(self, item):
@@ -128,6 +168,10 @@ class NetCDFPlus(netCDF4.Dataset):
             return repr(self.variable)
 
         def __len__(self):
+            batch = self._active_batch()
+            if batch is not None:
+                batch.flush(self)
+
             return len(self.variable)
 
     @property
@@ -436,6 +480,8 @@ class NetCDFPlus(netCDF4.Dataset):
         self._objects = {}
         self._obj_store = {}
         self._storages_base_cls = {}
+        self._batch = None
+        self._read_buffer = ReadBuffer(self)
         self.vars = dict()
         self.units = dict()
 
@@ -640,6 +686,50 @@ class NetCDFPlus(netCDF4.Dataset):
         raise RuntimeWarning("Objects of type '%s' cannot be stored!" %
                              obj.__class__.__name__)
 
+    def batch(self):
+        """
+        Return a context manager that collects writes until it is left
+
+        All objects saved within the context are written at its end, with
+        one write per variable of each store instead of one per object.
+        This reduces the number of (small) writes to the file, which is
+        slow on network filesystems. Nested batches are merged into the
+        outermost one.
+
+        Returns
+        -------
+        :class:`openpathsampling.netcdfplus.batch.WriteBatch`
+
+        Examples
+        --------
+        >>> with storage.batch():  # doctest: +SKIP
+        ...     storage.save(trajectories)
+
+        Notes
+        -----
+        The rows are written when the context is left, also if an exception
+        is raised, because saved objects are already registered in the
+        indices of the stores. Reading from the stores within the context
+        gives the saved values.
+        """
+        return WriteBatch(self)
+
+    def flush_batch(self):
+        """
+        Write all pending rows of an active batch
+        """
+        batch = getattr(self, '_batch', None)
+        if batch is not None:
+            batch.flush()
+
+    def sync(self):
+        self.flush_batch()
+        super(NetCDFPlus, self).sync()
+
+    def close(self):
+        self.flush_batch()
+        super(NetCDFPlus, self).close()
+
     def __contains__(self, item):
         if type(item) is list:
             # a list of objects will be stored one by one
@@ -790,6 +880,69 @@ class NetCDFPlus(netCDF4.Dataset):
 
         return image
 
+    def named_caches(self):
+        """
+        Return all caches of this storage by name
+
+        Returns
+        -------
+        OrderedDict of str: :class:`openpathsampling.netcdfplus.Cache`
+            the cache of each store, by the name of the store
+        """
+        return OrderedDict(
+            (name, store.cache) for name, store in self.objects.items()
+        )
+
+    def enable_cache_statistics(self, enable=True):
+        """
+        Switch the counting of cache accesses on or off for all caches
+
+        Counting is cheap, but not free, and is therefore off by default.
+        Caches created after this call (e.g., for new stores) are not
+        affected; calling this again enables them as well and keeps the
+        counters of the others.
+
+        Parameters
+        ----------
+        enable : bool
+            if `True` (default) start counting, otherwise stop counting and
+            drop the counters
+        """
+        for cache in self.named_caches().values():
+            if not hasattr(cache, 'enable_statistics'):
+                continue
+            if enable:
+                cache.enable_statistics()
+            else:
+                cache.disable_statistics()
+
+    def cache_report(self):
+        """
+        Return size and access statistics of all caches
+
+        The access counts (hits, misses, evictions, resurrections and the
+        hit rate) are only available for caches with enabled statistics,
+        see :meth:`enable_cache_statistics`, and are NaN otherwise. The
+        bytes held are estimated from a sample of the cached objects.
+
+        Returns
+        -------
+        :class:`pandas.DataFrame`
+            one row for each cache (see :meth:`named_caches`) with the
+            columns of :meth:`openpathsampling.netcdfplus.Cache.statistics`
+        """
+        rows = OrderedDict(
+            (name, cache.statistics())
+            for name, cache in self.named_caches().items()
+            if hasattr(cache, 'statistics')
+        )
+        columns = ['cache', 'count_strong', 'count_weak', 'size_strong',
+                   'size_weak', 'nbytes', 'hits', 'misses', 'evictions',
+                   'resurrections', 'hit_rate']
+        report = pd.DataFrame.from_dict(rows, orient='index')
+        extra = [col for col in report.columns if col not in columns]
+        return report.reindex(columns=columns + extra)
+
     def get_var_types(self):
         """
         List all allowed variable type to be used in `create_variable`
@@ -1025,7 +1178,8 @@ class NetCDFPlus(netCDF4.Dataset):
                     else:
                         getter = _get2(lambda v: v)
 
-            delegate = NetCDFPlus.ValueDelegate(var, getter, setter, store)
+            delegate = NetCDFPlus.ValueDelegate(
+                var, getter, setter, store, self)
 
             # this is a trick to speed up the s/getter. If we do not need
             # to _cast_ because of python objects of units we can copy
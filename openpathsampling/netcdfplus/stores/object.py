@@ -1,7 +1,9 @@
 import logging
-# from uuid import UUID
+from uuid import UUID
 from weakref import WeakValueDictionary
 
+import numpy as np
+
 from openpathsampling.netcdfplus.base import StorableNamedObject, StorableObject
 from openpathsampling.netcdfplus.cache import MaxCache, Cache, NoCache, \
     WeakLRUCache
@@ -18,47 +20,246 @@ logger = logging.getLogger(__name__)
 init_log = logging.getLogger('openpathsampling.initialization')
 
 
-class HashedList(dict):
+_MASK_64 = (1 << 64) - 1
+_MISSING = object()
+
+
+def read_uuid_arrays(variable, chunksize=100000):
+    """
+    Read a netCDF variable of UUID strings into arrays of their bits
+
+    Parameters
+    ----------
+    variable : :class:`netCDF4.Variable`
+        the variable with UUIDs stored as strings
+    chunksize : int
+        number of UUIDs converted at a time
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        the high and the low 64 bits of the UUIDs, as uint64 arrays
+    """
+    n_uuids = len(variable)
+    hi = np.zeros(n_uuids, dtype=np.uint64)
+    lo = np.zeros(n_uuids, dtype=np.uint64)
+    for start in range(0, n_uuids, chunksize):
+        strings = variable[start:start + chunksize]
+        uuids = [UUID(string).int for string in strings]
+        stop = start + len(uuids)
+        hi[start:stop] = [uuid >> 64 for uuid in uuids]
+        lo[start:stop] = [uuid & _MASK_64 for uuid in uuids]
+    return hi, lo
+
+
+class HashedList(object):
+    """
+    Map between the UUIDs of the objects in a store and their indices
+
+    This works like a dict from UUID to index, together with the list of
+    the UUIDs in the order they were saved (:attr:`.list`).
+
+    The UUIDs of the objects in an existing file (see :meth:`.restore`)
+    are only read when they are first needed. They are kept in arrays of
+    their high and low 64 bits, sorted for lookups by binary search, which
+    takes 40 bytes per object instead of a dict entry and Python ints. Only
+    the UUIDs added or changed afterwards are kept in a dict.
+    """
+    # bits of the UUID that are ignored for lookups
+    _ignored_bits = 0
+
     def __init__(self):
-        super(HashedList, self).__init__()
-        dict.__init__(self)
-        self._list = []
+        self.clear()
+
+    def clear(self):
+        # UUIDs from the file, in storage order and sorted for lookups
+        self._n_stored = 0
+        self._loader = None
+        self._hi = np.zeros(0, dtype=np.uint64)
+        self._lo = np.zeros(0, dtype=np.uint64)
+        self._sorted_hi = self._hi
+        self._sorted_lo = self._lo
+        self._sorted_pos = np.zeros(0, dtype=np.int64)
+        # UUIDs added since, and changes (None for removed UUIDs)
+        self._new = []
+        self._changed = {}
+        self._len = 0
+
+    def restore(self, n_stored, loader):
+        """
+        Start from the UUIDs of the objects in a file
+
+        Parameters
+        ----------
+        n_stored : int
+            the number of stored objects
+        loader : callable
+            returns the high and low 64 bits of the stored UUIDs as arrays
+            (see :func:`.read_uuid_arrays`); only called when needed
+        """
+        self.clear()
+        self._n_stored = n_stored
+        self._loader = loader
+        self._len = n_stored
+
+    def _load(self):
+        if self._loader is None:
+            return
+        loader, self._loader = self._loader, None
+        hi, lo = loader()
+        self._hi, self._lo = hi, lo
+        key_lo = lo & ~np.uint64(self._ignored_bits)
+        # the last position wins if a UUID is listed twice, as in a dict
+        order = np.lexsort((np.arange(len(hi)), key_lo, hi))
+        self._sorted_hi = hi[order]
+        self._sorted_lo = key_lo[order]
+        self._sorted_pos = order
+
+    def _key(self, uuid):
+        return uuid & ~self._ignored_bits
+
+    def _stored_value(self, pos):
+        return pos
+
+    def _result(self, value, uuid):
+        return value
+
+    def _find_stored(self, key):
+        if self._n_stored == 0:
+            return None
+        self._load()
+        hi = np.uint64(key >> 64)
+        lo = np.uint64(key & _MASK_64)
+        start = np.searchsorted(self._sorted_hi, hi, side='left')
+        end = np.searchsorted(self._sorted_hi, hi, side='right')
+        found = start + np.searchsorted(self._sorted_lo[start:end], lo,
+                                        side='right') - 1
+        if found < start or self._sorted_lo[found] != lo:
+            return None
+        return self._stored_value(int(self._sorted_pos[found]))
 
-    def append(self, key):
-        dict.__setitem__(self, key, len(self))
-        self._list.append(key)
+    def _get(self, key):
+        value = self._changed.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._find_stored(key)
+        return _MISSING if value is None else value
 
-    # noinspection PyCallByClass
-    def extend(self, t):
-        l = len(self)
-        dict.update(self, zip(t, range(l, l + len(t))))
-        self._list.extend(t)
+    def get(self, uuid, default=None):
+        value = self._get(self._key(uuid))
+        if value is _MISSING:
+            return default
+        return self._result(value, uuid)
 
-    def __setitem__(self, key, value):
-        dict.__setitem__(self, key, value)
-        self._list[value] = key
+    def __getitem__(self, uuid):
+        value = self.get(uuid, _MISSING)
+        if value is _MISSING:
+            raise KeyError(uuid)
+        return value
 
-    def __getitem__(self, key):
-        return dict.__getitem__(self, key)
+    def __contains__(self, uuid):
+        return self._get(self._key(uuid)) is not _MISSING
 
-    def index(self, key):
-        return self._list[key]
+    def __len__(self):
+        return self._len
+
+    def _uuid_at(self, pos):
+        if pos < 0:
+            pos += self._n_stored + len(self._new)
+        if 0 <= pos < self._n_stored:
+            self._load()
+            return (int(self._hi[pos]) << 64) | int(self._lo[pos])
+        return self._new[pos - self._n_stored]
+
+    def _set_uuid_at(self, pos, uuid):
+        if pos < self._n_stored:
+            self._load()
+            self._hi[pos] = uuid >> 64
+            self._lo[pos] = uuid & _MASK_64
+        else:
+            self._new[pos - self._n_stored] = uuid
 
-    def mark(self, key):
-        if key not in self:
-            dict.__setitem__(self, key, -2)
+    def _set(self, key, value):
+        if self._get(key) is _MISSING:
+            self._len += 1
+        self._changed[key] = value
 
-    def unmark(self, key):
-        if key in self:
-            dict.__delitem__(self, key)
+    def _append_value(self, uuid):
+        return len(self)
 
-    def clear(self):
-        dict.clear(self)
-        self._list = []
+    def append(self, uuid):
+        value = self._append_value(uuid)
+        self._set(self._key(uuid), value)
+        self._new.append(uuid)
+
+    def extend(self, uuids):
+        for uuid in uuids:
+            self.append(uuid)
+
+    def __setitem__(self, uuid, value):
+        if self.get(uuid) == value and self.index(value) == uuid:
+            # nothing changes (e.g., the object was loaded)
+            return
+        self._set(self._key(uuid), value)
+        self._set_uuid_at(value, uuid)
+
+    def __delitem__(self, uuid):
+        key = self._key(uuid)
+        if self._get(key) is _MISSING:
+            raise KeyError(uuid)
+        self._changed[key] = None
+        self._len -= 1
+
+    def index(self, value):
+        return self._uuid_at(value)
+
+    def mark(self, uuid):
+        if uuid not in self:
+            self._set(self._key(uuid), -2)
+
+    def unmark(self, uuid):
+        if uuid in self:
+            del self[uuid]
+
+    def items(self):
+        for key, value in self._changed.items():
+            if value is not None:
+                yield key, value
+        for pos in range(self._n_stored):
+            key = self._key(self._uuid_at(pos))
+            if key not in self._changed:
+                yield key, self._find_stored(key)
+
+    def keys(self):
+        for key, _ in self.items():
+            yield key
+
+    def __iter__(self):
+        return self.keys()
 
     @property
     def list(self):
-        return self._list
+        """Sequence of the UUIDs in the order they were saved"""
+        return _UUIDList(self)
+
+
+class _UUIDList(object):
+    # read-only view of the UUIDs of a HashedList in storage order
+    def __init__(self, hashed_list):
+        self._hashed_list = hashed_list
+
+    def __len__(self):
+        return self._hashed_list._n_stored + len(self._hashed_list._new)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[pos] for pos in range(*item.indices(len(self)))]
+        if not -len(self) <= item < len(self):
+            raise IndexError('list index out of range')
+        return self._hashed_list._uuid_at(item)
+
+    def __iter__(self):
+        for pos in range(len(self)):
+            yield self._hashed_list._uuid_at(pos)
 
 
 class ObjectStore(StorableNamedObject):
@@ -78,6 +279,11 @@ class ObjectStore(StorableNamedObject):
         or string for named objects. This is only used for cached access
         if caching is not `False`. Must be of type
         :obj:`openpathsampling.netcdfplus.base.StorableObject` or subclassed.
+    readahead : int
+        if larger than zero, loading objects with consecutive indices (e.g.,
+        when iterating over the store) is detected and the next `readahead`
+        objects are loaded in bulk with :meth:`preload`. Only the current
+        chunk of objects is kept in memory by the store; default 0 (off)
 
     """
     _restore_non_initial_attr = False
@@ -94,6 +300,8 @@ class ObjectStore(StorableNamedObject):
 
     _log_debug = False
 
+    readahead = 0
+
     class DictDelegator(object):
         def __init__(self, store, dct):
             self.prefix = store.prefix + '_'
@@ -105,6 +313,17 @@ class ObjectStore(StorableNamedObject):
         def __contains__(self, item):
             return (self.prefix + item) in self.dct
 
+    class VariableDelegator(DictDelegator):
+        # direct access to the netCDF variables, which writes pending rows of
+        # a batch first
+        def __init__(self, store, dct):
+            super(ObjectStore.VariableDelegator, self).__init__(store, dct)
+            self.storage = store.storage
+
+        def __getitem__(self, item):
+            self.storage.flush_batch()
+            return self.dct[self.prefix + item]
+
     def prefix_delegate(self, dct):
         return ObjectStore.DictDelegator(self, dct)
 
@@ -202,6 +421,11 @@ class ObjectStore(StorableNamedObject):
 
         self.fallback_store = None
 
+        # state of the sequential readahead, see load()
+        self._next_sequential = None
+        self._readahead_objects = []
+        self._preloading = False
+
     def is_created(self):
         return self._created
 
@@ -230,7 +454,8 @@ class ObjectStore(StorableNamedObject):
         self._storage = storage
         self.prefix = prefix
 
-        self.variables = self.prefix_delegate(self.storage.variables)
+        self.variables = ObjectStore.VariableDelegator(
+            self, self.storage.variables)
         self.units = self.prefix_delegate(self.storage.units)
         self.vars = self.prefix_delegate(self.storage.vars)
 
@@ -243,8 +468,10 @@ class ObjectStore(StorableNamedObject):
         self.load_indices()
 
     def load_indices(self):
-        self.index.clear()
-        self.index.extend(self.vars['uuid'][:])
+        variable = self.storage.variables[self.prefix + '_uuid']
+        # the UUIDs are only read when they are first looked up
+        self.index.restore(len(variable),
+                           lambda: read_uuid_arrays(variable))
 
     @property
     def storage(self):
@@ -334,7 +561,7 @@ class ObjectStore(StorableNamedObject):
         Add iteration over all elements in the storage
         """
         # we want to iterator in the order object were saved!
-        for uuid in self.index._list:
+        for uuid in self.index.list:
             yield self.load(uuid)
 
     def __len__(self):
@@ -347,6 +574,7 @@ class ObjectStore(StorableNamedObject):
             number of stored objects
 
         """
+        self.storage.flush_batch()
         return len(self.storage.dimensions[self.prefix])
 
     def write(self, variable, idx, obj, attribute=None):
@@ -764,6 +992,8 @@ class ObjectStore(StorableNamedObject):
             raise RuntimeError(
                 'Loading of negative int should result in no object. '
                 'This should never happen!')
+        elif self._readahead_from(n_idx):
+            return self.cache[n_idx]
         else:
             obj = self._load(n_idx)
 
@@ -790,6 +1020,104 @@ class ObjectStore(StorableNamedObject):
 
         return obj
 
+    def _readahead_from(self, n_idx):
+        # start reading ahead, if objects are loaded in sequence
+        sequential = n_idx == self._next_sequential
+        self._next_sequential = n_idx + 1
+        if self.readahead <= 0 or not sequential or self._preloading:
+            return False
+
+        # replacing the previous chunk releases the objects behind
+        self._readahead_objects = []
+        self._readahead_objects = self.preload(
+            range(n_idx, n_idx + self.readahead))
+        self._next_sequential = n_idx + self.readahead
+        return n_idx in self.cache
+
+    def _row_delegates(self):
+        # the value delegates of all variables with one row per object
+        return [
+            delegate for delegate in self.storage.vars.values()
+            if delegate.variable.dimensions[:1] == (self.prefix,)
+        ]
+
+    @staticmethod
+    def _referenced_uuids(value):
+        # UUIDs in a raw row of an `obj.<store>` variable
+        if isinstance(value, np.ndarray):
+            values = value.ravel()
+        else:
+            values = [value]
+
+        return [
+            int(UUID(uuid)) for v in values if isinstance(v, str)
+            for uuid in (v[i:i + 36] for i in range(0, len(v), 36))
+            if uuid[0] != '-'
+        ]
+
+    def preload(self, idxs):
+        """
+        Load objects in bulk, together with the objects they reference
+
+        The rows of all variables of this store are read with one slice
+        (per cluster of nearby indices) into the read buffer of the storage.
+        Then all objects referenced by (non-lazy) `obj.<store>` variables are
+        preloaded from their stores in the same way, before the objects are
+        created from the buffered rows. This replaces many reads of single
+        rows, which are slow, with a few large reads.
+
+        Parameters
+        ----------
+        idxs : iterable of int
+            indices of the objects to load; indices that are already cached
+            or out of range are skipped
+
+        Returns
+        -------
+        list of :class:`openpathsampling.netcdfplus.base.StorableObject`
+            the loaded objects (not the ones that were cached already)
+        """
+        n_objects = len(self)
+        idxs = sorted({
+            int(idx) for idx in idxs
+            if 0 <= idx < n_objects and idx not in self.cache
+        })
+        if not idxs:
+            return []
+
+        read_buffer = self.storage._read_buffer
+        delegates = self._row_delegates()
+        buffered = [(delegate, read_buffer.read(delegate, idxs))
+                    for delegate in delegates]
+
+        preloading = self._preloading
+        self._preloading = True
+        try:
+            # keep referenced objects in memory until ours are created
+            dependencies = []
+            for delegate in delegates:
+                store = delegate.store
+                if store is None \
+                        or not delegate.var_type.startswith('obj.'):
+                    continue
+
+                uuids = set()
+                for idx in idxs:
+                    uuids.update(self._referenced_uuids(
+                        read_buffer.get(delegate, idx)))
+                dependencies.extend(store.preload(
+                    store.index[uuid] for uuid in uuids
+                    if uuid in store.index
+                ))
+
+            objects = [self.load(self.index.index(idx)) for idx in idxs]
+        finally:
+            self._preloading = preloading
+            for delegate, added in buffered:
+                read_buffer.drop(delegate, added)
+
+        return objects
+
     @staticmethod
     def reference(obj):
         return obj.__uuid__
@@ -13,6 +13,9 @@ import openpathsampling as paths
 from openpathsampling.netcdfplus import StorableNamedObject, StorableObject
 from openpathsampling.pathmover_inout import InOutSet, InOut
 from openpathsampling.rng import default_rng
+from openpathsampling.trial_executor import (
+    SerialTrialExecutor, worker_engine
+)
 from .ops_logging import initialization_logging
 from .treelogic import TreeMixin
 
@@ -464,6 +467,46 @@ class PathMover(with_metaclass(abc.ABCMeta, TreeMixin, StorableNamedObject)):
 
         return paths.EmptyMoveChange()  # pragma: no cover
 
+    def move_async(self, sample_set, executor=None):
+        """
+        Start the move, but allow finishing it later.
+
+        Movers that use an engine can hand the generation of trial
+        trajectories to ``executor`` and return before it is done, so that
+        several independent moves can be in flight at the same time. The
+        default is to run :meth:`.move` immediately.
+
+        Parameters
+        ----------
+        sample_set : SampleSet
+            the initially used sampleset
+        executor : :class:`.TrialExecutor`
+            executor for trial trajectory generation; default (`None`) runs
+            trials immediately
+
+        Returns
+        -------
+        callable
+            function without arguments that finishes the move and returns
+            the :class:`.MoveChange`
+        """
+        change = self.move(sample_set)
+        return lambda: change
+
+    def _move_overridden(self, cls):
+        """Whether a subclass of ``cls`` overrides only :meth:`.move`.
+
+        In that case the :meth:`.move_async` of ``cls`` does not do what
+        :meth:`.move` of this mover does, and the move has to be run
+        synchronously.
+        """
+        for klass in type(self).__mro__:
+            if klass is cls or 'move_async' in vars(klass):
+                return False
+            if 'move' in vars(klass):
+                return True
+        return False
+
     def __str__(self):
         if self.name == self.__class__.__name__:
             return self.__repr__()
@@ -619,6 +662,12 @@ class SampleMover(PathMover):
         change = self.move_core(samples)
         return change
 
+    def move_async(self, sample_set, executor=None):
+        if self._move_overridden(SampleMover):
+            return PathMover.move_async(self, sample_set, executor)
+        samples = self.get_samples_from_sample_set(sample_set)
+        return self.move_core_async(samples, executor)
+
     def move_core(self, samples):
         """Core of the Monte Carlo move. Includes acceptance.
 
@@ -638,12 +687,43 @@ class SampleMover(PathMover):
         """
         # this is separated out for reuse and remove dependence core MC move
         # dependence on the entire sample set (for parallelization)
+        return self._change_from_trials(samples, lambda: self(*samples))
+
+    def move_core_async(self, samples, executor=None):
+        """Start the core of the Monte Carlo move; finish it later.
+
+        See Also
+        --------
+        move_core
+        move_async
+
+        Parameters
+        ----------
+        samples : list of :class:`.Sample`
+            input samples from the correct ensembles of this object
+        executor : :class:`.TrialExecutor`
+            executor for trial trajectory generation
+
+        Returns
+        -------
+        callable
+            function without arguments that does the acceptance and
+            returns the :class:`.MoveChange`
+        """
+        return lambda: self.move_core(samples)
+
+    def _change_from_trials(self, samples, make_trials):
+        """Build the MoveChange, given a function to make the trials.
+
+        ``make_trials`` returns the ``(trials, details)`` tuple of
+        :meth:`.__call__`; acceptance is done here.
+        """
         try:
             # pass these samples to the trial move which might throw
             # engine-specific exceptions if something goes wrong.
             # Most common should be `EngineNaNError` if nan is detected and
             # `EngineMaxLengthError`
-            trials, call_details = self(*samples)
+            trials, call_details = make_trials()
 
         except SampleNaNError as e:
             e.details.update({'rejection_reason': 'nan'})
@@ -737,6 +817,11 @@ class EngineMover(SampleMover):
       calls the functions to make the trajectories (depending on the nature
       of the mover). Frequently, this is the only thing to override (two-way
       shooting, shifting).
+    * ``submit_trial``/``collect_trial``: the two halves of ``__call__``.
+      ``submit_trial`` picks the shooting point and hands ``_run`` to a
+      :class:`.TrialExecutor`; ``collect_trial`` waits for the result and
+      builds the sample. Since ``_run`` may be executed in another thread
+      or process, it should not change the state of the mover.
     """
 
     default_engine = None
@@ -776,6 +861,16 @@ class EngineMover(SampleMover):
     def engine(self, engine):
         self._engine = engine
 
+    @property
+    def _trial_engine(self):
+        """The engine instance to run dynamics with in :meth:`._run`.
+
+        Inside a worker of a :class:`.TrialExecutor`, this is the instance
+        of :attr:`.engine` private to that worker (see
+        :func:`.worker_engine`); otherwise it is :attr:`.engine` itself.
+        """
+        return worker_engine(self.engine)
+
     def _called_ensembles(self):
         return [self.ensemble]
 
@@ -786,12 +881,62 @@ class EngineMover(SampleMover):
         return [self.target_ensemble]
 
     def __call__(self, input_sample):
+        return self.collect_trial(self.submit_trial(input_sample))
+
+    def move_core_async(self, samples, executor=None):
+        if type(self).__call__ is not EngineMover.__call__ or \
+                type(self).move_core is not SampleMover.move_core:
+            # trials made by an overridden __call__ (or move_core) can't
+            # be split into submit_trial and collect_trial
+            return super(EngineMover, self).move_core_async(samples,
+                                                            executor)
+        pending = self.submit_trial(*samples, executor=executor)
+        return lambda: self._change_from_trials(
+            samples, lambda: self.collect_trial(pending)
+        )
+
+    def submit_trial(self, input_sample, executor=None):
+        """Pick the shooting point and start generating the trial.
+
+        Parameters
+        ----------
+        input_sample : :class:`.Sample`
+            the sample to start from
+        executor : :class:`.TrialExecutor`
+            executor running the trial trajectory generation; default
+            (`None`) runs it immediately
+
+        Returns
+        -------
+        tuple
+            pending trial, to be passed to :meth:`.collect_trial`
+        """
+        if executor is None:
+            executor = SerialTrialExecutor()
+
         initial_trajectory = input_sample.trajectory
         shooting_index = self.selector.pick(initial_trajectory)
+        future = executor.submit(self, initial_trajectory, shooting_index)
+        return input_sample, shooting_index, future
+
+    def collect_trial(self, pending):
+        """Wait for a trial started by :meth:`.submit_trial` and build it.
+
+        Parameters
+        ----------
+        pending : tuple
+            the pending trial returned by :meth:`.submit_trial`
 
+        Returns
+        -------
+        trials : list of :class:`.Sample`
+            list containing the trial sample
+        details : dict
+            details of the trial
+        """
+        input_sample, shooting_index, future = pending
         try:
-            trial_trajectory, run_details = self._run(initial_trajectory,
-                                                      shooting_index)
+            trial_trajectory, run_details = future.result()
 
         except paths.engines.EngineNaNError as e:
             trial, details = self._build_sample(
@@ -884,8 +1029,8 @@ class EngineMover(SampleMover):
         run_f = paths.PrefixTrajectoryEnsemble(self.target_ensemble,
                                                trajectory[0:shooting_index]
                                                ).can_append
-        partial_trajectory = self.engine.generate(initial_snapshot,
-                                                  running=[run_f])
+        partial_trajectory = self._trial_engine.generate(initial_snapshot,
+                                                         running=[run_f])
         trial_trajectory = (trajectory[0:shooting_index] +
                             partial_trajectory)
         # TODO: this should check for overshoot; only works now if ensemble
@@ -897,8 +1042,8 @@ class EngineMover(SampleMover):
         run_f = paths.SuffixTrajectoryEnsemble(self.target_ensemble,
                                                trajectory[shooting_index + 1:]
                                                ).can_prepend
-        partial_trajectory = self.engine.generate(initial_snapshot,
-                                                  running=[run_f])
+        partial_trajectory = self._trial_engine.generate(initial_snapshot,
+                                                         running=[run_f])
         trial_trajectory = (partial_trajectory.reversed +
                             trajectory[shooting_index + 1:])
         # TODO: this should check for overshoot; only works now if ensemble
@@ -1612,6 +1757,19 @@ class SelectionMover(PathMover):
 
         return path
 
+    def move_async(self, sample_set, executor=None):
+        if self._move_overridden(SelectionMover):
+            return PathMover.move_async(self, sample_set, executor)
+        weights = self._selector(sample_set)
+        mover, details = self.select_mover(weights)
+        finish_submove = mover.move_async(sample_set, executor)
+
+        return lambda: paths.RandomChoiceMoveChange(
+            subchange=finish_submove(),
+            mover=self,
+            details=details
+        )
+
 
 class RandomChoiceMover(SelectionMover):
     """
@@ -1914,6 +2072,53 @@ class SequentialMover(PathMover):
 
         return paths.SequentialMoveChange(movechanges, mover=self)
 
+    @staticmethod
+    def _run_submove(mover, sample_set, executor):
+        """Run a submove to completion, with ``executor`` if given"""
+        if executor is None:
+            return mover.move(sample_set)
+        return mover.move_async(sample_set, executor)()
+
+    def move_async(self, sample_set, executor=None):
+        # Submovers that act on ensembles not touched by any submover still
+        # in flight can start before those are finished. Otherwise, we
+        # finish all pending submovers first. Results are always applied
+        # in the order of the movers list.
+        if self._move_overridden(SequentialMover):
+            return PathMover.move_async(self, sample_set, executor)
+        logger.debug("Starting sequential move (async)")
+        state = {'subglobal': sample_set, 'movechanges': [], 'pending': []}
+
+        def finish_pending():
+            for finish in state['pending']:
+                movepath = finish()
+                state['subglobal'] = state['subglobal'].apply_samples(
+                    movepath.results
+                )
+                state['movechanges'].append(movepath)
+            state['pending'] = []
+
+        busy = set()
+        for mover in self.movers:
+            ensembles = (set(mover.input_ensembles)
+                         | set(mover.output_ensembles))
+            if ensembles & busy:
+                finish_pending()
+                busy = set()
+
+            logger.debug("Starting sequential move step " + str(mover))
+            state['pending'].append(
+                mover.move_async(state['subglobal'], executor)
+            )
+            busy |= ensembles
+
+        def finish():
+            finish_pending()
+            return paths.SequentialMoveChange(state['movechanges'],
+                                              mover=self)
+
+        return finish
+
 
 class PartialAcceptanceSequentialMover(SequentialMover):
     """
@@ -1942,6 +2147,16 @@ class PartialAcceptanceSequentialMover(SequentialMover):
         return total
 
     def move(self, sample_set):
+        return self._move(sample_set)
+
+    def move_async(self, sample_set, executor=None):
+        if self._move_overridden(PartialAcceptanceSequentialMover):
+            return PathMover.move_async(self, sample_set, executor)
+        # whether a submove is run depends on the acceptance of the
+        # previous one, so the submoves are run one after the other
+        return lambda: self._move(sample_set, executor)
+
+    def _move(self, sample_set, executor=None):
         logger.debug("==== BEGINNING " + self.name + " ====")
         subglobal = paths.SampleSet(sample_set)
         movechanges = []
@@ -1952,7 +2167,7 @@ class PartialAcceptanceSequentialMover(SequentialMover):
                         + " (" + mover.name + ")"
                         )
             # Run the sub mover
-            movepath = mover.move(subglobal)
+            movepath = self._run_submove(mover, subglobal, executor)
             samples = movepath.results
             subglobal = subglobal.apply_samples(samples)
             movechanges.append(movepath)
@@ -1984,6 +2199,16 @@ class ConditionalSequentialMover(SequentialMover):
         )
 
     def move(self, sample_set):
+        return self._move(sample_set)
+
+    def move_async(self, sample_set, executor=None):
+        if self._move_overridden(ConditionalSequentialMover):
+            return PathMover.move_async(self, sample_set, executor)
+        # whether a submove is run depends on the acceptance of the
+        # previous one, so the submoves are run one after the other
+        return lambda: self._move(sample_set, executor)
+
+    def _move(self, sample_set, executor=None):
         logger.debug("Starting conditional sequential move")
 
         subglobal = sample_set
@@ -1993,7 +2218,7 @@ class ConditionalSequentialMover(SequentialMover):
             logger.debug("Starting sequential move step " + str(mover))
 
             # Run the sub mover
-            movepath = mover.move(subglobal)
+            movepath = self._run_submove(mover, subglobal, executor)
             samples = movepath.results
             subglobal = subglobal.apply_samples(samples)
             movechanges.append(movepath)
@@ -2017,6 +2242,15 @@ class NonCanonicalConditionalSequentialMover(ConditionalSequentialMover):
     def move(self, sample_set):
         change = super(NonCanonicalConditionalSequentialMover,
                        self).move(sample_set)
+        return self._non_canonical_change(change)
+
+    def move_async(self, sample_set, executor=None):
+        finish = super(NonCanonicalConditionalSequentialMover,
+                       self).move_async(sample_set, executor)
+        return lambda: self._non_canonical_change(finish())
+
+    @staticmethod
+    def _non_canonical_change(change):
         return paths.NonCanonicalConditionalSequentialMoveChange(
             subchanges=change.subchanges,
             mover=change.mover,
@@ -2122,6 +2356,15 @@ class SubPathMover(PathMover):
         )
         return change
 
+    def move_async(self, sample_set, executor=None):
+        if self._move_overridden(SubPathMover):
+            return PathMover.move_async(self, sample_set, executor)
+        finish_submove = self.mover.move_async(sample_set, executor)
+        return lambda: paths.SubMoveChange(
+            subchange=finish_submove(),
+            mover=self
+        )
+
 
 class EnsembleFilterMover(SubPathMover):
     """Mover that return only samples from specified ensembles
@@ -2161,6 +2404,19 @@ class EnsembleFilterMover(SubPathMover):
         )
         return change
 
+    def move_async(self, sample_set, executor=None):
+        if self._move_overridden(EnsembleFilterMover):
+            return PathMover.move_async(self, sample_set, executor)
+        filtered_globalstate = paths.SampleSet([
+            samp for samp in sample_set if samp.ensemble in self.ensembles
+        ])
+        finish_submove = self.mover.move_async(filtered_globalstate,
+                                               executor)
+        return lambda: paths.FilterByEnsembleMoveChange(
+            subchange=finish_submove(),
+            mover=self
+        )
+
     def _get_in_ensembles(self):
         # only filter the output, not the input
         # return self.mover.input_ensembles
@@ -2305,8 +2561,8 @@ class AbstractTwoWayShootingMover(EngineMover):
             self.target_ensemble,
             trajectory[0:shooting_index]
         )
-        fwd_partial = self.engine.generate(initial_snapshot,
-                                           running=[fwd_ens.can_append])
+        fwd_partial = self._trial_engine.generate(
+            initial_snapshot, running=[fwd_ens.can_append])
         return fwd_partial
 
     def _make_backward_trajectory(self, trajectory, initial_snapshot,
@@ -2316,8 +2572,8 @@ class AbstractTwoWayShootingMover(EngineMover):
             self.target_ensemble,
             trajectory[shooting_index + 1:]
         )
-        bkwd_partial = self.engine.generate(initial_snapshot.reversed,
-                                            running=[bkwd_ens.can_prepend])
+        bkwd_partial = self._trial_engine.generate(
+            initial_snapshot.reversed, running=[bkwd_ens.can_prepend])
         return bkwd_partial
 
     def _run(self, trajectory, shooting_index):
@@ -2530,6 +2786,14 @@ class MinusMover(SubPathMover):
 
     def move(self, sample_set):
         change = super(MinusMover, self).move(sample_set)
+        return self._add_minus_details(change)
+
+    def move_async(self, sample_set, executor=None):
+        finish = super(MinusMover, self).move_async(sample_set, executor)
+        return lambda: self._add_minus_details(finish())
+
+    @staticmethod
+    def _add_minus_details(change):
         cond_seq_changes = change.subchanges[0].subchanges[0].subchanges
         seg_swap = None
         if len(cond_seq_changes) >= 2:
@@ -2616,6 +2880,9 @@ class SingleReplicaMinusMover(MinusMover):
         # skip the MinusMover's implementation
         return super(MinusMover, self).move(sample_set)
 
+    def move_async(self, sample_set, executor=None):
+        return super(MinusMover, self).move_async(sample_set, executor)
+
 
 class PathSimulatorMover(SubPathMover):
     """
@@ -2637,6 +2904,18 @@ class PathSimulatorMover(SubPathMover):
             details=details
         )
 
+    def move_async(self, sample_set, executor=None, step=-1):
+        details = Details(
+            step=step
+        )
+        finish_submove = self.mover.move_async(sample_set, executor)
+
+        return lambda: paths.PathSimulatorMoveChange(
+            finish_submove(),
+            mover=self,
+            details=details
+        )
+
 
 def PathReversalSet(ensembles):
     return list(map(PathReversalMover, ensembles))
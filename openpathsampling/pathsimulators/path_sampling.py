@@ -18,6 +18,14 @@ class PathSampling(PathSimulator):
 
     Takes a single move_scheme and generates samples from that, keeping one
     per replica after each move.
+
+    Attributes
+    ----------
+    executor : :class:`.TrialExecutor` or None
+        if set, trial trajectories of engine movers are generated with this
+        executor. Independent submoves of a :class:`.SequentialMover` then
+        run concurrently; acceptance is still done serially, in the order
+        of the move tree. Default (`None`) runs everything serially.
     """
 
     calc_name = "PathSampling"
@@ -53,6 +61,7 @@ class PathSampling(PathSimulator):
         # used to make sure we attach only one LiveVisualizerHook
         self._live_visualizer_attached = False
         self.status_update_frequency = 1
+        self.executor = None
 
         if initialize:
             # NOTE: why aren't we using save_initial_step here?
@@ -134,7 +143,8 @@ class PathSampling(PathSimulator):
                 # new storage does a stash here, not a save
                 self.storage.stash(self._current_step)
             except AttributeError:
-                self.storage.steps.save(self._current_step)
+                with self.storage.batch():
+                    self.storage.steps.save(self._current_step)
 
     @classmethod
     def from_step(cls, storage, step, initialize=True):
@@ -288,7 +298,12 @@ class PathSampling(PathSimulator):
 
         # MCStep, i.e. actual sample move
         time_start = time.time()  # we time **only** the MCStep (no hooks!)
-        movepath = self._mover.move(self.sample_set, step=self.step)
+        if self.executor is None:
+            movepath = self._mover.move(self.sample_set, step=self.step)
+        else:
+            movepath = self._mover.move_async(self.sample_set,
+                                              executor=self.executor,
+                                              step=self.step)()
         samples = movepath.results
         new_sampleset = self.sample_set.apply_samples(samples)
         elapsed_step = time.time() - time_start
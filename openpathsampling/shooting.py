@@ -1,7 +1,9 @@
 import math
 import logging
 
-from openpathsampling.netcdfplus import StorableNamedObject
+import numpy as np
+
+from openpathsampling.netcdfplus import StorableNamedObject, LRUCache
 from openpathsampling import default_rng
 from openpathsampling.deprecations import NEW_SNAPSHOT_SELECTOR
 
@@ -10,6 +12,9 @@ init_log = logging.getLogger('openpathsampling.initialization')
 
 
 class ShootingPointSelector(StorableNamedObject):
+    # number of trajectories for which the cumulative biases are cached
+    bias_table_cache_size = 10
+
     def __init__(self):
         # Assign rng, so it can be set to something else
         self._rng = default_rng()
@@ -51,6 +56,35 @@ class ShootingPointSelector(StorableNamedObject):
         """
         return [self.f(s, trajectory) for s in trajectory]
 
+    def _cumulative_biases(self, trajectory):
+        """
+        Returns the cumulative sum of the biases of all frames as an array
+
+        The table is cached by the UUIDs of the frames, so that picking a
+        shooting point and the acceptance of the trial (which needs
+        ``sum_bias`` of the same trajectory) only evaluate the biases once.
+        A trajectory that is changed in place has other frames and gets a
+        new table. This assumes that the biases only depend on the
+        snapshots.
+        """
+        try:
+            key = tuple(snapshot.__uuid__ for snapshot in trajectory)
+        except AttributeError:
+            # frames without UUIDs: no caching
+            return np.cumsum(np.asarray(self._biases(trajectory), float))
+
+        cache = self.__dict__.get('_bias_table_cache')
+        if cache is None:
+            cache = LRUCache(self.bias_table_cache_size)
+            self._bias_table_cache = cache
+
+        table = cache.get(key)
+        if table is None:
+            table = np.cumsum(np.asarray(self._biases(trajectory), float))
+            cache[key] = table
+
+        return table
+
     def sum_bias(self, trajectory):
         """
         Returns the unnormalized probability probability of a trajectory.
@@ -66,8 +100,11 @@ class ShootingPointSelector(StorableNamedObject):
         only for the non-symmetric proposal of different snapshots is given
         by `probability(old_trajectory) / probability(new_trajectory)`
         """
+        table = self._cumulative_biases(trajectory)
+        if len(table) == 0:
+            return 0.0
 
-        return sum(self._biases(trajectory))
+        return float(table[-1])
 
     def pick(self, trajectory):
         """
@@ -75,21 +112,15 @@ class ShootingPointSelector(StorableNamedObject):
 
         Notes
         -----
-        The native implementation is very slow. Simple picking algorithm
-        should override this function.
+        This draws from the cumulative biases (see
+        :meth:`._cumulative_biases`) by binary search. Simple picking
+        algorithms should still override this function.
         """
-
-        prob_list = self._biases(trajectory)
-        sum_bias = sum(prob_list)
-
-        rand = self._rng.random() * sum_bias
-        idx = 0
-        prob = prob_list[0]
-        while prob <= rand and idx < len(prob_list) - 1:
-            idx += 1
-            prob += prob_list[idx]
-
-        return idx
+        table = self._cumulative_biases(trajectory)
+        rand = self._rng.random() * table[-1]
+        # first frame whose cumulative bias exceeds rand
+        idx = int(np.searchsorted(table, rand, side='right'))
+        return min(idx, len(table) - 1)
 
 
 class GaussianBiasSelector(ShootingPointSelector):
@@ -130,6 +161,15 @@ class GaussianBiasSelector(ShootingPointSelector):
         l_s = self.collectivevariable(snapshot)
         return math.exp(-self.alpha * (l_s - self.l_0) ** 2)
 
+    def _biases(self, trajectory):
+        if type(self).f is not GaussianBiasSelector.f:
+            return super(GaussianBiasSelector, self)._biases(trajectory)
+
+        # evaluate the CV for the whole trajectory at once
+        l_s = np.asarray(self.collectivevariable(trajectory), float)
+        l_s = l_s.reshape(len(trajectory))
+        return np.exp(-self.alpha * (l_s - self.l_0) ** 2)
+
 
 class BiasedSelector(ShootingPointSelector):
     """General biased shooting point selector
@@ -149,6 +189,14 @@ class BiasedSelector(ShootingPointSelector):
     def f(self, snapshot, trajectory):
         return self.func(snapshot)
 
+    def _biases(self, trajectory):
+        if type(self).f is not BiasedSelector.f:
+            return super(BiasedSelector, self)._biases(trajectory)
+
+        # evaluate the CV for the whole trajectory at once
+        biases = np.asarray(self.func(trajectory), float)
+        return biases.reshape(len(trajectory))
+
 
 class UniformSelector(ShootingPointSelector):
     """
@@ -9,7 +9,7 @@ import time
 
 import openpathsampling as paths
 from openpathsampling.netcdfplus import NetCDFPlus, WeakLRUCache, ObjectStore, \
-    ImmutableDictStore, NamedObjectStore, PseudoAttributeStore
+    CacheBudget, ImmutableDictStore, NamedObjectStore, PseudoAttributeStore
 
 from .stores import SnapshotWrapperStore
 
@@ -159,7 +159,7 @@ class Storage(NetCDFPlus):
         self.cvs.sync_all()
         self.sync()
 
-    def set_caching_mode(self, mode='default'):
+    def set_caching_mode(self, mode='default', budget=None):
         r"""
         Set default values for all caches
 
@@ -167,10 +167,16 @@ class Storage(NetCDFPlus):
         ----------
         mode : str
             One of the following values is allowed `default`, `production`,
-            `analysis`, `off`, `lowmemory` and `memtest`
+            `analysis`, `off`, `lowmemory`, `memtest`, `unlimited` and
+            `adaptive`
+        budget : int or None
+            memory budget in bytes, required for mode `adaptive`. In this
+            mode the budget is shared by the stores that use LRU caches in
+            `default` mode and is periodically redistributed according to
+            the measured object sizes and cache hits. See
+            :class:`openpathsampling.netcdfplus.CacheBudget`
 
         """
-
         available_cache_sizes = {
             'default': self.default_cache_sizes,
             'analysis': self.analysis_cache_sizes,
@@ -181,7 +187,14 @@ class Storage(NetCDFPlus):
             'unlimited': self.unlimited_cache_sizes
         }
 
-        if mode in available_cache_sizes:
+        self.cache_budget = None
+        if mode == 'adaptive':
+            if budget is None:
+                raise ValueError(
+                    "mode 'adaptive' requires a memory budget in bytes")
+            self.cache_budget = CacheBudget(budget)
+            cache_sizes = self.adaptive_cache_sizes(self.cache_budget)
+        elif mode in available_cache_sizes:
             # We need cache sizes as a function. Otherwise we will reuse the
             # same caches for each storage and that will cause problems!
             cache_sizes = available_cache_sizes[mode]()
@@ -196,6 +209,28 @@ class Storage(NetCDFPlus):
                 store = getattr(self, store_name)
                 store.set_caching(caching)
 
+    def named_caches(self):
+        """
+        Return all caches of this storage by name
+
+        In addition to the caches of the stores, this contains the in-memory
+        value caches of all stored collective variables, named
+        ``cv.<name of the cv>``.
+
+        Returns
+        -------
+        OrderedDict of str: :class:`openpathsampling.netcdfplus.Cache`
+            the caches by name
+        """
+        caches = super(Storage, self).named_caches()
+        for idx, cv in enumerate(self.cvs):
+            name = 'cv.' + cv.name
+            if name in caches:
+                name += '.' + str(idx)
+            caches[name] = cv._cache_dict.cache
+
+        return caches
+
     def check_version(self):
         super(Storage, self).check_version()
         try:
@@ -222,6 +257,30 @@ class Storage(NetCDFPlus):
                 logger.info('Loaded version is older. Should be no problem '
                             'other then missing features and information')
 
+    @staticmethod
+    def adaptive_cache_sizes(budget):
+        """
+        Cache sizes for adaptive memory-budgeted caching
+
+        Like :meth:`default_cache_sizes`, but all LRU caches are replaced by
+        caches sharing the given budget.
+
+        Parameters
+        ----------
+        budget : :class:`openpathsampling.netcdfplus.CacheBudget`
+            the budget shared by the caches
+
+        Returns
+        -------
+        dict of str : class:`openpathsampling.netcdfplus.cache.Cache`
+            the cache instances for each store
+        """
+        cache_sizes = Storage.default_cache_sizes()
+        for store_name, caching in cache_sizes.items():
+            if isinstance(caching, WeakLRUCache):
+                cache_sizes[store_name] = budget.create_cache(store_name)
+        return cache_sizes
+
     @staticmethod
     def default_cache_sizes():
         """
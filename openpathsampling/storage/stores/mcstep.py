@@ -3,6 +3,9 @@ from openpathsampling.pathsimulators import MCStep
 
 
 class MCStepStore(VariableStore):
+    # analysis usually iterates over all steps; load them in chunks
+    readahead = 64
+
     def __init__(self):
         super(MCStepStore, self).__init__(
             MCStep,
@@ -210,4 +210,5 @@ class BaseSnapshotStore(IndexedObjectStore):
             return None
 
     def __len__(self):
+        self.storage.flush_batch()
         return len(self.storage.dimensions[self.prefix]) * 2
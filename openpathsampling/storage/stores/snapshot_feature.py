@@ -1,11 +1,23 @@
 import logging
 
+import numpy as np
+
 from .snapshot_base import BaseSnapshotStore
 
 logger = logging.getLogger(__name__)
 init_log = logging.getLogger('openpathsampling.initialization')
 
 
+def _read_rows(read, rows):
+    """Read rows in sorted order without duplicates and restore the order
+
+    netCDF reads are fastest (and only allowed) for increasing indices.
+    `read` is called with the sorted unique rows.
+    """
+    unique, inverse = np.unique(rows, return_inverse=True)
+    return np.asarray(read(unique))[inverse]
+
+
 class FeatureSnapshotStore(BaseSnapshotStore):
     """
     An ObjectStore for Snapshots in netCDF files.
@@ -29,6 +41,98 @@ class FeatureSnapshotStore(BaseSnapshotStore):
         [setattr(snapshot, attr, self.vars[attr][idx])
          for attr in self.storables]
 
+    def feature_as_numpy(self, feature, indices, atom_indices=None):
+        """
+        Return a numpy feature of several stored snapshots as one array
+
+        This reads directly from the storage and does not load snapshots.
+        Features stored in the snapshot table (like `coordinates` of toy
+        snapshots) are read from there; `coordinates` and `box_vectors`
+        can also be read from the statics and `velocities` from the
+        kinetics of the snapshots. Values are returned without units.
+
+        Parameters
+        ----------
+        feature : str
+            the name of the feature, e.g. `coordinates`
+        indices : list of int
+            the snapshot indices (as in the :class:`SnapshotWrapperStore`,
+            odd indices for reversed snapshots)
+        atom_indices : list of int or None
+            the atom indices to be included. If None all atoms are
+            returned. Ignored for `box_vectors`.
+
+        Returns
+        -------
+        numpy.ndarray or None
+            the feature values, first axis is the frame. None if the
+            feature cannot be read as an array from this store.
+        """
+        indices = np.asarray(indices, dtype=int)
+        try:
+            rows = np.array([self.index[pos] for pos in indices // 2],
+                            dtype=int)
+        except KeyError:
+            return None
+
+        if np.any(rows < 0):
+            return None
+
+        flip = (indices & 1).astype(bool)
+        if feature == 'box_vectors':
+            atom_indices = None
+
+        def read_variable(variable):
+            def read(unique):
+                if atom_indices is None:
+                    return variable[unique]
+                else:
+                    return variable[unique, atom_indices]
+            return read
+
+        if feature in self.variables:
+            values = _read_rows(read_variable(self.variables[feature]), rows)
+        elif feature in ['coordinates', 'box_vectors'] \
+                and 'statics' in self.variables:
+            statics = _read_rows(self.variables['statics'].__getitem__, rows)
+            if np.any(statics < 0):
+                return None
+
+            static_store = self.storage.stores[self.prefix + 'statics']
+            if feature == 'coordinates':
+                values = _read_rows(
+                    lambda unique: static_store.coordinates_as_numpy(
+                        unique, atom_indices),
+                    statics
+                )
+            else:
+                values = _read_rows(static_store.box_vectors_as_numpy,
+                                    statics)
+        elif feature == 'velocities' and 'kinetics' in self.variables:
+            kinetics = _read_rows(self.variables['kinetics'].__getitem__,
+                                  rows)
+            if np.any(kinetics < 0):
+                return None
+
+            is_reversed = _read_rows(
+                self.variables['is_reversed'].__getitem__, rows)
+            flip ^= is_reversed.astype(bool)
+            kinetic_store = self.storage.stores[self.prefix + 'kinetics']
+            values = _read_rows(
+                lambda unique: kinetic_store.velocities_as_numpy(
+                    unique, atom_indices),
+                kinetics
+            )
+            values[flip] *= -1
+            return values
+        else:
+            return None
+
+        if feature in self.snapshot_class.__features__.minus:
+            values[flip] *= -1
+
+        return values
+
     def initialize(self):
         super(FeatureSnapshotStore, self).initialize()
 
@@ -1,9 +1,15 @@
+import collections
+import concurrent.futures
+import contextlib
 import logging
 from uuid import UUID
 
+import numpy as np
+
 import openpathsampling.engines as peng
 from openpathsampling.netcdfplus import ObjectStore, \
-    NetCDFPlus, LoaderProxy
+    NetCDFPlus, LoaderProxy, ObjectJSON
+from openpathsampling.netcdfplus.stores.object import HashedList
 
 from .snapshot_feature import FeatureSnapshotStore
 from .snapshot_value import SnapshotValueStore
@@ -17,71 +23,97 @@ logger = logging.getLogger(__name__)
 init_log = logging.getLogger('openpathsampling.initialization')
 
 
-class ReversalHashedList(dict):
-    def __init__(self):
-        dict.__init__(self)
-        self._list = []
-
-    def append(self, key):
-        dict.__setitem__(self, key & ~1, len(self._list) * 2 ^ (key & 1))
-        self._list.append(key)
-
-    # noinspection PyCallByClass
-    def extend(self, t):
-        l = len(self._list)
-        # t = filter(t, lambda x : x not in self)
-        dict.update(
-            self,
-            map(lambda x, y: (x & ~1, y * 2 ^ (x & 1)), t, range(l, l + len(t)))
-        )
-        # map(lambda x, y: dict.__setitem__(self, x & ~1, y * 2 ^ (x & 1)), t,
-        #     range(l, l + len(t)))
-        self._list.extend(t)
+class ReversalHashedList(HashedList):
+    """
+    :class:`.HashedList` of snapshot pairs
+
+    A snapshot and its reversed partner (with the last bit of the UUID
+    flipped) share one position `pos`; their indices are `2 * pos` and
+    `2 * pos + 1`, with the last bit given by the saved UUID.
+    """
+    _ignored_bits = 1
 
     def __len__(self):
-        return len(self._list) * 2
-
-    def __setitem__(self, key, value):
-        # we will always store the ones with even keys
-        dict.__setitem__(self, key & ~1, value ^ (key & 1))
-        # we will always store the ones with even value
-        self._list[value // 2] = key ^ (value & 1)
-
-    def get(self, key, d=None):
-        uu = dict.get(self, key & ~1, d)
-        if uu is not None:
-            return uu ^ (key & 1)
-        else:
-            return d
+        return len(self.list) * 2
 
-    def __getitem__(self, key):
-        return dict.__getitem__(self, key & ~1) ^ (key & 1)
+    def _stored_value(self, pos):
+        return pos * 2 ^ (self._uuid_at(pos) & 1)
 
-    def __contains__(self, key):
-        return dict.__contains__(self, key & ~1)
+    def _result(self, value, uuid):
+        return value ^ (uuid & 1)
 
-    def index(self, key):
-        return self._list[key // 2] ^ (key & 1)
+    def _append_value(self, uuid):
+        return len(self.list) * 2 ^ (uuid & 1)
 
-    def mark(self, key):
-        k = key & ~1
-        if k not in self:
-            dict.__setitem__(self, k, -2)
+    def __setitem__(self, uuid, value):
+        if self.get(uuid) == value and self.index(value) == uuid:
+            return
+        self._set(self._key(uuid), value ^ (uuid & 1))
+        self._set_uuid_at(value // 2, uuid ^ (value & 1))
 
-    def unmark(self, key):
-        k = key & ~1
-        if k in self:
-            dict.__delitem__(self, k)
+    def index(self, value):
+        return self._uuid_at(value // 2) ^ (value & 1)
 
-    @property
-    def list(self):
-        return self._list
+
+# the CV evaluated by a backfill worker process, see `complete_cv`
+_backfill_cv = None
+
+
+def _init_backfill_worker(cv_json):
+    global _backfill_cv
+    _backfill_cv = ObjectJSON().from_json(cv_json)
+
+
+def _eval_backfill_block(snapshots):
+    return list(_backfill_cv._eval_dict(snapshots))
+
+
+def _write_rows(delegate, start, values):
+    """Write values to consecutive rows of a variable with a single call"""
+    batch = delegate._active_batch()
+    if batch is not None:
+        batch.flush(delegate)
+
+    delegate.variable[start:start + len(values)] = np.array(
+        [delegate.setter(value) for value in values])
+
+
+def _consecutive_runs(positions, values):
+    """Split increasing positions into runs of consecutive positions
+
+    Yields
+    ------
+    int
+        the first position of the run
+    list
+        the values for the positions of the run
+    """
+    run_start = None
+    run = []
+    for pos, value in zip(positions, values):
+        if run and pos != run_start + len(run):
+            yield run_start, run
+            run = []
+        if not run:
+            run_start = pos
+        run.append(value)
+
+    if run:
+        yield run_start, run
 
 
 class SnapshotWrapperStore(ObjectStore):
     """
     A Store to store arbitrary snapshots
+
+    Attributes
+    ----------
+    backfill_chunksize : int
+        number of snapshot pairs processed at once when the values of a CV
+        are computed for all stored snapshots, see :meth:`complete_cv`
     """
+    backfill_chunksize = 1024
+
     def __init__(self):
         super(SnapshotWrapperStore, self).__init__(
             peng.BaseSnapshot,
@@ -209,7 +241,7 @@ class SnapshotWrapperStore(ObjectStore):
         return obj
 
     def _load(self, idx):
-        store_idx = int(self.variables['store'][idx // 2])
+        store_idx = int(self.vars['store'][idx // 2])
 
         if store_idx < 0:
             if self.fallback_store is not None:
@@ -225,6 +257,7 @@ class SnapshotWrapperStore(ObjectStore):
             return snap
 
     def __len__(self):
+        self.storage.flush_batch()
         return len(self.storage.dimensions[self.prefix]) * 2
 
     def initialize(self):
@@ -299,6 +332,43 @@ class SnapshotWrapperStore(ObjectStore):
             self.type_list[store.descriptor] = (store, idx)
             self.store_snapshot_list.append(store)
 
+    def feature_as_numpy(self, feature, uuids, atom_indices=None):
+        """
+        Return a numpy feature of several stored snapshots as one array
+
+        Parameters
+        ----------
+        feature : str
+            the name of the feature, e.g. `coordinates`
+        uuids : list of int
+            the UUIDs of the snapshots
+        atom_indices : list of int or None
+            the atom indices to be included. If None all atoms are returned
+
+        Returns
+        -------
+        numpy.ndarray or None
+            the feature values, first axis is the frame. None if not all
+            snapshots are stored in the same snapshot store, or if that
+            store cannot read the feature as an array.
+
+        See also
+        --------
+        :meth:`.FeatureSnapshotStore.feature_as_numpy`
+        """
+        indices = [self.index.get(uuid) for uuid in uuids]
+        if len(indices) == 0 or None in indices or min(indices) < 0:
+            return None
+
+        indices = np.array(indices, dtype=int)
+        positions = np.unique(indices // 2)
+        store_indices = np.unique(self.variables['store'][positions])
+        if len(store_indices) != 1 or store_indices[0] < 0:
+            return None
+
+        store = self.store_snapshot_list[int(store_indices[0])]
+        return store.feature_as_numpy(feature, indices, atom_indices)
+
     def mention(self, snapshot):
         """
         Save a shallow copy
@@ -325,8 +395,8 @@ class SnapshotWrapperStore(ObjectStore):
 
         if n_idx is not None:
             # snapshot is mentioned
-            store_idx = int(self.variables['store'][n_idx // 2])
-            if not store_idx == -1:
+            store_idx = self.vars['store'][n_idx // 2]
+            if store_idx is not None:
                 # and stored
                 return self.reference(obj)
 
@@ -438,87 +508,220 @@ class SnapshotWrapperStore(ObjectStore):
                         cv_store.vars['value'][n_idx] = value
                         cv_store.cache[n_idx] = value
 
-    def complete_cv(self, cv):
+    def complete_cv(self, cv, n_processes=1, chunksize=None,
+                    progress=None):
         """
         Compute all missing values of a CV and store them
 
+        The stored snapshots are processed in blocks of `chunksize` snapshot
+        pairs. For each block, the snapshots without a stored value are
+        loaded, the CV is evaluated for all of them at once (with a single
+        call for CVs that accept lists), and the values are written to
+        consecutive rows of the value store. After each block the storage is
+        synced, so an interrupted run loses at most one block: calling
+        `complete_cv` again resumes with the values that are still missing.
 
         Parameters
         ----------
         cv : :obj:`openpathsampling.CollectiveVariable`
-
-
+            the CV to complete. Nothing is done if the CV has no disk cache
+            or a disk cache in complete mode (which is filled when created)
+        n_processes : int
+            number of worker processes that evaluate the CV. For more than
+            one process, the CV must be serializable by
+            :class:`openpathsampling.netcdfplus.ObjectJSON` and the
+            snapshots must be picklable. Default is 1, which evaluates the
+            CV in this process
+        chunksize : int or None
+            number of snapshot pairs per block; `None` (default) uses
+            :attr:`backfill_chunksize`
+        progress : callable or None
+            called as ``progress(n_done, n_total)`` with the number of
+            processed snapshot pairs after each block. If `None` (default),
+            the progress is logged
         """
         if cv not in self.attribute_list:
             return
 
         cv_store = self.attribute_list[cv]
 
-        if cv_store.allow_incomplete:
+        if not cv_store.allow_incomplete:
             # for complete this does not make sense
+            return
 
-            # TODO: Make better looping over this to not have
-            # to load all the indices at once
-            # can be problematic for 10M+ stored snapshots
-            indices = self.vars['uuid'][:]
+        if chunksize is None:
+            chunksize = self.backfill_chunksize
+
+        n_pairs = len(self) // 2
+        blocks = self._missing_cv_blocks(cv_store, n_pairs, chunksize)
+        for stop, positions, values in self._backfill_values(
+                cv, blocks, n_processes):
+            positions, values = self._computed(positions, values)
+            if positions:
+                self._append_cv_values(cv_store, positions, values)
+
+            self.storage.sync()
+            if progress is not None:
+                progress(stop, n_pairs)
+            else:
+                logger.info('Completed CV %s for %d of %d snapshot pairs',
+                            cv.name, stop, n_pairs)
 
-            for pos, idx in enumerate(indices):
-                if not cv_store.time_reversible:
-                    pos *= 2
+    @staticmethod
+    def _missing_cv_blocks(cv_store, n_pairs, chunksize):
+        # yield the positions without a stored value in each block of
+        # snapshot pairs together with the indices of their snapshots. For
+        # complete stores (which have no index) these are all positions
+        for start in range(0, n_pairs, chunksize):
+            stop = min(start + chunksize, n_pairs)
+            if cv_store.time_reversible:
+                positions = [pos for pos in range(start, stop)
+                             if pos not in cv_store.index]
+                snapshot_idxs = [2 * pos for pos in positions]
+            else:
+                positions = [pos for pos in range(2 * start, 2 * stop)
+                             if pos not in cv_store.index]
+                snapshot_idxs = positions
 
-                proxy = None
+            yield stop, positions, snapshot_idxs
 
-                if pos not in cv_store.index:
-                    # this value is not stored to go ahead
+    def _backfill_values(self, cv, blocks, n_processes):
+        """
+        Evaluate a CV for blocks of stored snapshots
 
-                    proxy = self.storage.snapshots[idx]
+        Values that are in the cache of the CV are not computed again. With
+        more than one process, up to two blocks per process are evaluated at
+        the same time. The results are returned in the order of the blocks.
 
-                    # get from cache first, this is fastest
-                    value = cv._cache_dict._get(proxy)
+        Parameters
+        ----------
+        cv : :obj:`openpathsampling.CollectiveVariable`
+        blocks : iterable of (object, list of int, list of int)
+            for each block some tag, the positions of the values and the
+            indices of the snapshots
+        n_processes : int
+            number of worker processes; 1 evaluates in this process
+
+        Yields
+        ------
+        object
+            the tag of the block
+        list of int
+            the positions
+        list
+            the value for each position, `None` if it cannot be computed
+        """
+        executor = None
+        if n_processes > 1 and cv._eval_dict:
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=n_processes,
+                initializer=_init_backfill_worker,
+                initargs=(ObjectJSON().to_json(cv),)
+            )
 
-                    if value is None:
-                        # not in cache so compute it if possible
-                        if cv._eval_dict:
-                            value = cv._eval_dict([proxy])[0]
-                        else:
-                            value = None
+        pending = collections.deque()
 
-                    if value is not None:
-                        n_idx = cv_store.free()
+        def finish(block):
+            tag, positions, values, missing, future = block
+            if future is not None:
+                for n, value in zip(missing, future.result()):
+                    values[n] = value
+            return tag, positions, values
 
-                        cv_store.vars['value'][n_idx] = value
-                        cv_store.vars['index'][n_idx] = pos
-                        cv_store.index[pos] = n_idx
-                        cv_store.cache[n_idx] = value
+        try:
+            for tag, positions, snapshot_idxs in blocks:
+                with self._buffered_rows(snapshot_idxs):
+                    snapshots = [self.load(idx) for idx in snapshot_idxs]
+                values = [
+                    None if snap is None else cv._cache_dict._get(snap)
+                    for snap in snapshots
+                ]
+                missing = [n for n, (snap, value)
+                           in enumerate(zip(snapshots, values))
+                           if snap is not None and value is None]
+
+                future = None
+                if missing and cv._eval_dict:
+                    to_eval = [snapshots[n] for n in missing]
+                    if executor is None:
+                        for n, value in zip(missing, cv._eval_dict(to_eval)):
+                            values[n] = value
+                    else:
+                        future = executor.submit(_eval_backfill_block,
+                                                 to_eval)
 
-                if not cv_store.time_reversible:
-                    pos += 1
-                    if pos not in cv_store.index:
-                        if proxy is None:
-                            proxy = self.storage.snapshots[idx]
+                pending.append((tag, positions, values, missing, future))
+                if len(pending) > 2 * n_processes:
+                    yield finish(pending.popleft())
 
-                        if proxy._reversed is not None:
-                            proxy = proxy._reversed
-                        else:
-                            proxy = proxy.reversed
+            while pending:
+                yield finish(pending.popleft())
+
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
 
-                        # get from cache first, this is fastest
-                        value = cv._cache_dict._get(proxy)
+    @contextlib.contextmanager
+    def _buffered_rows(self, snapshot_idxs):
+        """
+        Read the rows of many snapshots with a few large reads
+
+        While in this context, the rows of the given snapshots (in this
+        store and in the stores of the snapshot types) are in the read
+        buffer of the storage, so loading the snapshots reads no single rows.
+
+        Parameters
+        ----------
+        snapshot_idxs : iterable of int
+            the indices of the snapshots to load
+        """
+        read_buffer = self.storage._read_buffer
+        store_delegate = self.vars['store']
+        pairs = sorted({idx // 2 for idx in snapshot_idxs})
+        buffered = [(store_delegate, read_buffer.read(store_delegate, pairs))]
+        try:
+            rows = collections.defaultdict(list)
+            for pos in pairs:
+                store_idx = int(store_delegate.getter(
+                    read_buffer.get(store_delegate, pos)))
+                if store_idx >= 0:
+                    store = self.store_snapshot_list[store_idx]
+                    n_idx = store.index.get(pos)
+                    if n_idx is not None and n_idx >= 0:
+                        rows[store].append(n_idx)
+
+            for store, n_idxs in rows.items():
+                n_idxs.sort()
+                for delegate in store._row_delegates():
+                    buffered.append(
+                        (delegate, read_buffer.read(delegate, n_idxs)))
+
+            yield
+        finally:
+            for delegate, added in buffered:
+                read_buffer.drop(delegate, added)
 
-                        if value is None:
-                            # not in cache so compute it if possible
-                            if cv._eval_dict:
-                                value = cv._eval_dict([proxy])[0]
-                            else:
-                                value = None
+    @staticmethod
+    def _computed(positions, values):
+        # drop the positions without value
+        computed = [(pos, value) for pos, value in zip(positions, values)
+                    if value is not None]
+        if not computed:
+            return [], []
+        positions, values = zip(*computed)
+        return list(positions), list(values)
 
-                        if value is not None:
-                            n_idx = cv_store.free()
+    @staticmethod
+    def _append_cv_values(cv_store, positions, values):
+        # append values of an incomplete CV store with one write per variable
+        n_idx = cv_store.free()
+        _write_rows(cv_store.vars['value'], n_idx, values)
+        _write_rows(cv_store.vars['index'], n_idx, positions)
+        for offset, pos in enumerate(positions):
+            cv_store.index[pos] = n_idx + offset
 
-                            cv_store.vars['value'][n_idx] = value
-                            cv_store.vars['index'][n_idx] = pos
-                            cv_store.index[pos] = n_idx
-                            cv_store.cache[n_idx] = value
+        cv_store._len = n_idx + len(values)
+        cv_store.cache.update_size()
 
     def sync_cv(self, cv):
         """
@@ -685,24 +888,12 @@ class SnapshotWrapperStore(ObjectStore):
 
         # use the cache and function of the CV to fill the store when it is made
         if not allow_incomplete:
-
-            indices = self.vars['uuid'][:]
-
-            for pos, idx in enumerate(indices):
-
-                proxy = LoaderProxy.new(self.storage.snapshots, idx)
-                value = cv._cache_dict._get(proxy)
-
-                if value is None:
-                    # not in cache so compute it if possible
-                    if cv._eval_dict:
-                        value = cv._eval_dict([proxy])[0]
-                    else:
-                        value = None
-
-                if value is not None:
-                    store.vars['value'][pos] = value
-                    store.cache[pos] = value
+            blocks = self._missing_cv_blocks(
+                store, len(self) // 2, self.backfill_chunksize)
+            for _, positions, values in self._backfill_values(cv, blocks, 1):
+                positions, values = self._computed(positions, values)
+                for start, run in _consecutive_runs(positions, values):
+                    _write_rows(store.vars['value'], start, run)
 
         cv.set_cache_store(store)
         return store
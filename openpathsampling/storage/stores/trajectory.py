@@ -1,4 +1,5 @@
 from openpathsampling.engines.trajectory import Trajectory
+from openpathsampling.engines.array_trajectory import ArrayTrajectory
 from openpathsampling.netcdfplus import ObjectStore, LoaderProxy
 
 
@@ -11,6 +12,10 @@ class TrajectoryStore(ObjectStore):
 
     def _save(self, trajectory, idx):
         self.vars['snapshots'][idx] = trajectory
+        if isinstance(trajectory, ArrayTrajectory):
+            # the frame data is held by the arrays; proxies would not help
+            return
+
         store = self.storage.snapshots
 
         for frame, snapshot in enumerate(trajectory.iter_proxies()):
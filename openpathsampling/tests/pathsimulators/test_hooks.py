@@ -23,6 +23,8 @@ from ..test_helpers import (
     assert_items_equal
 )
 
+import pandas as pd
+
 import openpathsampling as paths
 
 from openpathsampling.beta.hooks import *
@@ -225,7 +227,7 @@ class TestSelfOrSimProperty(object):
 class TestStorageHook(object):
     def setup_method(self):
         self.storage = MagicMock(spec=["stash", "sync_all"])
-        self.old_storage = MagicMock(spec=["save", "sync_all"])
+        self.old_storage = MagicMock(spec=["save", "sync_all", "batch"])
         self.empty_hook = StorageHook()
         self.hook = StorageHook(storage=self.storage,
                                 frequency=10)
@@ -262,6 +264,24 @@ class TestStorageHook(object):
         self.hook.after_simulation(self.simulation, {})
         self.storage.sync_all.assert_called_once()
 
+    @pytest.mark.parametrize("hook_name", ["new_storage", "old_storage"])
+    def test_background(self, hook_name):
+        storage = {"new_storage": self.storage,
+                   "old_storage": self.old_storage}[hook_name]
+        hook = StorageHook(storage=storage, frequency=2, background=True)
+        hook.before_simulation(self.simulation)
+        for step_num in range(1, 6):
+            hook.after_step(self.simulation, step_num, ('step', 'info'),
+                            ('state'), "results", "hook_state")
+        hook.after_simulation(self.simulation, {})
+        assert hook._writer is None
+        if hook_name == "new_storage":
+            assert storage.stash.call_count == 5
+        elif hook_name == "old_storage":
+            assert storage.save.call_count == 5
+        # steps 2 and 4, and after the simulation
+        assert storage.sync_all.call_count == 3
+
 
 class TestShootFromSnapshotsOutputHook(object):
     def setup_method(self):
@@ -315,6 +335,48 @@ class TestSampleSetSanityCheckHook(object):
             assert not self.simulation.sample_set.sanity_check.called
 
 
+class TestCacheStatisticsHook(object):
+    def setup_method(self):
+        self.storage = MagicMock(spec=["enable_cache_statistics",
+                                       "cache_report"])
+        self.storage.cache_report.side_effect = \
+            lambda: pd.DataFrame({'hits': [1]}, index=['samples'])
+        self.simulation = MagicMock(storage=self.storage,
+                                    save_frequency=10)
+        self.empty_hook = CacheStatisticsHook()
+        self.hook = CacheStatisticsHook(storage=self.storage, frequency=10)
+
+    @pytest.mark.parametrize('hook_name', ['empty', 'std'])
+    def test_before_simulation(self, hook_name):
+        hook = {'empty': self.empty_hook,
+                'std': self.hook}[hook_name]
+        hook.before_simulation(self.simulation)
+        assert hook.storage is self.storage
+        assert hook.frequency == 10
+        self.storage.enable_cache_statistics.assert_called_once()
+
+    @pytest.mark.parametrize('step_num', [0, 5, 10])
+    def test_after_step(self, step_num):
+        self.hook.before_simulation(self.simulation)
+        self.hook.after_step(self.simulation, step_num, ('step', 'info'),
+                             ('state'), "results", "hook_state")
+        if step_num in [0, 10]:
+            assert [step for step, _ in self.hook.reports] == [step_num]
+        else:
+            assert self.hook.reports == []
+
+    def test_simulation(self):
+        sim = TrivialPathSimulator(storage=self.storage)
+        sim.save_frequency = 10
+        sim.attach_hook(self.empty_hook)
+        sim.run(15)
+        # sampled at steps 0 and 10 and at the end of the simulation
+        assert [step for step, _ in self.empty_hook.reports] == [0, 10, 14]
+        history = self.empty_hook.history
+        assert list(history.index) == [(0, 'samples'), (10, 'samples'),
+                                       (14, 'samples')]
+
+
 class TestLiveVisualizerHook(object):
     def setup_method(self):
         self.live_visualizer = MagicMock()
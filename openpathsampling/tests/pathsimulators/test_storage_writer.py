@@ -0,0 +1,198 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+try:
+    from unittest.mock import MagicMock
+except ImportError:
+    from mock import MagicMock
+
+import openpathsampling as paths
+import openpathsampling.engines.toy as toys
+from openpathsampling.beta.hooks import StorageHook, PathSimulatorHook
+from openpathsampling.engines import dynamics_engine
+from openpathsampling.beta.storage_writer import BackgroundStorageWriter
+
+from ..test_helpers import make_1d_traj
+
+
+class TestBackgroundStorageWriter(object):
+    def setup_method(self):
+        self.storage = MagicMock(spec=["stash", "sync_all", "close"])
+
+    def test_order(self):
+        calls = []
+        self.storage.stash.side_effect = lambda obj: calls.append(obj)
+        self.storage.sync_all.side_effect = lambda: calls.append('sync')
+        writer = BackgroundStorageWriter(self.storage)
+        writer.save(1)
+        writer.save(2)
+        writer.sync_all()
+        writer.save(3)
+        writer.flush()
+        assert calls == [1, 2, 'sync', 3]
+        writer.close()
+        assert not writer.is_alive
+        self.storage.close.assert_called_once()
+
+    def test_backpressure(self):
+        release = threading.Event()
+        self.storage.stash.side_effect = lambda obj: release.wait()
+        writer = BackgroundStorageWriter(self.storage, maxsize=1)
+        writer.save(1)  # taken by the writer, which then waits
+        writer.save(2)  # fills the queue
+        blocked = threading.Thread(target=writer.save, args=(3,))
+        blocked.start()
+        blocked.join(0.2)
+        assert blocked.is_alive()
+        release.set()
+        blocked.join()
+        writer.stop()
+        assert self.storage.stash.call_count == 3
+
+    def test_error(self):
+        self.storage.stash.side_effect = ValueError("failed")
+        writer = BackgroundStorageWriter(self.storage)
+        writer.save(1)
+        writer.sync_all()
+        with pytest.raises(ValueError):
+            writer.flush()
+        # after an error, queued operations are skipped
+        self.storage.sync_all.assert_not_called()
+        writer.stop()
+        with pytest.raises(RuntimeError):
+            writer.save(2)
+
+    def test_netcdf_storage(self, tmpdir):
+        filename = str(tmpdir.join("writer.nc"))
+        trajs = [make_1d_traj(coordinates=[0.1 * i, 0.2],
+                              velocities=[1.0, 1.0])
+                 for i in range(3)]
+        writer = BackgroundStorageWriter(paths.Storage(filename, 'w'))
+        for traj in trajs:
+            writer.save(traj)
+        writer.sync_all()
+        writer.close()
+
+        storage = paths.Storage(filename, 'r')
+        assert list(storage.trajectories) == trajs
+        storage.close()
+
+
+class TestBackgroundPathSampling(object):
+    def setup_method(self):
+        pes = toys.LinearSlope(m=[0.0], c=0.0)
+        topology = toys.Topology(n_spatial=1, masses=[1.0], pes=pes)
+        integ = toys.LeapfrogVerletIntegrator(dt=0.1)
+        self.engine = toys.Engine(
+            options={'integ': integ, 'n_frames_max': 100,
+                     'n_steps_per_frame': 1},
+            topology=topology
+        )
+        cv = paths.FunctionCV("x", lambda s: s.xyz[0][0])
+        state_A = paths.CVDefinedVolume(cv, float("-inf"), 0.0)
+        self.ensembles = [
+            paths.TISEnsemble(state_A,
+                              paths.CVDefinedVolume(cv, 1.0, float("inf")),
+                              paths.CVDefinedVolume(cv, float("-inf"),
+                                                    lambda_max))
+            for lambda_max in [0.3, 0.5]
+        ]
+        traj = paths.Trajectory([
+            toys.Snapshot(coordinates=np.array([[x]]),
+                          velocities=np.array([[1.0]]),
+                          engine=self.engine)
+            for x in [-0.05, 0.05, 0.15, 0.25, 0.35, 0.45, 0.55, 0.65,
+                      0.75, 0.85, 0.95, 1.05]
+        ])
+        self.sample_set = paths.SampleSet([
+            paths.Sample(replica=replica, trajectory=traj, ensemble=ens)
+            for replica, ens in enumerate(self.ensembles)
+        ])
+
+    def _simulation(self, filename, background):
+        # the same random numbers for all runs
+        np.random.seed(0)
+        movers = [
+            paths.TwoWayShootingMover(
+                ensemble=ens, selector=paths.UniformSelector(),
+                modifier=paths.RandomVelocities(beta=1.0),
+                engine=self.engine
+            )
+            for ens in self.ensembles
+        ]
+        scheme = paths.LockedMoveScheme(
+            root_mover=paths.SequentialMover(movers)
+        )
+        tree = scheme.root_mover.depth_pre_order(lambda m: m)
+        for seed, (_, mover) in enumerate(tree):
+            for obj in [mover, getattr(mover, 'selector', None)]:
+                if hasattr(obj, '_rng'):
+                    obj._rng = np.random.default_rng(seed)
+        storage = paths.Storage(filename, 'w')
+        sim = paths.PathSampling(storage=storage, move_scheme=scheme,
+                                 sample_set=self.sample_set)
+        sim.output_stream = open(os.devnull, 'w')
+        sim.hooks = sim.empty_hooks()
+        sim.attach_hook(StorageHook(frequency=3, background=background))
+        return sim
+
+    def _run(self, filename, background):
+        sim = self._simulation(filename, background)
+        sim.run(10)
+        sim.storage.close()
+
+    def test_matches_synchronous_run(self, tmpdir):
+        filenames = [str(tmpdir.join(name + ".nc"))
+                     for name in ["sync", "background"]]
+        self._run(filenames[0], background=False)
+        self._run(filenames[1], background=True)
+        storages = [paths.Storage(filename, 'r') for filename in filenames]
+        steps_sync, steps_background = [list(s.steps) for s in storages]
+        assert len(steps_sync) == len(steps_background) == 11
+        for step_sync, step_background in zip(steps_sync, steps_background):
+            assert step_sync.mccycle == step_background.mccycle
+            assert (step_sync.change.accepted
+                    == step_background.change.accepted)
+            samples_sync = sorted(step_sync.active, key=lambda s: s.replica)
+            samples_background = sorted(step_background.active,
+                                        key=lambda s: s.replica)
+            for samp_sync, samp_background in zip(samples_sync,
+                                                  samples_background):
+                assert samp_sync.replica == samp_background.replica
+                np.testing.assert_allclose(samp_sync.trajectory.xyz,
+                                           samp_background.trajectory.xyz)
+        for storage in storages:
+            storage.close()
+
+    def test_rerun_after_interrupt(self, tmpdir):
+        sim = self._simulation(str(tmpdir.join("rerun.nc")), True)
+        storage_hook = sim.hooks['after_step'][0].__self__
+
+        class InterruptHook(PathSimulatorHook):
+            implemented_for = ['after_step']
+
+            def after_step(self, sim, step_number, step_info, state,
+                           results, hook_state):
+                if step_number == 3:
+                    raise KeyboardInterrupt()
+
+        interrupt = InterruptHook()
+        sim.attach_hook(interrupt)
+        with pytest.raises(KeyboardInterrupt):
+            sim.run(10)
+        old_writer = storage_hook._writer
+        assert old_writer.is_alive
+
+        sim.hooks['after_step'].remove(interrupt.after_step)
+        sim.run(2)
+        # the writer of the interrupted run is stopped and let go of
+        assert not old_writer.is_alive
+        assert dynamics_engine._dynamics_contexts.contexts == []
+        free = threading.Thread(target=old_writer.lock.acquire)
+        free.start()
+        free.join(1.0)
+        assert not free.is_alive()
+        assert len(sim.storage.steps) == 6
+        sim.storage.close()
@@ -0,0 +1,148 @@
+import pickle
+
+import numpy as np
+import pytest
+
+import openpathsampling as paths
+import openpathsampling.engines.toy as toys
+from openpathsampling.engines.array_trajectory import ArrayTrajectory
+
+from .test_helpers import md
+
+
+class TestArrayTrajectory(object):
+    def setup_method(self):
+        topology = toys.Topology(n_spatial=2, masses=[1.0, 1.0], pes=None,
+                                 n_atoms=2)
+        self.engine = toys.Engine({}, topology)
+        xs = [-0.5, 0.1, 0.6, 1.2, 0.7, 0.3, -0.2]
+        self.coordinates = np.array([[[x, 0.0], [0.0, x]] for x in xs])
+        self.velocities = np.array([[[1.0, float(i)], [-1.0, 0.5]]
+                                    for i in range(len(xs))])
+        self.traj = ArrayTrajectory(self.coordinates, self.velocities,
+                                    engine=self.engine)
+
+    def test_snapshots_are_views(self):
+        assert len(self.traj) == 7
+        for frame, snap in enumerate(self.traj):
+            assert isinstance(snap, toys.Snapshot)
+            assert snap.engine is self.engine
+            assert np.shares_memory(snap.coordinates, self.coordinates)
+            np.testing.assert_array_equal(snap.coordinates,
+                                          self.coordinates[frame])
+            np.testing.assert_array_equal(snap.velocities,
+                                          self.velocities[frame])
+
+    def test_arrays(self):
+        assert self.traj.coordinates_as_numpy() is self.coordinates
+        assert self.traj.xyz is self.coordinates
+        np.testing.assert_array_equal(self.traj.coordinates_as_numpy([1]),
+                                      self.coordinates[:, [1]])
+        assert self.traj.box_vectors_as_numpy() is None
+
+    def test_slicing(self):
+        part = self.traj[2:6:2]
+        assert isinstance(part, ArrayTrajectory)
+        assert list(part) == [self.traj[2], self.traj[4]]
+        np.testing.assert_array_equal(part.xyz, self.coordinates[2:6:2])
+        assert np.shares_memory(part.xyz, self.coordinates)
+        assert type(self.traj[[0, 1]]) is paths.Trajectory
+        assert type(self.traj + self.traj) is paths.Trajectory
+
+    def test_reversed(self):
+        rev = self.traj.reversed
+        assert isinstance(rev, ArrayTrajectory)
+        assert list(rev) == list(reversed(self.traj))
+        assert list(rev.reversed) == list(self.traj)
+        np.testing.assert_array_equal(rev.xyz, self.coordinates[::-1])
+        np.testing.assert_array_equal(rev.velocities_as_numpy(),
+                                      -self.velocities[::-1])
+        for frame, snap in enumerate(rev):
+            np.testing.assert_array_equal(snap.velocities,
+                                          -self.velocities[::-1][frame])
+            assert snap.__uuid__ == self.traj[-1 - frame].reverse_uuid()
+
+    def test_reversed_is_view(self):
+        rev = self.traj.reversed
+        assert np.shares_memory(rev.xyz, self.coordinates)
+        twice = rev.reversed.velocities_as_numpy()
+        assert np.shares_memory(twice, self.velocities)
+        np.testing.assert_array_equal(twice, self.velocities)
+        np.testing.assert_array_equal(rev[1:3].velocities_as_numpy(),
+                                      -self.velocities[::-1][1:3])
+        # reversed snapshots are only created once
+        assert list(self.traj.reversed) == list(rev)
+
+    def test_immutable(self):
+        with pytest.raises(TypeError):
+            self.traj.append(self.traj[0])
+        with pytest.raises(TypeError):
+            self.traj[0] = self.traj[1]
+        mutable = paths.Trajectory(self.traj)
+        mutable.append(self.traj[0])
+        assert len(mutable) == 8
+
+    def test_from_trajectory(self):
+        traj = paths.Trajectory([
+            toys.Snapshot(coordinates=c, velocities=v, engine=self.engine)
+            for c, v in zip(self.coordinates, self.velocities)
+        ])
+        array_traj = ArrayTrajectory.from_trajectory(traj)
+        assert [s.__uuid__ for s in array_traj] == \
+            [s.__uuid__ for s in traj]
+        np.testing.assert_array_equal(array_traj.xyz, self.coordinates)
+        assert ArrayTrajectory.from_trajectory(array_traj) is array_traj
+
+    def test_no_snapshot_class(self):
+        with pytest.raises(ValueError):
+            ArrayTrajectory(self.coordinates)
+
+    def test_pickle(self):
+        copy = pickle.loads(pickle.dumps(self.traj))
+        assert isinstance(copy, ArrayTrajectory)
+        assert copy.__uuid__ == self.traj.__uuid__
+        np.testing.assert_array_equal(copy.xyz, self.coordinates)
+
+    def test_ensembles(self):
+        cv = paths.FunctionCV("x", lambda s: s.xyz[0][0])
+        state_a = paths.CVDefinedVolume(cv, float("-inf"), 0.0)
+        interface = paths.CVDefinedVolume(cv, float("-inf"), 0.5)
+        state_b = paths.CVDefinedVolume(cv, 1.0, float("inf"))
+        ensemble = paths.TISEnsemble(state_a, state_b, interface)
+        tis = self.traj[:4]
+        assert ensemble(tis)
+        assert not ensemble(self.traj)
+        assert ensemble.split(self.traj) == [tis]
+        assert paths.AllOutXEnsemble(state_a)(self.traj[1:6])
+
+    def test_storage(self, tmpdir):
+        filename = str(tmpdir.join("array_traj.nc"))
+        storage = paths.Storage(filename, 'w')
+        storage.save(self.traj)
+        storage.close()
+
+        storage = paths.Storage(filename, 'r')
+        loaded = storage.trajectories[0]
+        assert [s.__uuid__ for s in loaded.iter_proxies()] == \
+            [s.__uuid__ for s in self.traj]
+        np.testing.assert_allclose(loaded.xyz, self.coordinates)
+        np.testing.assert_allclose(
+            ArrayTrajectory.from_trajectory(loaded).velocities_as_numpy(),
+            self.velocities
+        )
+        storage.close()
+
+    def test_to_mdtraj(self):
+        if not md:
+            pytest.skip("mdtraj not installed")
+        topology = toys.Topology(n_spatial=3, masses=[1.0], pes=None)
+        engine = toys.Engine({}, topology)
+        coordinates = np.random.random((5, 1, 3)).astype(np.float32)
+        traj = ArrayTrajectory(coordinates, engine=engine)
+        md_topology = md.Topology()
+        md_topology.add_atom('C', md.element.carbon,
+                             md_topology.add_residue(
+                                 'X', md_topology.add_chain()))
+        mdtraj = traj.to_mdtraj(md_topology)
+        np.testing.assert_array_equal(mdtraj.xyz, coordinates)
+        assert np.shares_memory(mdtraj.xyz, coordinates)
@@ -0,0 +1,342 @@
+import numpy as np
+import pytest
+
+import openpathsampling as paths
+from openpathsampling.netcdfplus import AdaptiveLRUCache, CacheBudget, \
+    object_nbytes, LRUCache, WeakLRUCache, MaxCache, NoCache, \
+    WeakValueCache, WeakKeyCache, LRUChunkLoadingCache, IndexedArrayCache
+
+from .test_helpers import make_1d_traj
+
+
+class Payload(object):
+    def __init__(self, n_values):
+        self.values = np.zeros(n_values)
+
+
+class TestCacheStatistics(object):
+    @pytest.mark.parametrize('cache_cls', [LRUCache, WeakLRUCache, MaxCache,
+                                           WeakValueCache])
+    def test_hits_and_misses(self, cache_cls):
+        cache = cache_cls(10) if 'LRU' in cache_cls.__name__ else cache_cls()
+        obj = Payload(10)
+        cache[0] = obj
+        cache[0]
+        assert cache.stats is None
+        assert 'hits' not in cache.statistics()
+
+        cache.enable_statistics()
+        cache[0]
+        with pytest.raises(KeyError):
+            cache[1]
+        stats = cache.statistics()
+        assert (stats['hits'], stats['misses']) == (1, 1)
+        assert stats['hit_rate'] == 0.5
+        assert stats['cache'] == cache_cls.__name__
+
+        cache.disable_statistics()
+        cache[0]
+        assert cache.stats is None
+
+    def test_no_cache(self):
+        cache = NoCache()
+        cache.enable_statistics()
+        with pytest.raises(KeyError):
+            cache[0]
+        assert cache.stats.misses == 1
+
+    def test_weak_key_cache(self):
+        cache = WeakKeyCache()
+        cache.enable_statistics()
+        key = Payload(10)
+        cache[key] = np.zeros(100)
+        assert cache[key] is not None
+        with pytest.raises(KeyError):
+            cache[Payload(10)]
+        stats = cache.statistics()
+        assert (stats['hits'], stats['misses']) == (1, 1)
+        # the values are held by the cache
+        assert stats['nbytes'] >= 800
+
+    def test_weak_lru_evictions_and_resurrections(self):
+        cache = WeakLRUCache(2)
+        cache.enable_statistics()
+        objects = [Payload(10) for _ in range(3)]
+        for idx, obj in enumerate(objects):
+            cache[idx] = obj
+        assert cache.stats.evictions == 1
+        assert cache[0] is objects[0]
+        assert cache.stats.resurrections == 1
+        assert cache.stats.hits == 1
+        assert cache.stats.evictions == 2
+
+    def test_lru_evictions(self):
+        cache = LRUCache(2)
+        cache.enable_statistics()
+        for idx in range(5):
+            cache[idx] = Payload(1)
+        assert cache.stats.evictions == 3
+        assert cache.nbytes() > 0
+
+    def test_chunk_loading_cache(self):
+        cache = LRUChunkLoadingCache(chunksize=2, max_chunks=1,
+                                     variable=list(range(6)))
+        cache.enable_statistics()
+        assert cache[0] == 0
+        assert cache[1] == 1
+        assert cache[2] == 2
+        assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+        assert cache.stats.evictions == 2
+
+    def test_transfer(self):
+        old = WeakLRUCache(10)
+        old.enable_statistics()
+        old[0] = Payload(1)
+        old[0]
+        new = LRUCache(10).transfer(old)
+        assert new.stats is old.stats
+        assert new.stats.hits == 1
+        assert NoCache().transfer(old).stats is old.stats
+
+
+class Keyed(object):
+    def __init__(self, uuid):
+        self.__uuid__ = uuid
+
+
+class TestIndexedArrayCache(object):
+    def setup_method(self):
+        self.keys = [Keyed(uuid) for uuid in range(10, 16)]
+        # pairs of (object, reversed object) as in the snapshot store
+        self.index = {key.__uuid__: idx for idx, key in enumerate(self.keys)}
+        self.cache = IndexedArrayCache(self.index)
+
+    def test_values(self):
+        cache = self.cache
+        cache[self.keys[0]] = 0.5
+        cache[self.keys[3]] = 3.5
+        assert cache[self.keys[0]] == 0.5
+        assert isinstance(cache[self.keys[0]], float)
+        assert self.keys[3] in cache
+        assert self.keys[1] not in cache
+        with pytest.raises(KeyError):
+            cache[self.keys[1]]
+        assert len(cache) == 2
+        assert cache.count == (2, 0)
+
+        array = cache.as_array()
+        assert list(array.mask) == [False, True, True, False]
+        assert array[3] == 3.5
+
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_reversible(self):
+        cache = IndexedArrayCache(self.index, reversible=True)
+        cache[self.keys[2]] = 1.0
+        assert cache[self.keys[3]] == 1.0
+        assert self.keys[1] not in cache
+        assert cache.count == (1, 0)
+
+    def test_arrays(self):
+        cache = self.cache
+        cache[self.keys[1]] = np.array([1, 2])
+        cache[self.keys[2]] = np.array([0.5, 1.5])
+        # integers are upcast to hold the floats
+        assert cache._values.dtype == float
+        value = cache[self.keys[2]]
+        value[0] = 10.0
+        np.testing.assert_array_equal(cache[self.keys[2]], [0.5, 1.5])
+
+        # values of another shape go to the weak fallback
+        cache[self.keys[3]] = np.array([1.0, 2.0, 3.0])
+        assert cache.count == (2, 1)
+        assert len(cache[self.keys[3]]) == 3
+
+    def test_fallback(self):
+        unknown = Keyed(100)
+        self.cache[unknown] = 1.0
+        self.cache[self.keys[0]] = 'label'
+        assert self.cache[unknown] == 1.0
+        assert self.cache[self.keys[0]] == 'label'
+        assert self.cache.count == (0, 2)
+        assert set(self.cache) == {unknown, self.keys[0]}
+
+        new = WeakKeyCache().transfer(self.cache)
+        assert new[unknown] == 1.0
+
+    def test_grow(self):
+        index = {uuid: uuid for uuid in range(5000)}
+        cache = IndexedArrayCache(index)
+        cache.enable_statistics()
+        keys = [Keyed(uuid) for uuid in range(5000)]
+        for key in keys[::2]:
+            cache[key] = float(key.__uuid__)
+        assert cache[keys[4998]] == 4998.0
+        with pytest.raises(KeyError):
+            cache[keys[4999]]
+        assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+        assert cache.nbytes() < 5000 * 9 * 2
+        assert cache.as_array().count() == 2500
+
+
+class TestAdaptiveLRUCache(object):
+    def setup_method(self):
+        self.cache = AdaptiveLRUCache(size_limit=2)
+        self.objects = [Payload(10) for _ in range(4)]
+
+    def test_hits_and_misses(self):
+        self.cache[0] = self.objects[0]
+        assert self.cache[0] is self.objects[0]
+        with pytest.raises(KeyError):
+            self.cache[1]
+        stats = self.cache.statistics()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['ghost_hits'] == 0
+        assert stats['object_nbytes'] > 80
+
+    def test_ghost_hits(self):
+        objects = self.objects
+        for idx, obj in enumerate(objects[:3]):
+            self.cache[idx] = obj
+        assert self.cache.stats.evictions == 1
+        # the evicted object is still in the weak cache
+        assert self.cache.count == (2, 1)
+
+        self.cache._weak_cache.clear()
+        with pytest.raises(KeyError):
+            self.cache[0]
+        assert self.cache.ghost_hits == 1
+        # only counted once
+        with pytest.raises(KeyError):
+            self.cache[0]
+        assert self.cache.ghost_hits == 1
+
+    def test_size_limit(self):
+        for idx, obj in enumerate(self.objects):
+            self.cache[idx] = obj
+        self.cache.size_limit = 4
+        assert self.cache.count[0] == 2
+        self.cache[4] = Payload(10)
+        assert self.cache.count[0] == 3
+        self.cache.size_limit = 1
+        assert self.cache.count[0] == 1
+        assert self.cache.stats.evictions == 4
+
+    def test_reset_statistics(self):
+        self.cache[0] = self.objects[0]
+        for _ in range(10):
+            self.cache[0]
+        for _ in range(3):
+            with pytest.raises(KeyError):
+                self.cache[1]
+        self.cache.reset_statistics(0.5)
+        recent = self.cache.recent_stats
+        assert (recent.hits, recent.misses) == (5, 1)
+        self.cache[0]
+        assert self.cache.recent_stats.hits == 6
+        self.cache.reset_statistics()
+        recent = self.cache.recent_stats
+        assert (recent.hits, recent.misses) == (0, 0)
+        # the totals are kept
+        assert (self.cache.stats.hits, self.cache.stats.misses) == (11, 3)
+
+
+class TestCacheBudget(object):
+    def setup_method(self):
+        self.budget = CacheBudget(100000, rebalance_interval=100,
+                                  min_size=2, default_nbytes=1000)
+        self.hot = self.budget.create_cache('hot')
+        self.cold = self.budget.create_cache('cold')
+
+    def test_create_cache(self):
+        assert self.budget.allocation == {'hot': 50000, 'cold': 50000}
+        assert self.hot.size_limit == 50
+        assert self.hot.budget is self.budget
+
+    def test_rebalance(self):
+        objects = [Payload(100) for _ in range(10)]
+        for idx, obj in enumerate(objects):
+            self.hot[idx] = obj
+            self.cold[idx] = obj
+        # only the objects in the hot cache are used again
+        for _ in range(10):
+            for idx in range(10):
+                self.hot[idx]
+
+        assert self.budget.n_rebalanced == 1
+        assert self.budget.allocation['hot'] == 100000
+        assert self.cold.size_limit == 2
+        assert self.hot.size_limit == \
+            int(100000 / self.hot.object_nbytes)
+        # the counters are halved after rebalancing
+        assert self.hot.recent_stats.hits == 50
+        assert self.hot.stats.hits == 100
+
+    def test_statistics(self):
+        stats = self.budget.statistics()
+        assert set(stats) == {'hot', 'cold'}
+        assert stats['hot']['allocated_nbytes'] == 50000
+        assert stats['hot']['size_limit'] == 50
+        assert self.budget.nbytes == 0
+
+
+def test_object_nbytes():
+    small = object_nbytes(Payload(10))
+    large = object_nbytes(Payload(1000))
+    assert large - small == 990 * 8
+    # views count their data
+    array = np.zeros(1000)
+    assert object_nbytes(array[:500]) >= 500 * 8
+
+
+class TestAdaptiveStorage(object):
+    def test_set_caching_mode(self, tmpdir):
+        filename = str(tmpdir.join("adaptive.nc"))
+        storage = paths.Storage(filename, 'w')
+        with pytest.raises(ValueError):
+            storage.set_caching_mode('adaptive')
+        storage.set_caching_mode('adaptive', budget=10**6)
+        budget = storage.cache_budget
+        assert storage.trajectories.cache is budget.caches['trajectories']
+        assert isinstance(storage.samples.cache, AdaptiveLRUCache)
+
+        traj = make_1d_traj(coordinates=[0.1, 0.2, 0.3])
+        storage.save(traj)
+        assert storage.trajectories.load(0) == traj
+        assert budget.statistics()['trajectories']['hits'] >= 1
+
+        storage.set_caching_mode('default')
+        assert storage.cache_budget is None
+        storage.close()
+
+
+class TestCacheReport(object):
+    def test_cache_report(self, tmpdir):
+        filename = str(tmpdir.join("report.nc"))
+        storage = paths.Storage(filename, 'w')
+        cv = paths.FunctionCV('x', lambda s: s.xyz[0][0])
+        traj = make_1d_traj(coordinates=[0.1, 0.2, 0.3])
+        cv(traj)
+        storage.save(traj)
+        storage.save(cv)
+
+        report = storage.cache_report()
+        assert 'trajectories' in report.index
+        assert 'cv.x' in report.index
+        assert report.loc['cv.x', 'cache'] == 'WeakKeyCache'
+        assert np.isnan(report.loc['trajectories', 'hits'])
+
+        storage.enable_cache_statistics()
+        storage.trajectories.cache.clear()
+        storage.trajectories[0]
+        storage.trajectories[0]
+        report = storage.cache_report()
+        assert report.loc['trajectories', 'hits'] == 1
+        assert report.loc['trajectories', 'misses'] == 1
+        assert report.loc['cv.x', 'nbytes'] > 0
+
+        storage.enable_cache_statistics(False)
+        assert storage.trajectories.cache.stats is None
+        storage.close()
@@ -8,6 +8,7 @@ from builtins import object
 from .test_helpers import data_filename, assert_close_unit, md
 
 import pytest
+from unittest.mock import patch
 
 import numpy as np
 
@@ -371,3 +372,259 @@ class TestFunctionCV(object):
 
             if os.path.isfile(fname):
                 os.remove(fname)
+
+
+def _x_coordinate(snapshot):
+    return snapshot.coordinates[0][0] + 0.1 * snapshot.velocities[0][0]
+
+
+class TestCompleteCV(object):
+    def setup_method(self):
+        self.traj = make_1d_traj(coordinates=[0.1 * i for i in range(7)],
+                                 velocities=[1.0] * 7)
+
+    def _storage(self, tmpdir, cv_time_reversible=True, allow_incomplete=True):
+        filename = str(tmpdir.join("complete_cv.nc"))
+        storage = paths.Storage(filename, "w")
+        storage.save(self.traj)
+        cv = paths.FunctionCV(
+            "x", _x_coordinate, cv_time_reversible=cv_time_reversible
+        ).with_diskcache(allow_incomplete=allow_incomplete)
+        storage.save(cv)
+        # make sure that the values are computed from the stored snapshots
+        cv._cache_dict.cache.clear()
+        return storage, cv
+
+    def _check(self, storage, cv, n_values):
+        store = storage.cvs.cache_store(cv)
+        assert len(store.vars['value']) == n_values
+        factor = 2 if store.time_reversible else 1
+        for pos, value in zip(store.variables['index'][:],
+                              store.vars['value'][:]):
+            snap = storage.snapshots[int(pos) * factor]
+            assert value == pytest.approx(_x_coordinate(snap))
+
+    @pytest.mark.parametrize('cv_time_reversible', [True, False])
+    def test_complete_cv(self, tmpdir, cv_time_reversible):
+        storage, cv = self._storage(tmpdir, cv_time_reversible)
+        progress = []
+        storage.snapshots.complete_cv(
+            cv, chunksize=3, progress=lambda *args: progress.append(args))
+        assert progress == [(3, 7), (6, 7), (7, 7)]
+        self._check(storage, cv, 7 if cv_time_reversible else 14)
+        # nothing is missing anymore
+        storage.snapshots.complete_cv(cv)
+        self._check(storage, cv, 7 if cv_time_reversible else 14)
+        storage.close()
+
+    def test_resume(self, tmpdir):
+        storage, cv = self._storage(tmpdir)
+
+        def interrupt(n_done, n_total):
+            raise KeyboardInterrupt()
+
+        with pytest.raises(KeyboardInterrupt):
+            storage.snapshots.complete_cv(cv, chunksize=3,
+                                          progress=interrupt)
+        self._check(storage, cv, 3)
+        storage.snapshots.complete_cv(cv, chunksize=3)
+        self._check(storage, cv, 7)
+        storage.close()
+
+    def test_processes(self, tmpdir):
+        storage, cv = self._storage(tmpdir)
+        storage.snapshots.complete_cv(cv, n_processes=2, chunksize=2)
+        self._check(storage, cv, 7)
+        storage.close()
+
+    def test_add_complete_store(self, tmpdir):
+        storage, cv = self._storage(tmpdir, allow_incomplete=False)
+        store = storage.cvs.cache_store(cv)
+        values = store.vars['value'][:]
+        expected = [_x_coordinate(snap) for snap in self.traj]
+        np.testing.assert_allclose(values, expected, rtol=1e-6)
+        storage.close()
+
+
+class TestMDTrajConversionCache(object):
+    def setup_method(self):
+        if not md:
+            pytest.skip("mdtraj not installed")
+        import openpathsampling.engines.toy as toys
+        topology = md.Topology()
+        residue = topology.add_residue('X', topology.add_chain())
+        for idx in range(4):
+            topology.add_atom('C%d' % idx, md.element.carbon, residue)
+        self.topology = paths.engines.MDTrajTopology(topology)
+        engine = toys.Engine(
+            {'integ': toys.LangevinBAOABIntegrator(0.01, 0.1, 2.5),
+             'n_frames_max': 5},
+            toys.Topology(n_spatial=3, masses=np.ones(4),
+                          pes=toys.Gaussian(1.0, [1, 1, 1], [0, 0, 0]))
+        )
+        self.traj = paths.Trajectory([
+            toys.Snapshot(coordinates=np.random.rand(4, 3),
+                          velocities=np.zeros((4, 3)), engine=engine)
+            for _ in range(5)
+        ])
+        self.cache = op.MDTrajConversionCache()
+
+    def test_shared_conversion(self):
+        with patch.object(op, 'mdtraj_conversion_cache', self.cache), \
+                patch.object(op, 'trajectory_to_mdtraj',
+                             wraps=op.trajectory_to_mdtraj) as convert:
+            cv1 = paths.MDTrajFunctionCV('d01', md.compute_distances,
+                                         self.topology, atom_pairs=[[0, 1]])
+            cv2 = paths.MDTrajFunctionCV('d23', md.compute_distances,
+                                         self.topology, atom_pairs=[[2, 3]])
+            d01 = cv1(self.traj)
+            d23 = cv2(self.traj)
+            assert convert.call_count == 1
+
+        xyz = self.traj.to_mdtraj(self.topology.mdtraj).xyz
+        np.testing.assert_allclose(
+            d01, np.linalg.norm(xyz[:, 0] - xyz[:, 1], axis=1), rtol=1e-5)
+        np.testing.assert_allclose(
+            d23, np.linalg.norm(xyz[:, 2] - xyz[:, 3], axis=1), rtol=1e-5)
+
+    def test_copies(self):
+        first = self.cache(self.traj, self.topology.mdtraj)
+        first.xyz[:] = 0.0
+        second = self.cache(self.traj, self.topology.mdtraj)
+        assert np.any(second.xyz != 0.0)
+        # a different set of snapshots is converted again
+        assert self.cache(self.traj[:2], self.topology.mdtraj).n_frames == 2
+
+    def test_atom_subset(self):
+        full = self.cache(self.traj, self.topology.mdtraj)
+        with patch.object(paths.Trajectory, 'coordinates_as_numpy') as coords:
+            subset = self.cache(self.traj, self.topology.mdtraj, [3, 1])
+            coords.assert_not_called()
+
+        assert subset.n_atoms == 2
+        np.testing.assert_allclose(subset.xyz, full.xyz[:, [3, 1]])
+
+        cv = paths.MDTrajFunctionCV('d31', md.compute_distances,
+                                    self.topology, cv_atom_indices=[3, 1],
+                                    atom_pairs=[[0, 1]])
+        expected = np.linalg.norm(full.xyz[:, 3] - full.xyz[:, 1], axis=1)
+        np.testing.assert_allclose(cv(self.traj), expected, rtol=1e-5)
+        assert cv.to_dict()['cv_atom_indices'] == [3, 1]
+
+    def test_size_limit(self):
+        cache = op.MDTrajConversionCache(size_limit=0)
+        with patch.object(op, 'trajectory_to_mdtraj',
+                          wraps=op.trajectory_to_mdtraj) as convert:
+            cache(self.traj, self.topology.mdtraj)
+            cache(self.traj, self.topology.mdtraj)
+            assert convert.call_count == 2
+
+
+class TestCVGraph(object):
+    def setup_method(self):
+        self.calls = []
+
+        def x_values(snapshot):
+            self.calls.append(snapshot)
+            return snapshot.xyz[0][0]
+
+        self.cv_x = paths.FunctionCV('x', x_values, cv_time_reversible=True)
+        self.cv_sq = paths.DerivedCV('x_sq', lambda x: x**2, [self.cv_x])
+        self.cv_sum = paths.DerivedCV('x_sum', lambda x, sq: x + sq,
+                                      [self.cv_x, self.cv_sq])
+        self.volume = paths.CVDefinedVolume(self.cv_x, 0.15, 0.35)
+        self.cv_in = paths.InVolumeCV('in_x', self.volume)
+        self.traj = make_1d_traj(coordinates=[0.1, 0.2, 0.3, 0.4])
+
+    def test_cv_inputs(self):
+        assert self.cv_x.cv_inputs == []
+        assert self.cv_sq.cv_inputs == [self.cv_x]
+        assert self.cv_in.cv_inputs == [self.cv_x]
+        assert self.cv_sq.cv_time_reversible
+
+        cv_kwarg = paths.FunctionCV('y', lambda s, cv: cv(s), cv=self.cv_x)
+        assert cv_kwarg.cv_inputs == [self.cv_x]
+
+    def test_order(self):
+        graph = paths.CVGraph([self.cv_sum, self.cv_in])
+        assert graph.order == [self.cv_x, self.cv_sq, self.cv_sum,
+                               self.cv_in]
+        assert graph.dependents(self.cv_x) == [self.cv_sq, self.cv_sum,
+                                               self.cv_in]
+
+    def test_evaluate(self):
+        graph = paths.CVGraph([self.cv_sum, self.cv_in, self.cv_sq])
+        values = graph.evaluate(self.traj)
+        assert set(values) == {self.cv_sum, self.cv_in, self.cv_sq}
+        x = np.array([0.1, 0.2, 0.3, 0.4])
+        np.testing.assert_allclose(values[self.cv_sq], x**2)
+        np.testing.assert_allclose(values[self.cv_sum], x + x**2)
+        assert values[self.cv_in] == [False, True, True, False]
+        # the shared input is only computed once per snapshot
+        assert len(self.calls) == 4
+        assert self.cv_in(self.traj[1]) is True
+
+    def test_cycle(self):
+        cv_a = paths.DerivedCV('a', lambda x: x, [self.cv_x])
+        cv_b = paths.DerivedCV('b', lambda x: x, [cv_a])
+        cv_a._cv_inputs = [cv_b]
+        with pytest.raises(ValueError, match='a -> b -> a'):
+            paths.CVGraph([cv_a])
+
+    def test_storage(self, tmpdir):
+        dct = self.cv_sq.to_dict()
+        assert dct['cv_inputs'] == [self.cv_x]
+        assert 'cv_requires_lists' not in dct
+
+        filename = str(tmpdir.join("derived.nc"))
+        storage = paths.Storage(filename, 'w')
+        storage.save(self.cv_sq)
+        storage.close()
+
+        storage = paths.Storage(filename, 'r')
+        cv = storage.cvs['x_sq']
+        assert isinstance(cv, paths.DerivedCV)
+        assert [inp.name for inp in cv.cv_inputs] == ['x']
+        np.testing.assert_allclose(cv(self.traj), [0.01, 0.04, 0.09, 0.16])
+        storage.close()
+
+
+class TestArrayCache(object):
+    def setup_method(self):
+        self.traj = make_1d_traj(coordinates=[0.1 * i for i in range(5)],
+                                 velocities=[1.0] * 5)
+
+    @pytest.mark.parametrize('cv_time_reversible', [True, False])
+    def test_array_cache(self, tmpdir, cv_time_reversible):
+        filename = str(tmpdir.join("array_cache.nc"))
+        storage = paths.Storage(filename, "w")
+        storage.save(self.traj)
+        cv = paths.FunctionCV("x", _x_coordinate,
+                              cv_time_reversible=cv_time_reversible)
+        # values computed before are moved into the array
+        cv(self.traj[0])
+        cv.enable_array_cache(storage.snapshots)
+        cache = cv._cache_dict.cache
+        assert isinstance(cache, paths.netcdfplus.IndexedArrayCache)
+        assert cache.count == (1, 0)
+
+        values = cv(self.traj)
+        expected = [_x_coordinate(snap) for snap in self.traj]
+        np.testing.assert_allclose(values, expected)
+        assert cache.count == (5, 0)
+
+        # reversed snapshots share the entry of time reversible CVs
+        assert (self.traj[2].reversed in cache) == cv_time_reversible
+        array = cache.as_array()
+        step = 1 if cv_time_reversible else 2
+        np.testing.assert_allclose(array[::step].compressed(), expected)
+
+        # unsaved snapshots are cached by object
+        other = make_1d_traj(coordinates=[2.0], velocities=[1.0])[0]
+        cv(other)
+        assert cache.count == (5, 1)
+
+        cv.disable_array_cache()
+        assert isinstance(cv._cache_dict.cache, paths.netcdfplus.WeakKeyCache)
+        assert other in cv._cache_dict.cache
+        storage.close()
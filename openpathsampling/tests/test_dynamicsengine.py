@@ -201,3 +201,137 @@ class TestDynamicsEngine(object):
             outstring = f.read()
 
         assert outstring == ("0.00 " * 5)[:-1]
+
+
+class TestTrajectoryGrowthBuffer(object):
+    def setup_method(self):
+        self.initial = make_1d_traj([0.0, 1.0])
+        self.new = make_1d_traj([2.0, 3.0, 4.0])
+
+    @pytest.mark.parametrize('direction', [1, -1])
+    def test_growth(self, direction):
+        growth = paths.engines.dynamics_engine.TrajectoryGrowthBuffer(
+            self.initial, direction
+        )
+        traj = growth.trajectory
+        assert traj == self.initial
+        growth.append(self.new[0])
+        growth.append(self.new[1])
+        assert len(growth) == 4
+        assert growth.frames == [self.new[0], self.new[1]]
+        assert growth.trajectory is traj
+        growth.append(self.new[2])
+        if direction > 0:
+            expected = self.initial + self.new
+        else:
+            expected = self.new[::-1] + self.initial
+        assert growth.trajectory == expected
+        # the initial trajectory is not changed
+        assert len(self.initial) == 2
+
+    @pytest.mark.parametrize('direction', [1, -1])
+    @pytest.mark.parametrize('synced', [True, False])
+    def test_pop(self, direction, synced):
+        growth = paths.engines.dynamics_engine.TrajectoryGrowthBuffer(
+            self.initial, direction
+        )
+        for snap in self.new:
+            growth.append(snap)
+        if synced:
+            _ = growth.trajectory
+        assert growth.pop() == self.new[-1]
+        assert len(growth) == 4
+        if direction > 0:
+            expected = self.initial + self.new[:2]
+        else:
+            expected = self.new[1::-1] + self.initial
+        assert growth.trajectory == expected
+
+
+def test_generate_backward_max_length():
+    engine = StupidEngine({'n_frames_max': 3, 'on_max_length': 'stop'},
+                          None)
+    init_snap = make_1d_traj([1.0])[0]
+    traj = engine.generate(init_snap, [lambda traj, trusted: True],
+                           direction=-1)
+    assert len(traj) == 3
+    # the frame removed at max length is the newest, not the initial
+    assert traj[-1] is init_snap
+
+
+def test_incremental_conditions():
+    ensemble = paths.LengthEnsemble(5)
+    func = lambda traj, trusted: True
+    conditions = paths.engines.DynamicsEngine.incremental_conditions(
+        [ensemble.can_append, ensemble.can_prepend, func], direction=+1
+    )
+    assert isinstance(conditions[0], paths.EnsembleState)
+    assert conditions[1] == ensemble.can_prepend
+    assert conditions[2] is func
+
+
+@pytest.mark.parametrize('direction', [1, -1])
+def test_generate_incremental_condition(direction):
+    engine = StupidEngine({'n_frames_max': 100}, None)
+    ensemble = paths.LengthEnsemble(5) & paths.AllInXEnsemble(
+        paths.CVDefinedVolume(paths.FunctionCV("x", lambda s: s.xyz[0][0]),
+                              -1.0, 1.0)
+    )
+    running = {1: ensemble.can_append, -1: ensemble.can_prepend}[direction]
+    traj = engine.generate(make_1d_traj([0.5])[0], [running],
+                           direction=direction)
+    assert len(traj) == 5
+
+
+@pytest.mark.parametrize('direction', [1, -1])
+def test_generate_merges_frames_once(direction):
+    # with incremental running conditions, the trajectory is only built
+    # from the growth buffer at the end, in one block
+    engine = StupidEngine({'n_frames_max': 1000}, None)
+    snapshot = make_1d_traj([0.5])[0]
+    engine.generate_next_frame = lambda: snapshot
+    ensemble = paths.LengthEnsemble(200)
+    running = {1: ensemble.can_append, -1: ensemble.can_prepend}[direction]
+    list_operations = []
+
+    def counting(method):
+        def wrapped(self, *args):
+            list_operations.append((self, method.__name__))
+            return method(self, *args)
+        return wrapped
+
+    with mock.patch.object(paths.Trajectory, 'extend',
+                           counting(list.extend)), \
+            mock.patch.object(paths.Trajectory, '__setitem__',
+                              counting(list.__setitem__)), \
+            mock.patch.object(paths.Trajectory, 'insert',
+                              counting(list.insert)):
+        traj = engine.generate(snapshot, [running], direction=direction)
+    assert len(traj) == 200
+    # one operation to create the trajectory, one to add the new frames
+    assert len([op for (obj, op) in list_operations if obj is traj]) == 2
+
+
+@pytest.mark.parametrize('direction', [1, -1])
+def test_generate_retry_restarts_conditions(direction):
+    # after an error, the conditions must not count the frames from before
+    # the retry twice
+    class FailOnceEngine(StupidEngine):
+        n_frames = 0
+        failed = False
+
+        def generate_next_frame(self):
+            self.n_frames += 1
+            if self.n_frames == 4 and not self.failed:
+                self.failed = True
+                raise RuntimeError("engine failure")
+            return super(FailOnceEngine, self).generate_next_frame()
+
+    engine = FailOnceEngine({'n_frames_max': 100, 'on_nan': 'retry',
+                             'retries_when_error': 2}, None)
+    ensemble = paths.LengthEnsemble(10)
+    running = {1: ensemble.can_append, -1: ensemble.can_prepend}[direction]
+    traj = engine.generate(make_1d_traj([0.5])[0], [running],
+                           direction=direction)
+    assert engine.failed
+    assert ensemble(traj)
@@ -1207,6 +1207,14 @@ class TestTISEnsemble(EnsembleTest):
         traj_2 = make_1d_traj([0.2, 2.1])
         assert self.tis(traj_2) is True
 
+    def test_untrusted_matches_sequential(self):
+        tis = TISEnsemble(vol1, vol3, vol2, op)
+        for (name, traj) in ttraj.items():
+            failmsg = "Failure in " + name + "(" + str(traj) + "): "
+            expected = tis._new_ensemble(traj, trusted=False)
+            assert tis(traj) is expected, failmsg
+            assert tis(traj, trusted=False) is expected, failmsg
+
     def test_tis_ensemble_candidate(self):
         tis = TISEnsemble(vol1, vol3, vol2, op, lambda_i=0.7)
         test_f = lambda t: tis(t, candidate=True)
@@ -2703,6 +2711,202 @@ class TestVolumeCombinations(EnsembleTest):
         )
 
 
+class TestEnsembleState(object):
+    def setup_method(self):
+        inX = AllInXEnsemble(vol1)
+        outX = AllOutXEnsemble(vol1)
+        length1 = LengthEnsemble(1)
+        self.ensembles = {
+            'inX': inX,
+            'hitX': PartInXEnsemble(vol1),
+            'length': LengthEnsemble(slice(2, 5)),
+            'negated': NegatedEnsemble(inX),
+            'pseudo_minus': SequentialEnsemble([
+                inX & length1, outX, inX, outX, inX & length1
+            ]),
+            'combo': (
+                SequentialEnsemble([inX & length1, LengthEnsemble(3),
+                                    inX & length1])
+                | SequentialEnsemble([inX & length1,
+                                      outX & PartOutXEnsemble(vol2),
+                                      inX & length1])
+            ),
+            'tis': paths.TISEnsemble(vol1, vol3, vol2),
+            'minus': paths.MinusInterfaceEnsemble(vol1, vol2),
+        }
+
+    @pytest.mark.parametrize('direction', [1, -1])
+    @pytest.mark.parametrize('ens_name', ['inX', 'hitX', 'length',
+                                          'negated', 'pseudo_minus',
+                                          'combo', 'tis', 'minus'])
+    def test_matches_ensemble(self, ens_name, direction):
+        ensemble = self.ensembles[ens_name]
+        if direction > 0:
+            extend = ensemble.can_append
+        else:
+            extend = ensemble.can_prepend
+
+        # lower_* trajectories are mirror images; upper_* are enough here
+        for test in [t for t in ttraj if t.startswith('upper_')]:
+            state = ensemble.incremental_state(direction)
+            frames = list(ttraj[test])
+            if direction < 0:
+                frames.reverse()
+            for n_frames, frame in enumerate(frames, 1):
+                state.add_frame(frame)
+                subframes = frames[:n_frames]
+                if direction < 0:
+                    subframes.reverse()
+                subtraj = paths.Trajectory(subframes)
+                failmsg = "{} frames of {}".format(n_frames, test)
+                assert state.can_extend == extend(subtraj), failmsg
+                assert state.in_ensemble == ensemble(subtraj), failmsg
+
+    @staticmethod
+    def _fresh_result(ensemble, xvals, direction):
+        # new snapshots, so that no cached result of the ensemble is used
+        traj = make_1d_traj(coordinates=xvals, velocities=[1.0]*len(xvals))
+        if direction > 0:
+            extend = ensemble.can_append(traj)
+        else:
+            extend = ensemble.can_prepend(traj)
+        return extend, ensemble(traj)
+
+    def _check_sequential(self, subensembles, xvals, direction):
+        ensemble = SequentialEnsemble(subensembles)
+        state = ensemble.incremental_state(direction)
+        last = subensembles[-1] if direction > 0 else subensembles[0]
+        if last(paths.Trajectory([])):
+            # the greedy assignment does not apply; the state tests the
+            # whole trajectory with the ensemble's method
+            assert type(state) is EnsembleState
+            return
+        assert type(state) is SequentialEnsembleState
+        frames = list(make_1d_traj(coordinates=xvals,
+                                   velocities=[1.0]*len(xvals)))
+        if direction < 0:
+            frames.reverse()
+        for n_frames, frame in enumerate(frames, 1):
+            state.add_frame(frame)
+            subvals = [f.coordinates[0][0] for f in frames[:n_frames]]
+            if direction < 0:
+                subvals.reverse()
+            fresh = SequentialEnsemble(subensembles)
+            extend, in_ens = self._fresh_result(fresh, subvals, direction)
+            failmsg = "{} on {}".format(ensemble, subvals)
+            assert state.can_extend == extend, failmsg
+            assert state.in_ensemble == in_ens, failmsg
+            if not extend:
+                break
+
+    @pytest.mark.parametrize('direction', [1, -1])
+    def test_sequential_optional_ends(self, direction):
+        in_A = AllInXEnsemble(vol1)
+        out_A = AllOutXEnsemble(vol1)
+        in_X = AllInXEnsemble(vol2)
+        leading = [OptionalEnsemble(in_X & out_A), in_A & LengthEnsemble(1),
+                   out_A & in_X]
+        trailing = [in_A & LengthEnsemble(1), out_A & in_X,
+                    OptionalEnsemble(in_X & out_A)]
+        bootstrap = [OptionalEnsemble(out_A), in_A,
+                     OptionalEnsemble(out_A & in_X),
+                     OptionalEnsemble(in_X), AllOutXEnsemble(vol2),
+                     OptionalEnsemble(out_A), SingleFrameEnsemble(in_A)]
+        for subensembles in [leading, trailing, bootstrap]:
+            for xvals in [[0.3, 0.6, 1.0], [0.6, 0.3, 0.3, 0.6],
+                          [1.0, 0.6, 0.3, 0.6, 1.0, 0.6, 0.3]]:
+                self._check_sequential(subensembles, xvals, direction)
+
+    @pytest.mark.parametrize('direction', [1, -1])
+    def test_sequential_random(self, direction):
+        in_A = AllInXEnsemble(vol1)
+        out_A = AllOutXEnsemble(vol1)
+        in_X = AllInXEnsemble(vol2)
+        out_X = AllOutXEnsemble(vol2)
+        single = [in_A & LengthEnsemble(1), out_A & LengthEnsemble(1)]
+        other = [in_A, out_A, in_X, out_X, out_A & in_X,
+                 PartOutXEnsemble(vol1) & in_X,
+                 LengthEnsemble(slice(1, 3))]
+        optional = [OptionalEnsemble(ens)
+                    for ens in [in_A, out_A & in_X, out_X,
+                                in_X & LengthEnsemble(1)]]
+        choices = single + other + optional
+        rng = random.Random(42)
+        for _ in range(150):
+            n_ens = rng.randint(1, 5)
+            subensembles = [rng.choice(choices) for _ in range(n_ens)]
+            xvals = [rng.choice([0.0, 0.3, 0.6, 1.0])
+                     for _ in range(rng.randint(1, 8))]
+            self._check_sequential(subensembles, xvals, direction)
+
+    def test_fallback_state(self):
+        ensemble = SlicedTrajectoryEnsemble(AllInXEnsemble(vol1),
+                                            slice(1, None))
+        state = ensemble.incremental_state()
+        assert type(state) is EnsembleState
+        assert ensemble.incremental_condition('can_append', +1) is None
+        traj = ttraj['upper_out_in_in_out']
+        for n_frames, frame in enumerate(traj, 1):
+            state.add_frame(frame)
+            assert state.can_extend == ensemble.can_append(traj[:n_frames])
+            assert state.in_ensemble == ensemble(traj[:n_frames])
+
+    def test_lazy_volume_evaluation(self):
+        counting_vol = paths.CVDefinedVolume(
+            paths.FunctionCV("count", lambda s: s.coordinates[0][0]),
+            lower, upper
+        )
+        calls = []
+
+        def volume(snapshot):
+            calls.append(snapshot)
+            return counting_vol(snapshot)
+
+        ensemble = AllOutXEnsemble(vol1) | AllInXEnsemble(vol2)
+        state = ensemble.incremental_state()
+        state.state2._volume = volume
+        for frame in ttraj['upper_out_out_out']:
+            state.add_frame(frame)
+            assert state.can_extend is True
+        # short-circuit: the second ensemble never had to test a frame
+        assert calls == []
+
+    def test_prefix_condition(self):
+        traj = ttraj['upper_in_out_in_in_out_in']
+        inner = SequentialEnsemble([
+            AllInXEnsemble(vol1) & LengthEnsemble(1),
+            AllOutXEnsemble(vol1),
+            AllInXEnsemble(vol1) & LengthEnsemble(1)
+        ])
+        ensemble = PrefixTrajectoryEnsemble(inner, traj[0:2])
+        state = ensemble.incremental_condition('can_append', +1)
+        results = []
+        for frame in traj[2:]:
+            state.add_frame(frame)
+            results.append(state.can_extend)
+        assert results == [False, False, False, False]
+        assert ensemble.incremental_condition('can_prepend', -1) is None
+
+    def test_suffix_condition(self):
+        # backward shooting: frames are reversed and appended by the engine
+        traj = ttraj['upper_in_out_out_in']
+        inner = SequentialEnsemble([
+            AllInXEnsemble(vol1) & LengthEnsemble(1),
+            AllOutXEnsemble(vol1),
+            AllInXEnsemble(vol1) & LengthEnsemble(1)
+        ])
+        ensemble = SuffixTrajectoryEnsemble(inner, traj[2:])
+        state = ensemble.incremental_condition('can_prepend', +1)
+        engine_traj = traj[:2].reversed
+        results = []
+        for n_frames, frame in enumerate(engine_traj, 1):
+            state.add_frame(frame)
+            expected = ensemble.can_prepend(engine_traj[:n_frames])
+            assert state.can_extend == expected
+            results.append(state.can_extend)
+        assert results == [True, False]
+
+
 class TestAbstract(object):
     @raises_with_message_like(TypeError, "Can't instantiate abstract class")
     def test_abstract_ensemble(self):
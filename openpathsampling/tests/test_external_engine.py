@@ -219,6 +219,36 @@ class TestExternalEngine(object):
                                          [self.ensemble.can_append])
         assert len(traj) == 5
 
+    @pytest.mark.parametrize('speed', ['slow', 'fast'])
+    def test_background_reader_run(self, speed):
+        engine = {'slow': self.slow_engine, 'fast': self.fast_engine}[speed]
+        engine.options['background_reader'] = True
+        engine.initialized = True
+        traj = engine.generate(self.template, [self.ensemble.can_append])
+        assert len(traj) == 5
+        assert_items_equal(traj.xyz, [[[float(i)]] for i in range(5)])
+        assert engine._reader is None
+
+    def test_background_reader_small_queue(self):
+        self.fast_engine.options['background_reader'] = True
+        self.fast_engine.options['reader_queue_size'] = 1
+        self.fast_engine.initialized = True
+        ens = paths.LengthEnsemble(20)
+        traj = self.fast_engine.generate(self.template, [ens.can_append])
+        assert len(traj) == 20
+        assert_items_equal(traj.xyz, [[[float(i)]] for i in range(20)])
+
+    def test_background_reader_engine_died(self):
+        eng = self.fast_engine
+        eng.options['background_reader'] = True
+        eng.options['name_prefix'] = "test_died"  # no output from before
+        eng.engine_command = lambda: "true"
+        eng.start(self.template)
+        with pytest.raises(RuntimeError, match="died"):
+            eng.generate_next_frame()
+        eng.stop(None)
+        assert eng._reader is None
+
     def test_in_shooting_move(self):
         for testfile in glob.glob("test*out") + glob.glob("test*inp"):
             os.remove(testfile)
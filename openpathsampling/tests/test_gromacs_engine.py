@@ -448,3 +448,99 @@ class TestGromacsExternalMDSnapshot(object):
         npt.assert_almost_equal(internalized.xyz, reloaded.xyz)
         assert internalized.__class__ != self.snapshot.__class__
         assert internalized.__class__ == reloaded.__class__
+
+
+class TestTRRFrameIndex(object):
+    def setup_method(self):
+        if not HAS_MDTRAJ:
+            pytest.skip("MDTraj not installed.")
+        from openpathsampling.engines.gromacs.trr import (
+            TRRFrameIndex, TRRFileCache
+        )
+        self.index_class = TRRFrameIndex
+        self.cache_class = TRRFileCache
+        self.filename = os.path.join(data_filename("gromacs_engine"),
+                                     "project_trr", "0000000.trr")
+
+    def test_read_frame_matches_mdtraj(self):
+        index = self.index_class(self.filename)
+        assert len(index) == 4
+        trr = md.formats.TRRTrajectoryFile(self.filename)
+        try:
+            data = trr._read(n_frames=4, atom_indices=None,
+                             get_velocities=True)
+        finally:
+            trr.close()
+        # random access, in any order
+        for frame in [3, 0, 2, 1]:
+            xyz, vel, box = index.read_frame(frame)
+            npt.assert_array_equal(xyz, data[0][frame])
+            npt.assert_array_equal(vel, data[5][frame])
+            npt.assert_array_equal(box, data[3][frame])
+        index.close()
+
+    def test_growing_file(self, tmp_path):
+        with open(self.filename, 'rb') as f:
+            content = f.read()
+        frame_size = len(content) // 4
+        growing = str(tmp_path / "growing.trr")
+        with open(growing, 'wb') as f:
+            f.write(content[:frame_size + 10])
+
+        index = self.index_class(growing)
+        reference = self.index_class(self.filename)
+        npt.assert_array_equal(index.read_frame(0)[0],
+                               reference.read_frame(0)[0])
+        with pytest.raises(RuntimeError):
+            index.read_frame(1)
+        with pytest.raises(IndexError):
+            index.read_frame(2)
+
+        with open(growing, 'ab') as f:
+            f.write(content[frame_size + 10:])
+        npt.assert_array_equal(index.read_frame(2)[1],
+                               reference.read_frame(2)[1])
+        assert index.offsets == [i * frame_size for i in range(3)]
+        assert len(index) == 4
+        index.close()
+        reference.close()
+
+    def test_cache(self, tmp_path):
+        cache = self.cache_class(size_limit=2)
+        copies = []
+        for i in range(3):
+            copy = str(tmp_path / "{}.trr".format(i))
+            shutil.copy(self.filename, copy)
+            copies.append(copy)
+
+        index = cache[copies[0]]
+        assert cache[copies[0]] is index
+        cache[copies[1]]
+        cache[copies[2]]
+        assert copies[0] not in cache
+        assert len(cache) == 2
+        assert index._file.closed
+
+        # replaced files are reopened
+        old = cache[copies[2]]
+        old.read_frame(3)
+        os.remove(copies[2])
+        with open(copies[2], 'wb') as f:
+            f.write(b'')
+        assert cache[copies[2]] is not old
+        assert old._file.closed
+
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_engine_uses_cache(self):
+        engine = Engine(gro="conf.gro", mdp="md.mdp", top="topol.top",
+                        options={}, base_dir=data_filename("gromacs_engine"),
+                        prefix="proj")
+        engine.read_frame_data(self.filename, 3)
+        index = engine._trr_files[self.filename]
+        assert len(index.offsets) == 4
+        engine.read_frame_data(self.filename, 1)
+        assert engine._trr_files[self.filename] is index
+        shutil.rmtree(engine.prefix + "_log")
+        shutil.rmtree(engine.prefix + "_edr")
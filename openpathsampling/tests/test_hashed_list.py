@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+
+import openpathsampling as paths
+from openpathsampling.netcdfplus.stores.object import HashedList
+from openpathsampling.storage.stores.snapshot_wrapper import \
+    ReversalHashedList
+
+from .test_helpers import make_1d_traj
+
+
+def _arrays(uuids):
+    mask = (1 << 64) - 1
+    return (np.array([uuid >> 64 for uuid in uuids], dtype=np.uint64),
+            np.array([uuid & mask for uuid in uuids], dtype=np.uint64))
+
+
+class TestHashedList(object):
+    def setup_method(self):
+        # some UUIDs share the high bits
+        self.stored = [(5 << 64) + 10, (3 << 64) + 7, (5 << 64) + 2,
+                       (1 << 127) + 1]
+        self.loaded = []
+
+    def _restored(self, cls=HashedList):
+        index = cls()
+
+        def loader():
+            self.loaded.append(True)
+            return _arrays(self.stored)
+
+        index.restore(len(self.stored), loader)
+        return index
+
+    def test_lazy(self):
+        index = self._restored()
+        assert len(index) == 4
+        assert len(index.list) == 4
+        assert self.loaded == []
+        assert index[self.stored[2]] == 2
+        assert self.loaded == [True]
+        index.get(self.stored[0])
+        assert self.loaded == [True]
+
+    def test_dict_and_list(self):
+        index = self._restored()
+        for idx, uuid in enumerate(self.stored):
+            assert uuid in index
+            assert index[uuid] == idx
+            assert index.index(idx) == uuid
+        assert (5 << 64) + 3 not in index
+        assert index.get(17) is None
+        with pytest.raises(KeyError):
+            index[17]
+
+        index.append(17)
+        assert index[17] == 4
+        assert len(index) == 5
+        assert list(index.list) == self.stored + [17]
+        assert index.list[-2:] == self.stored[-1:] + [17]
+        assert dict(index.items()) == {uuid: idx for idx, uuid
+                                       in enumerate(self.stored + [17])}
+
+        del index[17]
+        del index[self.stored[1]]
+        assert 17 not in index
+        assert self.stored[1] not in index
+        assert len(index) == 3
+
+        index[self.stored[1]] = 1
+        assert index[self.stored[1]] == 1
+        assert len(index) == 4
+
+    def test_mark(self):
+        index = self._restored()
+        index.mark(17)
+        assert index[17] == -2
+        index.mark(self.stored[0])
+        assert index[self.stored[0]] == 0
+        index.unmark(17)
+        assert 17 not in index
+
+    def test_reversal(self):
+        # positions hold pairs; the saved UUID of a pair can be odd
+        index = self._restored(ReversalHashedList)
+        assert len(index) == 8
+        for pos, uuid in enumerate(self.stored):
+            assert index[uuid] == 2 * pos
+            assert index[uuid ^ 1] == 2 * pos + 1
+            assert index.index(2 * pos) == uuid
+            assert index.index(2 * pos + 1) == uuid ^ 1
+
+        index.append(17)
+        assert index[17] == 8
+        assert index[16] == 9
+        assert index.index(8) == 17
+        assert len(index) == 10
+
+
+class TestStoreIndex(object):
+    def setup_method(self):
+        self.traj = make_1d_traj(coordinates=[0.1, 0.2, 0.3],
+                                 velocities=[1.0, 1.0, 1.0])
+
+    def test_reopen(self, tmpdir):
+        filename = str(tmpdir.join("hashed_list.nc"))
+        storage = paths.Storage(filename, 'w')
+        storage.save(self.traj)
+        storage.close()
+
+        storage = paths.Storage(filename, 'r')
+        # UUIDs are not read when the file is opened
+        assert storage.snapshots.index._loader is not None
+        assert len(storage.snapshots.index) == 6
+        assert storage.load(self.traj.__uuid__) == self.traj
+        for snap in self.traj:
+            assert storage.load(snap.__uuid__) == snap
+            reversed_snap = storage.load(snap.reversed.__uuid__)
+            assert reversed_snap == snap.reversed
+            np.testing.assert_array_equal(reversed_snap.velocities,
+                                          -snap.velocities)
+        with pytest.raises(KeyError):
+            storage.load(paths.Trajectory([]).__uuid__)
+        storage.close()
+
+    def test_save_after_reopen(self, tmpdir):
+        filename = str(tmpdir.join("hashed_list.nc"))
+        storage = paths.Storage(filename, 'w')
+        storage.save(self.traj)
+        storage.close()
+
+        storage = paths.Storage(filename, 'a')
+        new_traj = make_1d_traj(coordinates=[0.5, 0.6],
+                                velocities=[1.0, 1.0])
+        storage.save(self.traj)
+        storage.save(new_traj)
+        assert len(storage.trajectories) == 2
+        assert len(storage.snapshots) == 5 * 2
+        storage.close()
+
+        storage = paths.Storage(filename, 'r')
+        assert list(storage.trajectories) == [self.traj, new_traj]
+        assert storage.load(new_traj[1].reversed.__uuid__) \
+            == new_traj[1].reversed
+        storage.close()
@@ -3,6 +3,7 @@ from builtins import zip
 from builtins import range
 from builtins import object
 
+import numpy as np
 import pytest
 from .test_helpers import (
     true_func, assert_equal_array_array, make_1d_traj, data_filename,
@@ -18,6 +19,14 @@ logging.getLogger('openpathsampling.ensemble').setLevel(logging.CRITICAL)
 logging.getLogger('openpathsampling.storage').setLevel(logging.CRITICAL)
 logging.getLogger('openpathsampling.netcdfplus').setLevel(logging.CRITICAL)
 
+
+def check_frame_interface_index(interface_set, coordinates):
+    """Compare the boundary index with testing each volume"""
+    traj = make_1d_traj(coordinates)
+    expected = paths.InterfaceSet.frame_interface_index(interface_set, traj)
+    np.testing.assert_array_equal(
+        interface_set.frame_interface_index(traj), expected)
+
 class TestInterfaceSet(object):
     def setup_method(self):
         paths.InterfaceSet._reset()
@@ -143,6 +152,49 @@ class TestVolumeInterfaceSet(object):
         with pytest.raises(TypeError):
             self.weird_set.new_interface(0.25)
 
+    def test_frame_interface_index(self):
+        coordinates = [-0.2, -0.1, -0.05, 0.0, 0.05, 0.1, 0.2,
+                       float("inf"), float("-inf"), float("nan")]
+        traj = make_1d_traj(coordinates)
+        np.testing.assert_array_equal(
+            self.increasing_set.frame_interface_index(traj),
+            [0, 0, 0, 1, 1, 2, 2, 2, 0, 0]
+        )
+        np.testing.assert_array_equal(
+            self.decreasing_set.frame_interface_index(traj),
+            [2, 1, 1, 0, 0, 0, 0, 0, 2, 0]
+        )
+        for interface_set in [self.increasing_set, self.decreasing_set,
+                              self.weird_set]:
+            check_frame_interface_index(interface_set, coordinates)
+
+        assert self.increasing_set.lambda_interface_index(0.05) == 1
+        with pytest.raises(RuntimeError):
+            self.weird_set.lambda_interface_index(0.05)
+
+    def test_frame_interface_index_intersect(self):
+        interface_set = paths.VolumeInterfaceSet(
+            cv=self.cv, minvals=-1.0, maxvals=[0.0, 0.1, 0.2],
+            intersect_with=paths.CVDefinedVolume(self.cv, -0.5, 0.15)
+        )
+        coordinates = [-1.5, -0.7, -0.2, 0.05, 0.12, 0.18, 0.3]
+        traj = make_1d_traj(coordinates)
+        np.testing.assert_array_equal(
+            interface_set.frame_interface_index(traj),
+            [3, 3, 0, 1, 2, 3, 3]
+        )
+        check_frame_interface_index(interface_set, coordinates)
+
+    def test_highest_crossed_interface(self):
+        iface_set = self.increasing_set
+        assert iface_set.highest_crossed_interface(
+            make_1d_traj([-0.2, -0.1, -0.2])) == -1
+        assert iface_set.highest_crossed_interface(
+            make_1d_traj([-0.2, 0.05, -0.2])) == 0
+        assert iface_set.highest_crossed_interface(
+            make_1d_traj([-0.2, 0.05, 0.15, -0.2])) == 1
+        assert iface_set.highest_crossed_interface(make_1d_traj([])) == -1
+
     def test_storage(self):
         import os
         fname = data_filename("interface_set_storage_test.nc")
@@ -186,6 +238,30 @@ class TestPeriodicVolumeInterfaceSet(object):
         assert len(self.increasing_set) == 3
         assert self.increasing_set.lambdas == [100, 150, -160]
 
+    @pytest.mark.parametrize('minvals, maxvals', [
+        (0.0, [100, 150, 200-360]),
+        ([-100, -150, 160], 0.0),
+        (-180, [-90, 0, 180]),
+        (90, [120, 90 + 360]),
+        (90, [120, -120, -100]),
+    ])
+    @pytest.mark.parametrize('period', [(-180, 180), (None, None)])
+    def test_frame_interface_index(self, minvals, maxvals, period):
+        interface_set = paths.PeriodicVolumeInterfaceSet(
+            cv=self.cv, minvals=minvals, maxvals=maxvals,
+            period_min=period[0], period_max=period[1]
+        )
+        assert interface_set._boundary_index is not None
+        coordinates = [-400, -180, -170, -160, -150, -100, -50, 0, 50, 90,
+                       100, 120, 150, 160, 170, 180, 200, 500,
+                       float("nan")]
+        check_frame_interface_index(interface_set, coordinates)
+
+    def test_lambda_interface_index(self):
+        index = self.increasing_set.lambda_interface_index(
+            [50, 120, 170, -170, -150, -30])
+        np.testing.assert_array_equal(index, [0, 1, 2, 2, 3, 3])
+
     def test_new_interface(self):
         new_iface = self.increasing_set.new_interface(-140)
         expected = paths.PeriodicCVDefinedVolume(self.cv, 0.0, -140, -180, 180)
@@ -9,6 +9,7 @@ from builtins import str
 from builtins import range
 from builtins import object
 import logging
+import os
 from numpy.testing import assert_allclose
 import numpy as np
 import pytest
@@ -1213,6 +1214,24 @@ class TestMinusMover(object):
             ensemble=self.minus
         )
 
+    def test_move_async(self):
+        init_innermost = make_1d_traj(self.list_innermost, [1.0]*5)
+        init_sample = Sample(
+            replica=0,
+            trajectory=init_innermost,
+            ensemble=self.innermost
+        )
+        gs = SampleSet([init_sample, self.minus_sample])
+        executor = RecordingTrialExecutor()
+        change = self.mover.move_async(gs, executor)()
+        assert len(executor.submitted) == 1
+        assert isinstance(change, paths.SubMoveChange)
+        assert change.accepted is True
+        assert change.canonical.mover == self.mover
+        assert len(change.results) == 2
+        assert change.details.segment_swap_samples is not None
+        assert change.details.extension_trajectory is not None
+
     def test_is_ensemble_change_mover(self):
         assert self.mover.is_ensemble_change_mover is True
 
@@ -1447,6 +1466,24 @@ class TestSingleReplicaMinusMover(object):
             ensemble=self.minus
         )
 
+    def test_move_async(self):
+        init_innermost = make_1d_traj(self.list_innermost, [1.0]*5)
+        init_sample = Sample(
+            replica=0,
+            trajectory=init_innermost,
+            ensemble=self.innermost
+        )
+        gs = SampleSet([init_sample, self.minus_sample])
+        expected = self.mover.move(gs)
+        executor = RecordingTrialExecutor()
+        change = self.mover.move_async(gs, executor)()
+        assert len(executor.submitted) == 1
+        assert type(change) is type(expected)
+        assert change.accepted is True
+        assert change.canonical.mover == self.mover
+        assert len(change.results) == 1
+        assert change.details == expected.details
+
     def test_is_ensemble_change_mover(self):
         assert self.mover.is_ensemble_change_mover is True
 
@@ -1599,3 +1636,173 @@ class TestDeprecation(TestShootingMover):
                           match="'new_snapshot' should be a supported "):
             a = mover.move(self.init_samp)
         assert a is not None
+
+
+class RecordingTrialExecutor(paths.SerialTrialExecutor):
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, mover, trajectory, shooting_index):
+        self.submitted.append((mover, trajectory))
+        return super(RecordingTrialExecutor, self).submit(
+            mover, trajectory, shooting_index
+        )
+
+
+class TestTrialExecutors(object):
+    def setup_method(self):
+        pes = toys.LinearSlope(m=[0.0], c=0.0)
+        topology = toys.Topology(n_spatial=1, masses=[1.0], pes=pes)
+        integ = toys.LeapfrogVerletIntegrator(dt=0.1)
+        self.engine = toys.Engine(
+            options={'integ': integ, 'n_frames_max': 100,
+                     'n_steps_per_frame': 1},
+            topology=topology
+        )
+        cv = paths.FunctionCV("x", lambda s: s.xyz[0][0])
+        state_A = CVDefinedVolume(cv, float("-inf"), 0.0)
+        self.ens1 = A2BEnsemble(state_A, CVDefinedVolume(cv, 0.5,
+                                                         float("inf")))
+        self.ens2 = A2BEnsemble(state_A, CVDefinedVolume(cv, 0.7,
+                                                         float("inf")))
+        samples = []
+        for replica, ens in enumerate([self.ens1, self.ens2]):
+            traj = paths.Trajectory([
+                toys.Snapshot(coordinates=np.array([[x]]),
+                              velocities=np.array([[1.0]]),
+                              engine=self.engine)
+                for x in [-0.05, 0.05, 0.15, 0.25, 0.35, 0.45, 0.55, 0.75]
+            ])
+            samples.append(Sample(replica=replica, trajectory=traj,
+                                  ensemble=ens))
+        self.sample_set = SampleSet(samples)
+
+    def _movers(self, ensembles):
+        movers = []
+        for seed, ens in enumerate(ensembles):
+            mover = ForwardShootMover(ensemble=ens,
+                                      selector=UniformSelector(),
+                                      engine=self.engine)
+            mover._rng = np.random.default_rng(seed)
+            mover.selector._rng = np.random.default_rng(seed + 10)
+            movers.append(mover)
+        return movers
+
+    @staticmethod
+    def _assert_same_change(change1, change2):
+        assert change1.accepted == change2.accepted
+        for sub1, sub2 in zip(change1.subchanges, change2.subchanges):
+            assert sub1.accepted == sub2.accepted
+            traj1 = sub1.trials[0].trajectory
+            traj2 = sub2.trials[0].trajectory
+            assert_allclose(traj1.xyz, traj2.xyz)
+
+    def test_serial_executor_call(self):
+        mover = self._movers([self.ens1])[0]
+        executor = RecordingTrialExecutor()
+        pending = mover.submit_trial(self.sample_set[self.ens1], executor)
+        assert len(executor.submitted) == 1
+        trials, details = mover.collect_trial(pending)
+        assert len(trials) == 1
+        assert self.ens1(trials[0].trajectory)
+        assert 'shooting_snapshot' in details
+
+    def test_sequential_independent(self):
+        seq = SequentialMover(self._movers([self.ens1, self.ens2]))
+        expected = seq.move(self.sample_set)
+        seq = SequentialMover(self._movers([self.ens1, self.ens2]))
+        executor = RecordingTrialExecutor()
+        finish = seq.move_async(self.sample_set, executor)
+        # both trials are in flight before either is accepted
+        assert len(executor.submitted) == 2
+        assert executor.submitted[0][1] is self.sample_set[self.ens1].trajectory
+        assert executor.submitted[1][1] is self.sample_set[self.ens2].trajectory
+        change = finish()
+        assert isinstance(change, paths.SequentialMoveChange)
+        self._assert_same_change(change, expected)
+
+    def test_sequential_dependent(self):
+        seq = SequentialMover(self._movers([self.ens1, self.ens1]))
+        executor = RecordingTrialExecutor()
+        change = seq.move_async(self.sample_set, executor)()
+        assert len(executor.submitted) == 2
+        # second mover must see the result of the first one
+        first = change.subchanges[0]
+        if first.accepted:
+            expected_input = first.trials[0].trajectory
+        else:
+            expected_input = self.sample_set[self.ens1].trajectory
+        assert executor.submitted[1][1] is expected_input
+
+    @pytest.mark.parametrize('executor_type', ['thread', 'process'])
+    def test_pool_executors(self, executor_type):
+        seq = SequentialMover(self._movers([self.ens1, self.ens2]))
+        expected = seq.move(self.sample_set)
+        seq = SequentialMover(self._movers([self.ens1, self.ens2]))
+        if executor_type == 'thread':
+            executor = paths.ThreadTrialExecutor(n_workers=2)
+        else:
+            executor = paths.ProcessTrialExecutor(n_workers=2)
+        with executor:
+            change = seq.move_async(self.sample_set, executor)()
+        self._assert_same_change(change, expected)
+        # unchanged snapshots are the original objects
+        for sub in change.subchanges:
+            trial = sub.trials[0]
+            original = sub.input_samples[0].trajectory
+            assert trial.trajectory[0] is original[0]
+
+    def test_process_executor_engine_error(self):
+        self.engine.options['n_frames_max'] = 1
+        mover = self._movers([self.ens1])[0]
+        with paths.ProcessTrialExecutor(n_workers=1) as executor:
+            finish = mover.move_async(self.sample_set, executor)
+            change = finish()
+        assert isinstance(change, paths.RejectedMaxLengthSampleMoveChange)
+
+    def test_path_sampling_executor(self):
+        seq = SequentialMover(self._movers([self.ens1, self.ens2]))
+        scheme = paths.LockedMoveScheme(root_mover=seq)
+        sim = paths.PathSampling(storage=None, move_scheme=scheme,
+                                 sample_set=self.sample_set)
+        sim.output_stream = open(os.devnull, 'w')
+        sim.executor = paths.ThreadTrialExecutor(n_workers=2)
+        sim.run(2)
+        sim.executor.shutdown()
+        assert sim.step == 2
+        assert len(sim.sample_set) == 2
+        sim.sample_set.sanity_check()
+
+    def test_engine_not_worker_copy(self):
+        mover = self._movers([self.ens1])[0]
+        with paths.ThreadTrialExecutor(n_workers=1) as executor:
+            mover.move_async(self.sample_set, executor)()
+        assert mover.engine is self.engine
+
+    @pytest.mark.parametrize('mover_class,n_subchanges', [
+        (SequentialMover, 3),
+        (PartialAcceptanceSequentialMover, 2),
+        (ConditionalSequentialMover, 2),
+        (NonCanonicalConditionalSequentialMover, 2),
+    ])
+    def test_sequential_types_match_move(self, mover_class, n_subchanges):
+        # the path reversal of an A->B path is always rejected
+        def make_mover():
+            shoot1, shoot2 = self._movers([self.ens1, self.ens2])
+            reversal = PathReversalMover(ensemble=self.ens1)
+            return mover_class([shoot1, reversal, shoot2])
+
+        expected = make_mover().move(self.sample_set)
+        executor = RecordingTrialExecutor()
+        change = make_mover().move_async(self.sample_set, executor)()
+        assert type(change) is type(expected)
+        assert len(change.subchanges) == n_subchanges
+        assert len(expected.subchanges) == n_subchanges
+        assert change.accepted == expected.accepted
+        assert len(executor.submitted) == n_subchanges - 1
+        for sub1, sub2 in zip(change.subchanges, expected.subchanges):
+            assert type(sub1) is type(sub2)
+            assert sub1.accepted == sub2.accepted
+            traj1 = sub1.trials[0].trajectory
+            traj2 = sub2.trials[0].trajectory
+            assert_allclose(traj1.xyz, traj2.xyz)
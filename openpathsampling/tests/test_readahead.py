@@ -0,0 +1,94 @@
+from unittest import mock
+
+import pytest
+
+import openpathsampling as paths
+from openpathsampling.netcdfplus.batch import _clustered_runs
+
+from .test_helpers import make_1d_traj
+
+
+class TestReadahead(object):
+    def setup_method(self):
+        self.ensemble = paths.LengthEnsemble(2).named("length 2")
+        self.steps = []
+        previous = None
+        for i in range(10):
+            traj = make_1d_traj(coordinates=[0.1 * i, 0.1 * i + 0.05],
+                                velocities=[1.0, 1.0])
+            sample = paths.Sample(replica=0, trajectory=traj,
+                                  ensemble=self.ensemble)
+            change = paths.AcceptedSampleMoveChange(samples=[sample])
+            active = paths.SampleSet([sample])
+            self.steps.append(paths.MCStep(mccycle=i, previous=previous,
+                                           active=active, change=change))
+            previous = active
+
+    def _storage(self, tmpdir):
+        filename = str(tmpdir.join("readahead.nc"))
+        storage = paths.Storage(filename, 'w')
+        storage.save(self.steps)
+        storage.close()
+        storage = paths.Storage(filename, 'r')
+        for store in [storage.steps, storage.samplesets, storage.samples,
+                      storage.movechanges, storage.trajectories]:
+            store.cache.clear()
+        return storage
+
+    def _check(self, loaded):
+        assert [s.__uuid__ for s in loaded] == \
+            [s.__uuid__ for s in self.steps]
+        for step, expected in zip(loaded, self.steps):
+            assert step.mccycle == expected.mccycle
+            assert step.change.__uuid__ == expected.change.__uuid__
+            assert step.change.samples[0].trajectory == \
+                expected.change.samples[0].trajectory
+            assert step.active.__uuid__ == expected.active.__uuid__
+
+    def test_clustered_runs(self):
+        assert list(_clustered_runs([], 2)) == []
+        assert list(_clustered_runs([0, 2, 3, 7, 8, 20], 2)) == \
+            [[0, 2, 3], [7, 8], [20]]
+
+    def test_preload(self, tmpdir):
+        storage = self._storage(tmpdir)
+        loaded = storage.steps.preload(range(2, 5))
+        assert [s.mccycle for s in loaded] == [2, 3, 4]
+        assert len(storage._read_buffer) == 0
+        for idx in range(2, 5):
+            assert idx in storage.steps.cache
+        # the referenced objects are loaded as well
+        for step in loaded:
+            assert storage.movechanges.index[step.change.__uuid__] in \
+                storage.movechanges.cache
+        # cached objects are not loaded again
+        assert storage.steps.preload([3, 4]) == []
+        storage.close()
+
+    @pytest.mark.parametrize('readahead', [0, 4])
+    def test_iterate(self, tmpdir, readahead):
+        storage = self._storage(tmpdir)
+        storage.steps.readahead = readahead
+        with mock.patch.object(storage.steps, 'preload',
+                               wraps=storage.steps.preload) as preload:
+            loaded = list(storage.steps)
+
+        self._check(loaded)
+        if readahead:
+            # the first step is loaded alone, the rest in chunks
+            assert preload.call_count == 3
+            assert len(storage.steps._readahead_objects) == 1
+        else:
+            preload.assert_not_called()
+        storage.close()
+
+    def test_random_access(self, tmpdir):
+        storage = self._storage(tmpdir)
+        storage.steps.readahead = 4
+        with mock.patch.object(storage.steps, 'preload',
+                               wraps=storage.steps.preload) as preload:
+            loaded = [storage.steps[idx] for idx in [5, 1, 8, 3]]
+
+        preload.assert_not_called()
+        assert [s.mccycle for s in loaded] == [5, 1, 8, 3]
+        storage.close()
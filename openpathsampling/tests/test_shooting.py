@@ -3,6 +3,7 @@ import collections
 from openpathsampling.tests.test_helpers import (
     make_1d_traj, assert_items_equal, CalvinistDynamics)
 import pytest
+from unittest import mock
 
 from openpathsampling.shooting import *
 from openpathsampling.pathmover import ForwardShootMover, BackwardShootMover
@@ -67,6 +68,45 @@ class TestShootingPointSelector(SelectorTest):
                                     )
         assert sel.pick(test_traj) == test_traj_len // 2
 
+    def test_pick_matches_linear_search(self):
+        biases = [0.5, 0.0, 2.0, 1.0, 0.0, 0.25]
+        sel = ShootingPointSelector()
+        sel._biases = lambda traj: biases
+        for rand in [0.0, 0.49, 0.5, 2.5, 3.4, 3.5, 3.7, 3.75]:
+            sel._rng = mock.Mock()
+            sel._rng.random.return_value = rand / sum(biases)
+            idx = 0
+            prob = biases[0]
+            while prob <= rand and idx < len(biases) - 1:
+                idx += 1
+                prob += biases[idx]
+            assert sel.pick(list(range(len(biases)))) == idx
+
+    def test_bias_table_cached(self):
+        calls = []
+        sel = ShootingPointSelector()
+        sel._biases = lambda traj: calls.append(traj) or [1.0] * len(traj)
+        assert sel.sum_bias(self.mytraj) == 5.0
+        sel.pick(self.mytraj)
+        sel.probability(self.mytraj[0], self.mytraj)
+        assert len(calls) == 1
+        # trajectories that grew are not taken from the cache
+        longer = paths.Trajectory(self.mytraj)
+        longer.__uuid__ = self.mytraj.__uuid__
+        longer.append(self.mytraj[0])
+        assert sel.sum_bias(longer) == 6.0
+        assert len(calls) == 2
+        # neither are trajectories that were changed in place
+        longer[-1] = self.mytraj[1]
+        sel._biases = lambda traj: calls.append(traj) or [
+            2.0 if snap is self.mytraj[1] else 1.0 for snap in traj
+        ]
+        assert sel.sum_bias(longer) == 8.0
+        assert len(calls) == 3
+        # but equal frames share a table
+        assert sel.sum_bias(paths.Trajectory(longer)) == 8.0
+        assert len(calls) == 3
+
 
 class TestGaussianBiasSelector(SelectorTest):
     def setup_method(self):
@@ -100,6 +140,11 @@ class TestGaussianBiasSelector(SelectorTest):
         expected = pytest.approx(self.f[frame] / norm)
         assert self.sel.probability(traj[frame], traj) == expected
 
+    def test_biases(self):
+        biases = self.sel._biases(self.mytraj)
+        assert isinstance(biases, np.ndarray)
+        np.testing.assert_allclose(biases, self.f)
+
 
 class TestBiasedSelector(SelectorTest):
     def setup_method(self):
@@ -143,6 +188,13 @@ class TestBiasedSelector(SelectorTest):
         expected = pytest.approx(f[frame] / norm)
         assert sel.probability(traj[frame], traj) == expected
 
+    @pytest.mark.parametrize('func', ['gaussian', 'uniform'])
+    def test_biases(self, func):
+        sel = self._create_selector(func)
+        biases = sel._biases(self.mytraj)
+        assert isinstance(biases, np.ndarray)
+        np.testing.assert_allclose(biases, self.f[func])
+
 
 class TestFirstFrameSelector(SelectorTest):
     def test_pick(self):
@@ -44,6 +44,31 @@ class TestFeatures(object):
         Snapshot = SnapshotFactory('TestSnapshot', [features.box_vectors], 'A simple testing snapshot')
         compate_attribute(Snapshot, 'box_vectors', np.array([0.1, 2.0]), identity)
 
+    def test_velocities_negated_on_access(self):
+        Snapshot = SnapshotFactory('TestSnapshot', [features.velocities],
+                                   'A simple testing snapshot')
+        snap = Snapshot(velocities=np.array([0.1, 2.0]))
+        rev = snap.reversed
+        # the reversed copy gets its velocities only when they are used
+        assert 'velocities' not in rev.__dict__
+        assert_allclose(rev.velocities, [-0.1, -2.0])
+        assert rev.velocities is rev.velocities
+        assert rev.reversed.velocities is snap.velocities
+        rev.velocities = np.array([1.0, 1.0])
+        assert_allclose(rev.velocities, [1.0, 1.0])
+        assert Snapshot(velocities=None).reversed.velocities is None
+
+    def test_velocities_unset(self):
+        Snapshot = SnapshotFactory('TestSnapshot', [features.velocities],
+                                   'A simple testing snapshot')
+        snap = Snapshot.__new__(Snapshot)
+        Snapshot.init_empty(snap)
+        with pytest.raises(AttributeError):
+            snap.velocities
+        with pytest.raises(AttributeError):
+            snap.reversed.velocities
+
+
 class TestSnapshotCopy(object):
     def test_copy_none(self):
         if not paths.integration_tools.HAS_OPENMM:
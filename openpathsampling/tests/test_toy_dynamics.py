@@ -156,6 +156,39 @@ class TestCombinations(object):
         assert_almost_equal(self.simpletest.kinetic_energy(self), 0.4575)
 
 
+class TestBatchedPES(object):
+    def setup_method(self):
+        self.positions = np.array([init_pos, [0.1, -0.3], [1.2, 0.4]])
+        self.velocities = np.array([init_vel, [0.2, 0.1], [-0.5, 0.3]])
+        self.mass = sys_mass
+
+    @pytest.mark.parametrize('pes_name', ['gaussian', 'outer', 'linear',
+                                          'harmonic', 'doublewell',
+                                          'combination'])
+    def test_matches_single(self, pes_name):
+        if pes_name == 'combination':
+            pes = gaussian + outer - linear
+        else:
+            pes = globals()[pes_name]
+
+        class Single(object):
+            pass
+
+        single = Single()
+        single.mass = self.mass
+        batch_V = pes.V(self)
+        batch_dVdx = pes.dVdx(self)
+        batch_ke = pes.kinetic_energy(self)
+        assert batch_V.shape == (3,)
+        assert batch_dVdx.shape == (3, 2)
+        for i in range(3):
+            single.positions = self.positions[i]
+            single.velocities = self.velocities[i]
+            assert_almost_equal(batch_V[i], pes.V(single))
+            np.testing.assert_allclose(batch_dVdx[i], pes.dVdx(single))
+            assert_almost_equal(batch_ke[i], pes.kinetic_energy(single))
+
+
 # === TESTS FOR TOY ENGINE OBJECT =========================================
 
 class Test_convert_fcn(object):
@@ -259,6 +292,84 @@ class TestToyEngine(object):
             assert_items_equal(s1.coordinates[0], s2.coordinates[0])
             assert_items_equal(s1.velocities[0], s2.velocities[0])
 
+    def _batch_snapshots(self):
+        return [
+            toy.Snapshot(coordinates=np.array([init_pos + shift]),
+                         velocities=np.array([init_vel - shift]),
+                         engine=self.sim)
+            for shift in [0.0, 0.1, -0.2]
+        ]
+
+    def test_generate_n_frames_batch(self):
+        snapshots = self._batch_snapshots()
+        trajs = self.sim.generate_n_frames_batch(snapshots, 3)
+        assert len(trajs) == 3
+        for snap, traj in zip(snapshots, trajs):
+            self.sim.current_snapshot = snap
+            expected = self.sim.generate_n_frames(3)
+            assert len(traj) == 3
+            for s1, s2 in zip(traj, expected):
+                np.testing.assert_allclose(s1.coordinates, s2.coordinates)
+                np.testing.assert_allclose(s1.velocities, s2.velocities)
+
+    def test_generate_batch(self):
+        snapshots = self._batch_snapshots()
+        lengths = [2, 4, 3]
+        ensembles = {snap: paths.LengthEnsemble(n)
+                     for snap, n in zip(snapshots, lengths)}
+
+        def running(traj, trusted=False):
+            # each walker stops at the length of its own ensemble
+            return ensembles[traj[0]].can_append(traj, trusted)
+
+        trajs = self.sim.generate_batch(snapshots, running)
+        assert [len(t) for t in trajs] == lengths
+        for snap, traj in zip(snapshots, trajs):
+            assert traj[0] is snap
+            expected = self.sim.generate(snap, [running])
+            assert len(traj) == len(expected)
+            for s1, s2 in zip(traj, expected):
+                np.testing.assert_allclose(s1.coordinates, s2.coordinates)
+                np.testing.assert_allclose(s1.velocities, s2.velocities)
+
+    def test_generate_batch_backward(self):
+        snapshots = self._batch_snapshots()
+        ens = paths.LengthEnsemble(3)
+        trajs = self.sim.generate_batch(snapshots, [ens.can_prepend],
+                                        direction=-1)
+        for snap, traj in zip(snapshots, trajs):
+            assert traj[-1] is snap
+            expected = self.sim.generate(snap, [ens.can_prepend],
+                                         direction=-1)
+            assert len(traj) == len(expected) == 3
+            for s1, s2 in zip(traj, expected):
+                np.testing.assert_allclose(s1.coordinates, s2.coordinates)
+                np.testing.assert_allclose(s1.velocities, s2.velocities)
+
+    def test_generate_batch_backward_no_insert(self, monkeypatch):
+        # backward frames are merged once, not prepended one at a time
+        def insert(traj, index, snapshot):
+            raise AssertionError("per-frame insert")
+
+        monkeypatch.setattr(paths.Trajectory, 'insert', insert)
+        snapshots = self._batch_snapshots()
+        ens = paths.LengthEnsemble(5)
+        trajs = self.sim.generate_batch(snapshots, [ens.can_prepend],
+                                        direction=-1)
+        assert [len(t) for t in trajs] == [5] * 3
+        for snap, traj in zip(snapshots, trajs):
+            assert traj[-1] is snap
+
+    def test_generate_batch_max_length(self):
+        snapshots = self._batch_snapshots()
+        with pytest.raises(paths.engines.EngineMaxLengthError) as err:
+            self.sim.generate_batch(snapshots, [true_func])
+        assert len(err.value.last_trajectory) == self.sim.n_frames_max
+
+        self.sim.options['on_max_length'] = 'stop'
+        trajs = self.sim.generate_batch(snapshots, [true_func])
+        assert [len(t) for t in trajs] == [self.sim.n_frames_max] * 3
+
     def test_start_with_snapshot(self):
         snap = toy.Snapshot(coordinates=np.array([1, 2]),
                             velocities=np.array([3, 4]))
@@ -2,6 +2,9 @@ from __future__ import absolute_import
 from builtins import object
 import logging
 
+import numpy as np
+import pytest
+
 from .test_helpers import (CallIdentity, prepend_exception_message,
                            make_1d_traj, assert_items_equal)
 
@@ -133,3 +136,94 @@ class TestSubtrajectoryIndices(object):
         assert indicesA == [[0, 1], [3], [11, 12]]
         assert indicesB == [[5, 6], [8]]
         assert indicesABA == [[3, 4, 5, 6, 7, 8, 9, 10, 11]]
+
+
+class TestFeatureArrays(object):
+    def setup_method(self):
+        topology = paths.engines.toy.Topology(n_spatial=2, masses=[1.0, 1.0],
+                                              pes=None, n_atoms=2)
+        engine = paths.engines.toy.Engine({}, topology)
+        self.traj = paths.Trajectory([
+            paths.engines.toy.Snapshot(
+                coordinates=np.array([[float(i), -float(i)],
+                                      [0.5 * i, 1.0]]),
+                velocities=np.array([[1.0 + i, 2.0], [-1.0, 0.5 * i]]),
+                engine=engine
+            )
+            for i in range(5)
+        ])
+
+    def _check_arrays(self, traj):
+        coordinates = np.array([snap.coordinates for snap in traj])
+        velocities = np.array([snap.velocities for snap in traj])
+        np.testing.assert_allclose(traj.coordinates_as_numpy(), coordinates)
+        np.testing.assert_allclose(traj.coordinates_as_numpy([1]),
+                                   coordinates[:, [1]])
+        np.testing.assert_allclose(traj.velocities_as_numpy(), velocities)
+        np.testing.assert_allclose(traj.xyz, coordinates)
+        np.testing.assert_allclose(traj.velocities, velocities)
+        assert traj.box_vectors_as_numpy() is None
+
+    def test_in_memory(self):
+        self._check_arrays(self.traj)
+        self._check_arrays(self.traj.reversed)
+        assert paths.Trajectory([]).coordinates_as_numpy() is None
+
+    def test_from_storage(self, tmpdir):
+        filename = str(tmpdir.join("feature_arrays.nc"))
+        storage = paths.Storage(filename, 'w')
+        storage.save(self.traj)
+        storage.save(self.traj.reversed)
+        storage.close()
+
+        storage = paths.Storage(filename, 'r')
+        traj = storage.trajectories[0]
+        rev = storage.trajectories[1]
+        # unordered, reversed, and repeated proxies
+        mixed = paths.Trajectory(traj.as_proxies()[::-2]
+                                 + rev.as_proxies()[:3]
+                                 + traj.as_proxies()[:1])
+        for t in [traj, rev, mixed]:
+            uuids = [frame.__uuid__ for frame in t.as_proxies()]
+            assert storage.snapshots.feature_as_numpy('coordinates',
+                                                      uuids) is not None
+            self._check_arrays(t)
+
+        storage.close()
+
+    def test_reversed_proxies(self, tmpdir):
+        filename = str(tmpdir.join("reversed_proxies.nc"))
+        storage = paths.Storage(filename, 'w')
+        storage.save(self.traj)
+        storage.close()
+
+        storage = paths.Storage(filename, 'r')
+        traj = storage.trajectories[0]
+        rev = traj.reversed
+        # reversing does not load the snapshots
+        assert all(isinstance(frame, paths.netcdfplus.LoaderProxy)
+                   for frame in rev.iter_proxies())
+        np.testing.assert_allclose(
+            rev.velocities_as_numpy(),
+            -np.array([s.velocities for s in self.traj])[::-1]
+        )
+        assert [s.__uuid__ for s in rev.reversed.iter_proxies()] == \
+            [s.__uuid__ for s in self.traj]
+        storage.close()
+
+    def test_attributes_keep_units(self):
+        unit = pytest.importorskip("simtk.unit")
+        traj = paths.Trajectory([
+            paths.engines.toy.Snapshot(
+                coordinates=snap.coordinates * unit.nanometers,
+                velocities=snap.velocities * unit.nanometers / unit.picoseconds,
+                engine=snap.engine
+            )
+            for snap in self.traj
+        ])
+        coordinates = np.array([snap.coordinates for snap in self.traj])
+        assert traj.coordinates[2].value_in_unit(unit.nanometers)[0, 0] == 2.0
+        assert traj.velocities[0].unit == unit.nanometers / unit.picoseconds
+        np.testing.assert_allclose(traj.xyz, coordinates)
+        np.testing.assert_allclose(traj.coordinates_as_numpy(),
+                                        coordinates)
@@ -412,6 +412,88 @@ class TestCVRangeVolumePeriodic(object):
                 volume.PeriodicCVDefinedVolume(op_id, -100, 75))
 
 
+class TestEvaluate(object):
+    def setup_method(self):
+        self.values = [-1.0, -0.75, -0.5, -0.3, 0.0, 0.25, 0.3, 0.5, 0.75,
+                       1.0, float('inf'), float('-inf'), float('nan')]
+        self.periodic_values = [-210.0, -160.0, -100.0, -60.0, 0.0, 60.0,
+                                75.0, 90.0, 170.0, 250.0]
+
+    @staticmethod
+    def _check_evaluate(vol, values):
+        result = vol.evaluate(values)
+        assert result.dtype == bool
+        assert result.tolist() == [vol(val) for val in values]
+
+    @pytest.mark.parametrize('vol_name', ['volA', 'volB', 'volC', 'volD'])
+    def test_cv_defined(self, vol_name):
+        vol = {'volA': volA, 'volB': volB, 'volC': volC, 'volD': volD}
+        self._check_evaluate(vol[vol_name], self.values)
+
+    def test_combinations(self):
+        for vol in [volA | volB, volA & volB, volA ^ volB, volA - volB,
+                    ~volA, ~(volA | volC) & volD, volA | volume.FullVolume(),
+                    volume.EmptyVolume(), volume.FullVolume()]:
+            self._check_evaluate(vol, self.values)
+
+    def test_periodic(self):
+        for (lmin, lmax) in [(-100, 75), (75, -100), (-150, 150),
+                             (50, 100), (-180, 180), (-100, 100)]:
+            vol = volume.PeriodicCVDefinedVolume(op_id, lmin, lmax,
+                                                 -180, 180)
+            self._check_evaluate(vol, self.periodic_values)
+            self._check_evaluate(~vol, self.periodic_values)
+
+    def test_periodic_no_bounds(self):
+        vol = volume.PeriodicCVDefinedVolume(op_id, -100, 75)
+        self._check_evaluate(vol, self.periodic_values)
+
+    def test_trajectory(self):
+        traj = make_1d_traj(self.values[:10])
+        cv = paths.FunctionCV("x", lambda s: s.xyz[0][0])
+        vol = (volume.CVDefinedVolume(cv, -0.5, 0.5)
+               | volume.CVDefinedVolume(cv, 0.25, 0.75))
+        assert vol.evaluate(traj).tolist() == [vol(s) for s in traj]
+
+    def test_empty_trajectory(self):
+        assert len(volA.evaluate([])) == 0
+        assert len((volA | volB).evaluate([])) == 0
+
+    def test_combination_short_circuit(self):
+        # the second volume is only evaluated where the result depends on it
+        calls = []
+
+        class Tracker(CallIdentity):
+            def __call__(self, value):
+                calls.extend(value)
+                return value
+
+        vol_tracked = volume.CVDefinedVolume(Tracker(), 0.0, 1.0)
+        (volA | vol_tracked).evaluate([-0.2, 0.4, 0.8])
+        assert calls == [0.8]
+        del calls[:]
+        (volA & vol_tracked).evaluate([-0.2, 0.4, 0.8])
+        assert calls == [-0.2, 0.4]
+
+    def test_voronoi(self):
+        centers = np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0]])
+        distances = paths.FunctionCV(
+            "distances",
+            lambda s: np.linalg.norm(s.xyz[0] - centers, axis=1),
+            cv_wrap_numpy_array=True
+        )
+        vor = volume.VoronoiVolume(distances, state=1)
+        traj = paths.Trajectory([
+            paths.engines.toy.Snapshot(coordinates=np.array([[x, y]]))
+            for (x, y) in [(0.1, 0.1), (0.9, 0.2), (0.2, 0.8), (0.6, 0.1)]
+        ])
+        assert vor.cells(traj).tolist() == [vor.cell(s) for s in traj]
+        assert vor.cells(traj).tolist() == [0, 1, 2, 1]
+        assert vor.evaluate(traj).tolist() == [vor(s) for s in traj]
+        assert vor.evaluate(traj, state=2).tolist() == [False, False,
+                                                        True, False]
+
+
 class TestAbstract(object):
     @raises_with_message_like(TypeError, "Can't instantiate abstract class")
     def test_abstract_volume(self):
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+import openpathsampling as paths
+from openpathsampling.netcdfplus.batch import _contiguous_runs
+
+from .test_helpers import make_1d_traj
+
+
+class TestWriteBatch(object):
+    def setup_method(self):
+        self.trajs = [
+            make_1d_traj(coordinates=[0.1 * i, 0.1 * i + 0.05],
+                         velocities=[1.0, -1.0])
+            for i in range(4)
+        ]
+
+    def _check_stored(self, filename):
+        storage = paths.Storage(filename, 'r')
+        assert len(storage.trajectories) == len(self.trajs)
+        for traj, loaded in zip(self.trajs, storage.trajectories):
+            assert loaded.__uuid__ == traj.__uuid__
+            assert loaded == traj
+            np.testing.assert_allclose(loaded.xyz, traj.xyz)
+            np.testing.assert_allclose(
+                [snap.velocities for snap in loaded],
+                [snap.velocities for snap in traj]
+            )
+        storage.close()
+
+    def test_contiguous_runs(self):
+        assert list(_contiguous_runs([])) == []
+        assert list(_contiguous_runs([3])) == [[3]]
+        assert list(_contiguous_runs([0, 1, 2, 5, 6, 9])) == \
+            [[0, 1, 2], [5, 6], [9]]
+
+    def test_batch_save(self, tmpdir):
+        filename = str(tmpdir.join("batch.nc"))
+        storage = paths.Storage(filename, 'w')
+        with storage.batch() as batch:
+            storage.save(self.trajs)
+            assert storage._batch is batch
+            # the trajectories are one write of all rows
+            variable = storage.trajectories.vars['snapshots']
+            assert sorted(batch._pending[variable]) == \
+                list(range(len(self.trajs)))
+
+        assert storage._batch is None
+        assert len(batch) == 0
+        storage.close()
+        self._check_stored(filename)
+
+    def test_read_in_batch(self, tmpdir):
+        filename = str(tmpdir.join("batch.nc"))
+        storage = paths.Storage(filename, 'w')
+        with storage.batch() as batch:
+            storage.save(self.trajs[0])
+            n_pending = len(batch)
+            assert n_pending > 0
+            # single rows are read from the batch
+            assert storage.trajectories.vars['uuid'][0] == \
+                self.trajs[0].__uuid__
+            assert len(batch) == n_pending
+            # the length of a store writes pending rows
+            assert len(storage.trajectories) == 1
+            assert len(batch) < n_pending
+            storage.save(self.trajs[1:])
+            storage.trajectories.cache.clear()
+            assert storage.trajectories[1] == self.trajs[1]
+
+        storage.close()
+        self._check_stored(filename)
+
+    def test_nested(self, tmpdir):
+        filename = str(tmpdir.join("batch.nc"))
+        storage = paths.Storage(filename, 'w')
+        with storage.batch() as outer:
+            with storage.batch() as inner:
+                assert inner is outer
+                storage.save(self.trajs)
+
+            assert len(outer) > 0
+
+        assert len(outer) == 0
+        storage.close()
+        self._check_stored(filename)
+
+    def test_exception(self, tmpdir):
+        filename = str(tmpdir.join("batch.nc"))
+        storage = paths.Storage(filename, 'w')
+        with pytest.raises(RuntimeError):
+            with storage.batch():
+                storage.save(self.trajs)
+                raise RuntimeError("failed")
+
+        assert storage._batch is None
+        storage.close()
+        self._check_stored(filename)
+
+    def test_close_in_batch(self, tmpdir):
+        filename = str(tmpdir.join("batch.nc"))
+        storage = paths.Storage(filename, 'w')
+        batch = storage.batch()
+        batch.__enter__()
+        storage.save(self.trajs)
+        storage.close()
+        self._check_stored(filename)
@@ -0,0 +1,230 @@
+"""
+Executors for the trial trajectory generation of engine-based movers.
+
+An :class:`.EngineMover` hands the dynamics part of a move (everything done
+in its ``_run`` method) to a :class:`.TrialExecutor`, and only resumes with
+the acceptance once the trial trajectory is needed. With a concurrent
+executor, several independent trials (e.g., the submoves of a
+:class:`.SequentialMover` acting on different ensembles) can be generated
+at the same time. The Monte Carlo acceptance is always done in the main
+thread, in the order of the move tree.
+"""
+import logging
+import threading
+from concurrent.futures import (
+    Future, ThreadPoolExecutor, ProcessPoolExecutor
+)
+
+import dill
+import numpy as np
+
+from openpathsampling.engines import Trajectory
+from openpathsampling.rng import default_rng
+
+logger = logging.getLogger(__name__)
+
+# per-thread engine instances; only set in executor worker threads/processes
+_worker_state = threading.local()
+
+
+def _init_worker(copy_engines):
+    _worker_state.engines = {}
+    _worker_state.copy_engines = copy_engines
+
+
+def _copy_engine(engine):
+    copy = engine.__class__.from_dict(engine.to_dict())
+    # same UUID: this is the same engine as far as storage is concerned
+    copy.__uuid__ = engine.__uuid__
+    return copy
+
+
+def worker_engine(engine):
+    """The instance of ``engine`` to be used in the current worker.
+
+    Outside of executor workers, this is the engine itself. Inside a worker
+    thread, this is a copy of the engine which is private to that thread;
+    inside a worker process, it is the first instance of that engine the
+    process has seen. In both cases, the instance is reused for all trials
+    run by the worker.
+
+    Parameters
+    ----------
+    engine : :class:`.DynamicsEngine`
+        the engine as requested by the mover
+
+    Returns
+    -------
+    :class:`.DynamicsEngine`
+        the engine instance to run dynamics with
+    """
+    engines = getattr(_worker_state, 'engines', None)
+    if engines is None or engine is None:
+        return engine
+
+    try:
+        local = engines[engine.__uuid__]
+    except KeyError:
+        if _worker_state.copy_engines:
+            local = _copy_engine(engine)
+        else:
+            local = engine
+        engines[engine.__uuid__] = local
+
+    return local
+
+
+def _restore_snapshots(trajectory, originals):
+    """Replace snapshots in ``trajectory`` by same-UUID ``originals``"""
+    lookup = {snap.__uuid__: snap for snap in originals}
+    return Trajectory([lookup.get(snap.__uuid__, snap)
+                       for snap in trajectory])
+
+
+def _run_serialized(payload):
+    # runs in a worker process; both input and output are dill strings, so
+    # that we don't depend on the objects being picklable by the stdlib
+    mover, trajectory, shooting_index, seed = dill.loads(payload)
+    np.random.seed(seed)
+    try:
+        result = mover._run(trajectory, shooting_index)
+    except Exception as e:
+        return dill.dumps((False, e))
+    return dill.dumps((True, result))
+
+
+class TrialExecutor(object):
+    """Abstract executor for the trials of :class:`.EngineMover` objects.
+
+    Executors can be used as context managers, in which case they are shut
+    down on exit.
+    """
+    def submit(self, mover, trajectory, shooting_index):
+        """Start generating the trial trajectory for a mover.
+
+        Parameters
+        ----------
+        mover : :class:`.EngineMover`
+            the mover whose ``_run`` method will create the trial
+        trajectory : :class:`.Trajectory`
+            the input trajectory
+        shooting_index : int
+            index of the shooting point within `trajectory`
+
+        Returns
+        -------
+        concurrent.futures.Future
+            future for the ``(trial_trajectory, run_details)`` tuple
+        """
+        raise NotImplementedError()
+
+    def shutdown(self, wait=True):
+        """Release the resources held by this executor"""
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+
+class SerialTrialExecutor(TrialExecutor):
+    """Generate each trial immediately, in the calling thread.
+
+    This is the default behavior of :class:`.EngineMover`.
+    """
+    def submit(self, mover, trajectory, shooting_index):
+        future = Future()
+        try:
+            result = mover._run(trajectory, shooting_index)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        return future
+
+
+class ThreadTrialExecutor(TrialExecutor):
+    """Generate trials in a pool of worker threads.
+
+    Each worker thread runs its own copy of the engine (see
+    :func:`.worker_engine`). This is useful for engines that release the
+    GIL during integration, or that mostly wait on an external process.
+    Note that threads share the global NumPy random number generator, so
+    stochastic dynamics are not reproducible with this executor.
+
+    Parameters
+    ----------
+    n_workers : int
+        number of worker threads
+    """
+    def __init__(self, n_workers):
+        self.n_workers = n_workers
+        self._pool = ThreadPoolExecutor(max_workers=n_workers,
+                                        initializer=_init_worker,
+                                        initargs=(True,))
+
+    def submit(self, mover, trajectory, shooting_index):
+        return self._pool.submit(mover._run, trajectory, shooting_index)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+class ProcessTrialExecutor(TrialExecutor):
+    """Generate trials in a pool of worker processes.
+
+    The mover and the input trajectory are sent to the worker with
+    ``dill``; each worker process keeps the first instance of each engine
+    it receives. Since worker processes would otherwise share the state of
+    the global NumPy random number generator, each trial reseeds it with a
+    seed drawn (in submission order) from the OPS random number generator.
+
+    Parameters
+    ----------
+    n_workers : int
+        number of worker processes
+    mp_context : multiprocessing context
+        context used to start the worker processes; default is the
+        platform default
+    """
+    def __init__(self, n_workers, mp_context=None):
+        self.n_workers = n_workers
+        self._rng = default_rng()
+        self._pool = ProcessPoolExecutor(max_workers=n_workers,
+                                         mp_context=mp_context,
+                                         initializer=_init_worker,
+                                         initargs=(False,))
+
+    def submit(self, mover, trajectory, shooting_index):
+        seed = int(self._rng.integers(2**32))
+        payload = dill.dumps((mover, trajectory, shooting_index, seed))
+        remote = self._pool.submit(_run_serialized, payload)
+        future = Future()
+
+        def unpack(remote):
+            try:
+                success, result = dill.loads(remote.result())
+            except Exception as e:
+                future.set_exception(e)
+                return
+
+            if success:
+                trial_trajectory, run_details = result
+                future.set_result(
+                    (_restore_snapshots(trial_trajectory, trajectory),
+                     run_details)
+                )
+            else:
+                last = getattr(result, 'last_trajectory', None)
+                if last is not None:
+                    result.last_trajectory = _restore_snapshots(last,
+                                                                trajectory)
+                future.set_exception(result)
+
+        remote.add_done_callback(unpack)
+        return future
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
@@ -7,6 +7,7 @@ Created on 03.09.2014
 from . import range_logic
 import abc
 from openpathsampling.netcdfplus import StorableNamedObject
+from openpathsampling.integration_tools import is_simtk_quantity
 import numpy as np
 import warnings
 
@@ -43,6 +44,12 @@ def join_volumes(volume_list, name=None):
     return volume
 
 
+def _as_frame_list(trajectory):
+    """List of (proxy) snapshots from a Trajectory or list"""
+    itraj = getattr(trajectory, 'iter_proxies', trajectory.__iter__)
+    return list(itraj())
+
+
 class Volume(StorableNamedObject):
     """
     A Volume describes a set of snapshots
@@ -60,6 +67,27 @@ class Volume(StorableNamedObject):
         '''
         return False # pragma: no cover
 
+    def evaluate(self, trajectory):
+        """Test each frame of a trajectory for being in the volume.
+
+        The default implementation calls the volume for every frame.
+        Subclasses override this to test all frames at once, e.g., with a
+        single (batched) call to a collective variable and NumPy
+        comparisons.
+
+        Parameters
+        ----------
+        trajectory : :class:`.Trajectory` or list of :class:`.BaseSnapshot`
+            the frames to test
+
+        Returns
+        -------
+        np.ndarray of bool
+            for each frame, whether it is in the volume
+        """
+        return np.array([self(frame) for frame in _as_frame_list(trajectory)],
+                        dtype=bool)
+
     def __str__(self):
         '''
         Returns a string representation of the volume
@@ -145,6 +173,21 @@ class VolumeCombination(Volume):
         #return self.fnc(self.volume1.__call__(snapshot),
                         #self.volume2.__call__(snapshot))
 
+    def evaluate(self, trajectory):
+        frames = _as_frame_list(trajectory)
+        a = self.volume1.evaluate(frames)
+        # truth table of fnc, indexed by [a, b]
+        table = np.array([[bool(self.fnc(a_val, b_val))
+                           for b_val in (False, True)]
+                          for a_val in (False, True)])
+        # as in __call__: only test volume2 where the result depends on it
+        needs_b = (table[:, 0] != table[:, 1])[a.astype(int)]
+        b = np.zeros(len(frames), dtype=bool)
+        if needs_b.any():
+            idx = np.flatnonzero(needs_b)
+            b[idx] = self.volume2.evaluate([frames[i] for i in idx])
+        return table[a.astype(int), b.astype(int)]
+
     def __str__(self):
         return '(' + self.sfnc.format(str(self.volume1), str(self.volume2)) + ')'
 
@@ -205,6 +248,9 @@ class NegatedVolume(Volume):
     def __call__(self, snapshot):
         return not self.volume(snapshot)
 
+    def evaluate(self, trajectory):
+        return ~self.volume.evaluate(trajectory)
+
     def __str__(self):
         return '(not ' + str(self.volume) + ')'
 
@@ -217,6 +263,9 @@ class EmptyVolume(Volume):
     def __call__(self, snapshot):
         return False
 
+    def evaluate(self, trajectory):
+        return np.zeros(len(trajectory), dtype=bool)
+
     def __and__(self, other):
         return self
 
@@ -244,6 +293,9 @@ class FullVolume(Volume):
     def __call__(self, snapshot):
         return True
 
+    def evaluate(self, trajectory):
+        return np.ones(len(trajectory), dtype=bool)
+
     def __invert__(self):
         return EmptyVolume()
 
@@ -419,6 +471,41 @@ class CVDefinedVolume(Volume):
         if self._cv_returns_iterable is None:
             self._cv_returns_iterable = self._is_iterable(val)
 
+        return self._get_cv_float_value(val)
+
+    def _get_cv_floats(self, trajectory):
+        """CV values for all frames, as float array.
+
+        Returns None if the values (or the volume bounds) carry units, in
+        which case the comparisons must be done one frame at a time.
+        """
+        if is_simtk_quantity(self.lambda_min) or \
+                is_simtk_quantity(self.lambda_max):
+            return None
+
+        values = self.collectivevariable(trajectory)
+        n_frames = len(values)
+        if n_frames == 0:
+            return np.zeros(0)
+
+        if self._cv_returns_iterable is None:
+            self._cv_returns_iterable = self._is_iterable(values[0])
+
+        if is_simtk_quantity(values[0]):
+            return None
+
+        try:
+            array = np.asarray(values, dtype=float)
+        except (TypeError, ValueError):
+            array = None
+
+        if array is None or array.size != n_frames:
+            # let _get_cv_float raise its error for non-scalar values
+            array = np.array([self._get_cv_float_value(val)
+                              for val in values])
+        return array.reshape(n_frames)
+
+    def _get_cv_float_value(self, val):
         # NumPy >= 2.0 (e.g., 2.4.2 in CI) no longer allows __float__ for
         # non-0D ndarrays, so we explicitly scalarize only size-1 arrays here.
         if isinstance(val, np.ndarray):
@@ -431,6 +518,20 @@ class CVDefinedVolume(Volume):
 
         return val.__float__()
 
+    def evaluate(self, trajectory):
+        frames = _as_frame_list(trajectory)
+        values = self._get_cv_floats(frames)
+        if values is None:
+            return super(CVDefinedVolume, self).evaluate(frames)
+
+        # written as in __call__, so that NaN gives the same result
+        result = np.ones(len(values), dtype=bool)
+        if self.lambda_min != float('-inf'):
+            result &= ~(self.lambda_min > values)
+        if self.lambda_max != float('inf'):
+            result &= ~(self.lambda_max <= values)
+        return result
+
     def __call__(self, snapshot):
         l = self._get_cv_float(snapshot)
 
@@ -488,6 +589,9 @@ class PeriodicCVDefinedVolume(CVDefinedVolume):
                 class MonkeyPatch(type(self)):
                     def __call__(self, *arg, **kwarg):
                         return True
+
+                    def evaluate(self, trajectory):
+                        return np.ones(len(trajectory), dtype=bool)
                 self.__class__ = MonkeyPatch
             else:
                 self.lambda_min = self.do_wrap(lambda_min)
@@ -517,6 +621,17 @@ class PeriodicCVDefinedVolume(CVDefinedVolume):
 
             return wrapped
 
+    def _do_wrap_array(self, values):
+        """Vectorized version of :meth:`.do_wrap` for a float array"""
+        val = values - self._period_shift
+        # int() truncates toward zero, like np.trunc
+        positive = values - np.trunc(val / self._period_len) * self._period_len
+        wrapped = values + np.trunc((self._period_len - val)
+                                    / self._period_len) * self._period_len
+        wrapped = np.where(wrapped >= self._period_len,
+                           wrapped - self._period_len, wrapped)
+        return np.where(val > 0, positive, wrapped)
+
     # next few functions add support for range logic
     def _copy_with_new_range(self, lmin, lmax):
         return PeriodicCVDefinedVolume(self.collectivevariable, lmin, lmax,
@@ -550,6 +665,19 @@ class PeriodicCVDefinedVolume(CVDefinedVolume):
         else:
             return self.lambda_min <= l < self.lambda_max
 
+    def evaluate(self, trajectory):
+        frames = _as_frame_list(trajectory)
+        values = self._get_cv_floats(frames)
+        if values is None:
+            return Volume.evaluate(self, frames)
+
+        if self.wrap:
+            values = self._do_wrap_array(values)
+        if self.lambda_min > self.lambda_max:
+            return (values >= self.lambda_min) | (values < self.lambda_max)
+        else:
+            return (self.lambda_min <= values) & (values < self.lambda_max)
+
     def __str__(self):
         if self.wrap:
             fcn = 'x|({0}(x) - {2:g}) % {1:g} + {2:g}'.format(
@@ -618,6 +746,40 @@ class VoronoiVolume(Volume):
 
         return min_idx
 
+    def cells(self, trajectory):
+        '''
+        Returns the index of the voronoi cell for each frame
+
+        Parameters
+        ----------
+        trajectory : :class:`.Trajectory` or list of snapshots
+            the frames to be tested
+
+        Returns
+        -------
+        np.ndarray of int
+            index of the voronoi cell for each frame
+        '''
+        frames = _as_frame_list(trajectory)
+        if len(frames) == 0:
+            return np.zeros(0, dtype=int)
+
+        distances = np.asarray(self.collectivevariable(frames), dtype=float)
+        distances = distances.reshape(len(frames), -1)
+        # NaN is never smaller than the current minimum in cell
+        distances = np.where(np.isnan(distances), np.inf, distances)
+        # same cutoff as in cell: larger distances don't count
+        min_idx = np.argmin(distances, axis=1)
+        too_far = distances[np.arange(len(frames)), min_idx] >= 1000000000.0
+        min_idx[too_far] = -1
+        return min_idx
+
+    def evaluate(self, trajectory, state=None):
+        if state is None:
+            state = self.state
+
+        return self.cells(trajectory) == state
+
     def __call__(self, snapshot, state=None):
         '''
         Returns `True` if snapshot belongs to voronoi cell in state